@@ -0,0 +1,93 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Coroutine, Dict, Optional
+
+from config import settings
+from logging_config import LoggingConfig
+
+# Create logger
+logger = LoggingConfig('agent_loop').setup_logger()
+
+class AgentEventLoop:
+    """
+    One asyncio event loop in a daemon thread, shared by every async agent run.
+
+    Request threads hand coroutines to the loop with submit(). Blocking work that
+    has no async client (sync graph nodes, pandas, matplotlib, psycopg2) runs in
+    the loop's default executor, which is capped at offload_workers threads.
+    """
+
+    def __init__(self, offload_workers: int = 8):
+        self.offload_workers = offload_workers
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._active = 0
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        """Start the loop thread if it isn't running yet"""
+        with self._lock:
+            if self._loop is not None:
+                return self._loop
+            loop = asyncio.new_event_loop()
+            loop.set_default_executor(
+                ThreadPoolExecutor(max_workers=self.offload_workers, thread_name_prefix="agent-offload")
+            )
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=run, name="agent-loop", daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+            logger.info(f"Started agent event loop ({self.offload_workers} offload workers)")
+            return loop
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule a coroutine on the loop from any thread"""
+        loop = self.start()
+        with self._lock:
+            self._active += 1
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        future.add_done_callback(self._finished)
+        return future
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and block the calling thread for its result"""
+        return self.submit(coro).result(timeout=timeout)
+
+    def _finished(self, future: Future) -> None:
+        with self._lock:
+            self._active -= 1
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Agent run failed: {str(future.exception())}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Loop state for /metrics"""
+        with self._lock:
+            return {
+                "running": self._loop is not None and self._loop.is_running(),
+                "active_runs": self._active,
+                "offload_workers": self.offload_workers
+            }
+
+_agent_loop = None
+_agent_loop_lock = threading.Lock()
+
+def get_agent_loop() -> AgentEventLoop:
+    """Get the process-wide agent event loop"""
+    global _agent_loop
+    if _agent_loop is None:
+        with _agent_loop_lock:
+            if _agent_loop is None:
+                _agent_loop = AgentEventLoop(settings.execution.offload_workers)
+    return _agent_loop
+
+def asyncio_mode() -> bool:
+    """True if agent runs should go through the shared event loop"""
+    return settings.execution.mode == "asyncio"
@@ -7,13 +7,17 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 
 from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
 from typing import TypedDict, Dict, Any, List, Optional
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 from langgraph.checkpoint.memory import MemorySaver
 from logging_config import LoggingConfig
 from scipy import stats as scipy_stats  # Renamed to avoid conflict
-from progress_manager import ProgressManager, AnalyticsProgressStages, ProgressCallback
+from progress_manager import (
+    AnalyticsProgressStages, ProgressCallback, TokenCallback, build_run_config, progress_from_config,
+    token_callback_from_config, stream_llm, astream_llm
+)
 
 import warnings, base64, json, datetime
 from io import BytesIO
@@ -28,6 +32,7 @@ logger = LoggingConfig('analytics_agent').setup_logger()
 class AnalyticsState(TypedDict):
     original_query: str
     sql_results: str
+    result_table: Dict[str, Any]  # Columnar result from the SQL agent, preferred over sql_results
     parsed_data: Dict[str, Any]
     statistical_analysis: Dict[str, Any]
     trends_analysis: Dict[str, Any]
@@ -37,159 +42,194 @@ class AnalyticsState(TypedDict):
     formatted_response: str
     error: str
 
-def parse_data_node(state: AnalyticsState, progress_callback: Optional[ProgressCallback] = None, progress_manager: Optional[ProgressManager] = None) -> AnalyticsState:
-    """Parse SQL results into structured data for analysis."""
-    if progress_manager:
-        progress_manager.update_progress("Parsing SQL results...", AnalyticsProgressStages.PARSE_DATA, progress_callback)
+def _parse_result_table(result_table: Dict[str, Any]) -> Dict[str, Any]:
+    """Build parsed_data straight from the SQL agent's columnar result, keeping native value types."""
+    headers = result_table.get("columns", [])
+    if not headers:
+        return {"error": "No headers found"}
+    if not result_table.get("row_count"):
+        return {"error": "No data rows found"}
+
+    data = result_table["data"]
+    rows = [list(row) for row in zip(*(data[column] for column in headers))]
+    return {
+        "headers": headers,
+        "rows": rows,
+        "dtypes": result_table.get("dtypes", {}),
+        "row_count": len(rows),
+        "column_count": len(headers)
+    }
+
+def _parse_text_table(sql_results: str) -> Dict[str, Any]:
+    """
+    Fallback parser for SQL results only available as a rendered ASCII table.
+
+    Values containing '|', '+' or '-' can be split or dropped here, so callers
+    should pass the columnar result_table whenever they have it.
+    """
+    # Extract tabular data from SQL results
+    lines = sql_results.split('\n')
+    logger.debug(f"Total lines in SQL results: {len(lines)}")
     
-    logger.info("\n=== Parsing Data ===")
-    logger.info(f"Original query: {state['original_query']}")
-    logger.info(f"SQL results preview: {state['sql_results'][:200]}...")
+    # Debug: Print all lines to see the actual format
+    for i, line in enumerate(lines):
+        logger.debug(f"Line {i}: '{line}'")
     
-    try:
-        # Extract tabular data from SQL results
-        lines = state['sql_results'].split('\n')
-        logger.info(f"Total lines in SQL results: {len(lines)}")
-        
-        # Debug: Print all lines to see the actual format
-        for i, line in enumerate(lines):
-            logger.info(f"Line {i}: '{line}'")
-        
-        # Find the start of the table (usually after "Query successful" message)
-        table_start = 0
-        for i, line in enumerate(lines):
-            if '✅ Query successful' in line:
-                table_start = i + 1
-                break
-        
-        logger.info(f"Table starts at line: {table_start}")
-        
-        # Extract table content (everything after the success message)
-        table_lines = []
-        for line in lines[table_start:]:
-            stripped_line = line.strip()
-            if stripped_line and not stripped_line.startswith('✅') and not stripped_line.startswith('❌'):
-                table_lines.append(stripped_line)
-        
-        logger.info(f"Table lines found: {len(table_lines)}")
-        for i, line in enumerate(table_lines):
-            logger.info(f"Table line {i}: '{line}'")
-        
-        if not table_lines:
-            logger.warning("No table data found in SQL results")
-            return {"parsed_data": {"error": "No tabular data found"}}
-        
-        # More robust table parsing
-        # Look for lines with "|" (table rows) and lines with "+" and "-" (separators)
-        header_line = None
-        data_rows = []
-        headers = []
-        
-        # Strategy 1: Find first line with "|" that looks like headers
-        for i, line in enumerate(table_lines):
-            if '|' in line and '+' not in line and '-' not in line:
-                # This could be headers or data
+    # Find the start of the table (usually after "Query successful" message)
+    table_start = 0
+    for i, line in enumerate(lines):
+        if '✅ Query successful' in line:
+            table_start = i + 1
+            break
+    
+    logger.debug(f"Table starts at line: {table_start}")
+    
+    # Extract table content (everything after the success message)
+    table_lines = []
+    for line in lines[table_start:]:
+        stripped_line = line.strip()
+        if stripped_line and not stripped_line.startswith('✅') and not stripped_line.startswith('❌'):
+            table_lines.append(stripped_line)
+    
+    logger.debug(f"Table lines found: {len(table_lines)}")
+    for i, line in enumerate(table_lines):
+        logger.debug(f"Table line {i}: '{line}'")
+    
+    if not table_lines:
+        return {"error": "No tabular data found"}
+    
+    # More robust table parsing
+    # Look for lines with "|" (table rows) and lines with "+" and "-" (separators)
+    header_line = None
+    data_rows = []
+    headers = []
+    
+    # Strategy 1: Find first line with "|" that looks like headers
+    for i, line in enumerate(table_lines):
+        if '|' in line and '+' not in line and '-' not in line:
+            # This could be headers or data
+            cells = [cell.strip() for cell in line.split('|') if cell.strip()]
+            
+            if not header_line and cells:  # First data-like line is probably headers
+                header_line = line
+                headers = cells
+                logger.debug(f"Found headers: {headers}")
+            elif headers and len(cells) == len(headers):  # Subsequent lines with same column count are data
+                data_rows.append(cells)
+                logger.debug(f"Found data row: {cells}")
+        elif '|' in line and headers:
+            # This line has '|' and we already have headers, so it might be data
+            # even if it has '+' or '-' (like timezone data)
+            # Check if it's actually data by seeing if it has substantial content
+            content_check = line.replace('+', '').replace('-', '').replace('|', '').strip()
+            if content_check and len(content_check) >= 10:  # Has substantial content = data
                 cells = [cell.strip() for cell in line.split('|') if cell.strip()]
-                
-                if not header_line and cells:  # First data-like line is probably headers
-                    header_line = line
-                    headers = cells
-                    logger.info(f"Found headers: {headers}")
-                elif headers and len(cells) == len(headers):  # Subsequent lines with same column count are data
+                if len(cells) == len(headers):
                     data_rows.append(cells)
-                    logger.info(f"Found data row: {cells}")
-            elif '|' in line and headers:
-                # This line has '|' and we already have headers, so it might be data
-                # even if it has '+' or '-' (like timezone data)
-                # Check if it's actually data by seeing if it has substantial content
+                    logger.debug(f"Found data row (with special chars): {cells}")
+    
+    # Strategy 2: If Strategy 1 didn't work, try alternative parsing
+    if not headers or not data_rows:
+        logger.debug("Strategy 1 failed, trying alternative parsing...")
+        
+        # Look for typical ASCII table patterns
+        # Separator lines have '+' and '-' but are mostly made of these characters
+        # Data lines have '|' and actual data
+        separator_indices = []
+        for i, line in enumerate(table_lines):
+            # A separator line should be mostly '+' and '-' characters
+            # and not contain alphanumeric content between pipes
+            if '+' in line and '-' in line:
+                # Check if this is actually a separator (not data with timezone +00:00)
+                # Remove the '+' and '-' and '|' characters and see what's left
                 content_check = line.replace('+', '').replace('-', '').replace('|', '').strip()
-                if content_check and len(content_check) >= 10:  # Has substantial content = data
-                    cells = [cell.strip() for cell in line.split('|') if cell.strip()]
-                    if len(cells) == len(headers):
-                        data_rows.append(cells)
-                        logger.info(f"Found data row (with special chars): {cells}")
-        
-        # Strategy 2: If Strategy 1 didn't work, try alternative parsing
-        if not headers or not data_rows:
-            logger.info("Strategy 1 failed, trying alternative parsing...")
+                if not content_check or len(content_check) < 5:  # Very little content = separator
+                    separator_indices.append(i)
+        
+        logger.debug(f"Separator indices: {separator_indices}")
+        
+        if len(separator_indices) >= 2:
+            # Extract headers (line between first two separators)
+            header_line_idx = separator_indices[0] + 1
+            if header_line_idx < len(table_lines):
+                header_line = table_lines[header_line_idx]
+                headers = [col.strip() for col in header_line.split('|') if col.strip()]
+                logger.debug(f"Alt strategy headers: {headers}")
             
-            # Look for typical ASCII table patterns
-            # Separator lines have '+' and '-' but are mostly made of these characters
-            # Data lines have '|' and actual data
-            separator_indices = []
-            for i, line in enumerate(table_lines):
-                # A separator line should be mostly '+' and '-' characters
-                # and not contain alphanumeric content between pipes
-                if '+' in line and '-' in line:
-                    # Check if this is actually a separator (not data with timezone +00:00)
-                    # Remove the '+' and '-' and '|' characters and see what's left
-                    content_check = line.replace('+', '').replace('-', '').replace('|', '').strip()
-                    if not content_check or len(content_check) < 5:  # Very little content = separator
-                        separator_indices.append(i)
+            # Extract data rows (between second separator and last separator or end)
+            data_start = separator_indices[1] + 1 if len(separator_indices) > 1 else separator_indices[0] + 2
+            data_end = separator_indices[-1] if len(separator_indices) > 2 else len(table_lines)
             
-            logger.info(f"Separator indices: {separator_indices}")
-            
-            if len(separator_indices) >= 2:
-                # Extract headers (line between first two separators)
-                header_line_idx = separator_indices[0] + 1
-                if header_line_idx < len(table_lines):
-                    header_line = table_lines[header_line_idx]
-                    headers = [col.strip() for col in header_line.split('|') if col.strip()]
-                    logger.info(f"Alt strategy headers: {headers}")
-                
-                # Extract data rows (between second separator and last separator or end)
-                data_start = separator_indices[1] + 1 if len(separator_indices) > 1 else separator_indices[0] + 2
-                data_end = separator_indices[-1] if len(separator_indices) > 2 else len(table_lines)
-                
-                for i in range(data_start, data_end):
-                    if i < len(table_lines):
-                        line = table_lines[i]
-                        # Only process lines that have '|' but are not separators
-                        if '|' in line:
-                            # Double-check this isn't a separator
-                            content_check = line.replace('+', '').replace('-', '').replace('|', '').strip()
-                            if content_check and len(content_check) >= 5:  # Has actual content
-                                row = [cell.strip() for cell in line.split('|') if cell.strip()]
-                                if headers and len(row) == len(headers):
-                                    data_rows.append(row)
-                                    logger.info(f"Alt strategy data row: {row}")
-        
-        # Strategy 3: If still no luck, try simple "|" split on all non-separator lines
-        if not headers or not data_rows:
-            logger.info("Both strategies failed, trying simple split...")
-            
-            all_data_lines = []
-            for line in table_lines:
-                if '|' in line and not ('+' in line and '-' in line):
-                    cells = [cell.strip() for cell in line.split('|') if cell.strip()]
-                    if cells:
-                        all_data_lines.append(cells)
-            
-            if all_data_lines:
-                # First line is headers, rest are data
-                headers = all_data_lines[0]
-                data_rows = all_data_lines[1:] if len(all_data_lines) > 1 else []
-                logger.info(f"Simple strategy headers: {headers}")
-                logger.info(f"Simple strategy data rows: {len(data_rows)}")
-        
-        logger.info(f"Final result - Headers: {headers}, Data rows: {len(data_rows)}")
-        
-        if not headers:
-            logger.warning("No headers found")
-            return {"parsed_data": {"error": "No headers found"}}
-        
-        if len(data_rows) == 0:
-            logger.warning("No data rows found")
-            return {"parsed_data": {"error": "No data rows found"}}
-        
-        parsed_data = {
-            "headers": headers,
-            "rows": data_rows,
-            "row_count": len(data_rows),
-            "column_count": len(headers)
-        }
+            for i in range(data_start, data_end):
+                if i < len(table_lines):
+                    line = table_lines[i]
+                    # Only process lines that have '|' but are not separators
+                    if '|' in line:
+                        # Double-check this isn't a separator
+                        content_check = line.replace('+', '').replace('-', '').replace('|', '').strip()
+                        if content_check and len(content_check) >= 5:  # Has actual content
+                            row = [cell.strip() for cell in line.split('|') if cell.strip()]
+                            if headers and len(row) == len(headers):
+                                data_rows.append(row)
+                                logger.debug(f"Alt strategy data row: {row}")
+    
+    # Strategy 3: If still no luck, try simple "|" split on all non-separator lines
+    if not headers or not data_rows:
+        logger.debug("Both strategies failed, trying simple split...")
         
-        logger.info(f"Successfully parsed {len(data_rows)} rows with {len(headers)} columns")
+        all_data_lines = []
+        for line in table_lines:
+            if '|' in line and not ('+' in line and '-' in line):
+                cells = [cell.strip() for cell in line.split('|') if cell.strip()]
+                if cells:
+                    all_data_lines.append(cells)
+        
+        if all_data_lines:
+            # First line is headers, rest are data
+            headers = all_data_lines[0]
+            data_rows = all_data_lines[1:] if len(all_data_lines) > 1 else []
+            logger.debug(f"Simple strategy headers: {headers}")
+            logger.debug(f"Simple strategy data rows: {len(data_rows)}")
+    
+    logger.debug(f"Final result - Headers: {headers}, Data rows: {len(data_rows)}")
+    
+    if not headers:
+        return {"error": "No headers found"}
+    
+    if len(data_rows) == 0:
+        return {"error": "No data rows found"}
+    
+    parsed_data = {
+        "headers": headers,
+        "rows": data_rows,
+        "row_count": len(data_rows),
+        "column_count": len(headers)
+    }
+    
+    return parsed_data
+
+def parse_data_node(state: AnalyticsState, config: Optional[RunnableConfig] = None) -> AnalyticsState:
+    """Parse SQL results into structured data for analysis."""
+    progress_callback, progress_manager = progress_from_config(config)
+    if progress_manager:
+        progress_manager.update_progress("Parsing SQL results...", AnalyticsProgressStages.PARSE_DATA, progress_callback)
+    
+    logger.info("\n=== Parsing Data ===")
+    logger.info(f"Original query: {state['original_query']}")
+    
+    try:
+        result_table = state.get("result_table")
+        if result_table:
+            parsed_data = _parse_result_table(result_table)
+        else:
+            logger.info("No columnar result available, parsing the rendered results table")
+            parsed_data = _parse_text_table(state['sql_results'])
+
+        if "error" in parsed_data:
+            logger.warning(parsed_data["error"])
+            return {"parsed_data": parsed_data}
+
+        logger.info(f"Successfully parsed {parsed_data['row_count']} rows with {parsed_data['column_count']} columns")
         return {"parsed_data": parsed_data}
         
     except Exception as e:
@@ -197,8 +237,9 @@ def parse_data_node(state: AnalyticsState, progress_callback: Optional[ProgressC
         logger.error(error_msg)
         return {"error": error_msg, "parsed_data": {"error": error_msg}}
 
-def statistical_analysis_node(state: AnalyticsState, progress_callback: Optional[ProgressCallback] = None, progress_manager: Optional[ProgressManager] = None) -> AnalyticsState:
+def statistical_analysis_node(state: AnalyticsState, config: Optional[RunnableConfig] = None) -> AnalyticsState:
     """Perform statistical analysis on the parsed data."""
+    progress_callback, progress_manager = progress_from_config(config)
     if progress_manager:
         progress_manager.update_progress("Performing statistical analysis...", AnalyticsProgressStages.STATISTICAL_ANALYSIS, progress_callback)
     
@@ -230,9 +271,10 @@ def statistical_analysis_node(state: AnalyticsState, progress_callback: Optional
                 id_columns.append(col)
         
         # Identify numeric columns
+        dtypes = data.get("dtypes", {})
         numeric_columns = []
         for col in df.columns:
-            if col not in id_columns:  # Skip ID columns
+            if col not in id_columns and dtypes.get(col) != "boolean":  # Skip ID and boolean columns
                 try:
                     # Try to convert to numeric
                     numeric_data = pd.to_numeric(df[col], errors='coerce')
@@ -308,8 +350,9 @@ def statistical_analysis_node(state: AnalyticsState, progress_callback: Optional
         logger.error(error_msg)
         return {"error": error_msg, "statistical_analysis": {"error": error_msg}}
 
-def trends_analysis_node(state: AnalyticsState, progress_callback: Optional[ProgressCallback] = None, progress_manager: Optional[ProgressManager] = None) -> AnalyticsState:
+def trends_analysis_node(state: AnalyticsState, config: Optional[RunnableConfig] = None) -> AnalyticsState:
     """Analyze trends in the data."""
+    progress_callback, progress_manager = progress_from_config(config)
     if progress_manager:
         progress_manager.update_progress("Analyzing trends...", AnalyticsProgressStages.TRENDS_ANALYSIS, progress_callback)
     
@@ -436,28 +479,19 @@ def trends_analysis_node(state: AnalyticsState, progress_callback: Optional[Prog
         logger.error(error_msg)
         return {"error": error_msg, "trends_analysis": {"error": error_msg}}
 
-def generate_insights_node(state: AnalyticsState, progress_callback: Optional[ProgressCallback] = None, progress_manager: Optional[ProgressManager] = None) -> AnalyticsState:
-    """Generate business insights using LLM based on the analysis."""
-    if progress_manager:
-        progress_manager.update_progress("Generating business insights...", AnalyticsProgressStages.GENERATE_INSIGHTS, progress_callback)
-    
-    logger.info("\n=== Generating Insights ===")
+def _insights_messages(state: AnalyticsState) -> List[Any]:
+    # Prepare analysis summary for LLM
+    analysis_summary = {
+        "original_query": state["original_query"],
+        "data_overview": {
+            "total_records": state["statistical_analysis"].get("total_records", 0),
+            "columns": state["parsed_data"].get("headers", [])
+        },
+        "statistical_findings": state["statistical_analysis"],
+        "trends_analysis": state["trends_analysis"]
+    }
     
-    try:
-        llm = get_openai_client(temperature=0.3)
-        
-        # Prepare analysis summary for LLM
-        analysis_summary = {
-            "original_query": state["original_query"],
-            "data_overview": {
-                "total_records": state["statistical_analysis"].get("total_records", 0),
-                "columns": state["parsed_data"].get("headers", [])
-            },
-            "statistical_findings": state["statistical_analysis"],
-            "trends_analysis": state["trends_analysis"]
-        }
-        
-        system_prompt = """You are a senior business analyst specializing in partner affiliate programs, trading platforms, and financial services. 
+    system_prompt = """You are a senior business analyst specializing in partner affiliate programs, trading platforms, and financial services. 
 
 Your task is to analyze data and provide actionable business insights for stakeholders in the affiliate marketing and trading industry.
 
@@ -475,7 +509,7 @@ Format your response as a list of clear, concise insights. Each insight should:
 
 Be specific about partner performance, activation rates, geographic trends, commission patterns, and client acquisition if relevant to the data."""
 
-        user_prompt = f"""Analyze the following data and provide business insights:
+    user_prompt = f"""Analyze the following data and provide business insights:
 
 Original Query: {state["original_query"]}
 
@@ -484,23 +518,34 @@ Data Analysis Results:
 
 Provide 5-10 actionable business insights based on this analysis."""
 
-        response = llm.invoke([
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=user_prompt)
-        ])
-        
-        # Parse insights from response
-        insights_text = response.content
-        insights = [insight.strip() for insight in insights_text.split('\n') if insight.strip() and not insight.strip().startswith('#')]
-        
-        # Filter out empty insights and headers
-        filtered_insights = []
-        for insight in insights:
-            if len(insight) > 20 and not insight.startswith('**') and not insight.startswith('##'):
-                # Clean up bullet points and numbering
-                cleaned_insight = insight.lstrip('- ').lstrip('• ').lstrip('* ')
-                if cleaned_insight and len(cleaned_insight) > 10:
-                    filtered_insights.append(cleaned_insight)
+    return [SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)]
+
+def _parse_insights(insights_text: str) -> List[str]:
+    # Parse insights from response
+    insights = [insight.strip() for insight in insights_text.split('\n') if insight.strip() and not insight.strip().startswith('#')]
+    
+    # Filter out empty insights and headers
+    filtered_insights = []
+    for insight in insights:
+        if len(insight) > 20 and not insight.startswith('**') and not insight.startswith('##'):
+            # Clean up bullet points and numbering
+            cleaned_insight = insight.lstrip('- ').lstrip('• ').lstrip('* ')
+            if cleaned_insight and len(cleaned_insight) > 10:
+                filtered_insights.append(cleaned_insight)
+    return filtered_insights
+
+def generate_insights_node(state: AnalyticsState, config: Optional[RunnableConfig] = None) -> AnalyticsState:
+    """Generate business insights using LLM based on the analysis."""
+    progress_callback, progress_manager = progress_from_config(config)
+    if progress_manager:
+        progress_manager.update_progress("Generating business insights...", AnalyticsProgressStages.GENERATE_INSIGHTS, progress_callback)
+    
+    logger.info("\n=== Generating Insights ===")
+    
+    try:
+        llm = get_openai_client(temperature=0.3)
+        insights_text = stream_llm(llm, _insights_messages(state), token_callback_from_config(config), stream="insights")
+        filtered_insights = _parse_insights(insights_text)
         
         logger.info(f"Generated {len(filtered_insights)} business insights")
         return {"insights": filtered_insights}
@@ -510,8 +555,30 @@ Provide 5-10 actionable business insights based on this analysis."""
         logger.error(error_msg)
         return {"error": error_msg, "insights": [f"Error generating insights: {error_msg}"]}
 
-def create_visualizations_node(state: AnalyticsState, progress_callback: Optional[ProgressCallback] = None, progress_manager: Optional[ProgressManager] = None) -> AnalyticsState:
+async def agenerate_insights_node(state: AnalyticsState, config: Optional[RunnableConfig] = None) -> AnalyticsState:
+    """Async generate_insights_node for the event-loop execution mode."""
+    progress_callback, progress_manager = progress_from_config(config)
+    if progress_manager:
+        progress_manager.update_progress("Generating business insights...", AnalyticsProgressStages.GENERATE_INSIGHTS, progress_callback)
+
+    logger.info("\n=== Generating Insights ===")
+
+    try:
+        llm = get_openai_client(temperature=0.3)
+        insights_text = await astream_llm(llm, _insights_messages(state), token_callback_from_config(config), stream="insights")
+        filtered_insights = _parse_insights(insights_text)
+
+        logger.info(f"Generated {len(filtered_insights)} business insights")
+        return {"insights": filtered_insights}
+
+    except Exception as e:
+        error_msg = f"Error generating insights: {str(e)}"
+        logger.error(error_msg)
+        return {"error": error_msg, "insights": [f"Error generating insights: {error_msg}"]}
+
+def create_visualizations_node(state: AnalyticsState, config: Optional[RunnableConfig] = None) -> AnalyticsState:
     """Create visualizations based on the data and analysis."""
+    progress_callback, progress_manager = progress_from_config(config)
     if progress_manager:
         progress_manager.update_progress("Creating visualizations...", AnalyticsProgressStages.CREATE_VISUALIZATIONS, progress_callback)
     
@@ -1033,8 +1100,9 @@ What is the most appropriate chart type?"""
             "visualization_images": []
         }
 
-def format_response_node(state: AnalyticsState, progress_callback: Optional[ProgressCallback] = None, progress_manager: Optional[ProgressManager] = None) -> AnalyticsState:
+def format_response_node(state: AnalyticsState, config: Optional[RunnableConfig] = None) -> AnalyticsState:
     """Format the final analytics response."""
+    progress_callback, progress_manager = progress_from_config(config)
     if progress_manager:
         progress_manager.update_progress("Formatting analytics report...", AnalyticsProgressStages.FORMAT_RESPONSE, progress_callback)
     
@@ -1129,33 +1197,62 @@ def format_response_node(state: AnalyticsState, progress_callback: Optional[Prog
         logger.error(error_msg)
         return {"error": error_msg, "formatted_response": f"❌ Error formatting analytics response: {error_msg}"}
 
-# Create the graph
-workflow = StateGraph(AnalyticsState)
+def create_workflow(async_nodes: bool = False):
+    """Create and compile the analytics workflow; async_nodes uses the async insights node (run with ainvoke)."""
+    workflow = StateGraph(AnalyticsState)
 
-# Add nodes with different names to avoid state key conflicts
-workflow.add_node("parse_data_node", parse_data_node)
-workflow.add_node("statistical_analysis_node", statistical_analysis_node)
-workflow.add_node("trends_analysis_node", trends_analysis_node)
-workflow.add_node("generate_insights_node", generate_insights_node)
-workflow.add_node("create_visualizations_node", create_visualizations_node)
-workflow.add_node("format_response_node", format_response_node)
+    # Add nodes with different names to avoid state key conflicts
+    workflow.add_node("parse_data_node", parse_data_node)
+    workflow.add_node("statistical_analysis_node", statistical_analysis_node)
+    workflow.add_node("trends_analysis_node", trends_analysis_node)
+    workflow.add_node("generate_insights_node", agenerate_insights_node if async_nodes else generate_insights_node)
+    workflow.add_node("create_visualizations_node", create_visualizations_node)
+    workflow.add_node("format_response_node", format_response_node)
 
-# Define the flow
-workflow.add_edge("parse_data_node", "statistical_analysis_node")
-workflow.add_edge("statistical_analysis_node", "trends_analysis_node")
-workflow.add_edge("trends_analysis_node", "generate_insights_node")
-workflow.add_edge("generate_insights_node", "create_visualizations_node")
-workflow.add_edge("create_visualizations_node", "format_response_node")
-workflow.add_edge("format_response_node", END)
+    # Define the flow
+    workflow.add_edge("parse_data_node", "statistical_analysis_node")
+    workflow.add_edge("statistical_analysis_node", "trends_analysis_node")
+    workflow.add_edge("trends_analysis_node", "generate_insights_node")
+    workflow.add_edge("generate_insights_node", "create_visualizations_node")
+    workflow.add_edge("create_visualizations_node", "format_response_node")
+    workflow.add_edge("format_response_node", END)
 
-# Set the entry point
-workflow.set_entry_point("parse_data_node")
+    # Set the entry point
+    workflow.set_entry_point("parse_data_node")
+
+    return workflow.compile()
+
+# Compile the graphs once; progress callbacks are passed per invocation.
+# Under ainvoke the CPU-bound nodes (pandas, scipy, matplotlib) run in the loop's executor.
+app = create_workflow()
+async_app = create_workflow(async_nodes=True)
+
+def initial_analytics_state(original_query: str, sql_results: str, result_table: Optional[Dict[str, Any]] = None) -> AnalyticsState:
+    """Initial state for a run of the analytics workflow."""
+    return {
+        "original_query": original_query,
+        "sql_results": sql_results,
+        "result_table": result_table or {},
+        "parsed_data": {},
+        "statistical_analysis": {},
+        "trends_analysis": {},
+        "insights": [],
+        "visualizations": [],
+        "visualization_images": [],
+        "formatted_response": "",
+        "error": ""
+    }
 
-# Compile the graph
-app = workflow.compile()
+def _analytics_failure(e: Exception) -> dict:
+    error_msg = f"Analytics workflow failed: {str(e)}"
+    logger.error(error_msg)
+    return {
+        "formatted_response": f"❌ Analytics Error: {error_msg}",
+        "visualization_images": []
+    }
 
 # Helper function to run analytics on SQL results
-def analyze_sql_results(original_query: str, sql_results: str, progress_callback: Optional[ProgressCallback] = None) -> dict:
+def analyze_sql_results(original_query: str, sql_results: str, progress_callback: Optional[ProgressCallback] = None, result_table: Optional[Dict[str, Any]] = None, token_callback: Optional[TokenCallback] = None) -> dict:
     """
     Main function to run analytics on SQL results.
     
@@ -1163,56 +1260,19 @@ def analyze_sql_results(original_query: str, sql_results: str, progress_callback
         original_query: The original user question
         sql_results: The formatted results from SQL agent
         progress_callback: Optional callback for progress updates
+        result_table: Columnar results from SQL agent; when given, sql_results is not parsed
+        token_callback: Optional callback receiving streamed insight tokens
     
     Returns:
         Dict containing formatted analytics report and visualization images
     """
     logger.info(f"\n=== Starting Analytics for Query: {original_query} ===")
     
-    # Initialize state
-    initial_state = {
-        "original_query": original_query,
-        "sql_results": sql_results,
-        "parsed_data": {},
-        "statistical_analysis": {},
-        "trends_analysis": {},
-        "insights": [],
-        "visualizations": [],
-        "visualization_images": [],
-        "formatted_response": "",
-        "error": ""
-    }
-    
     # Run the workflow
     try:
-        # Initialize progress manager
-        progress_manager = ProgressManager(is_sub_workflow=False)  # Analytics is a standalone workflow
-        
-        # Create workflow with progress manager
-        workflow = StateGraph(AnalyticsState)
-
-        # Add nodes with progress manager
-        workflow.add_node("parse_data_node", lambda state: parse_data_node(state, progress_callback, progress_manager))
-        workflow.add_node("statistical_analysis_node", lambda state: statistical_analysis_node(state, progress_callback, progress_manager))
-        workflow.add_node("trends_analysis_node", lambda state: trends_analysis_node(state, progress_callback, progress_manager))
-        workflow.add_node("generate_insights_node", lambda state: generate_insights_node(state, progress_callback, progress_manager))
-        workflow.add_node("create_visualizations_node", lambda state: create_visualizations_node(state, progress_callback, progress_manager))
-        workflow.add_node("format_response_node", lambda state: format_response_node(state, progress_callback, progress_manager))
-
-        # Define the flow
-        workflow.add_edge("parse_data_node", "statistical_analysis_node")
-        workflow.add_edge("statistical_analysis_node", "trends_analysis_node")
-        workflow.add_edge("trends_analysis_node", "generate_insights_node")
-        workflow.add_edge("generate_insights_node", "create_visualizations_node")
-        workflow.add_edge("create_visualizations_node", "format_response_node")
-        workflow.add_edge("format_response_node", END)
-
-        # Set the entry point
-        workflow.set_entry_point("parse_data_node")
-
-        # Compile and run
-        app = workflow.compile()
-        result = app.invoke(initial_state, config={"recursion_limit": 20})
+        # Analytics is a standalone workflow, so it reports the full 0-100% range
+        config = build_run_config(progress_callback, is_sub_workflow=False, recursion_limit=20, token_callback=token_callback)
+        result = app.invoke(initial_analytics_state(original_query, sql_results, result_table), config=config)
         
         logger.info("Analytics workflow completed successfully")
         return {
@@ -1220,9 +1280,20 @@ def analyze_sql_results(original_query: str, sql_results: str, progress_callback
             "visualization_images": result["visualization_images"]
         }
     except Exception as e:
-        error_msg = f"Analytics workflow failed: {str(e)}"
-        logger.error(error_msg)
+        return _analytics_failure(e)
+
+async def aanalyze_sql_results(original_query: str, sql_results: str, progress_callback: Optional[ProgressCallback] = None, result_table: Optional[Dict[str, Any]] = None, token_callback: Optional[TokenCallback] = None) -> dict:
+    """Async analyze_sql_results for the event-loop execution mode; same arguments and result."""
+    logger.info(f"\n=== Starting Analytics for Query: {original_query} ===")
+
+    try:
+        config = build_run_config(progress_callback, is_sub_workflow=False, recursion_limit=20, token_callback=token_callback)
+        result = await async_app.ainvoke(initial_analytics_state(original_query, sql_results, result_table), config=config)
+
+        logger.info("Analytics workflow completed successfully")
         return {
-            "formatted_response": f"❌ Analytics Error: {error_msg}",
-            "visualization_images": []
-        } 
\ No newline at end of file
+            "formatted_response": result["formatted_response"],
+            "visualization_images": result["visualization_images"]
+        }
+    except Exception as e:
+        return _analytics_failure(e)
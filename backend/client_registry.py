@@ -0,0 +1,185 @@
+import asyncio
+import threading
+from typing import Any, Dict, Optional
+
+import httpx
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from supabase import AsyncClient, Client
+from config import settings, create_async_supabase_client, create_supabase_client
+from logging_config import LoggingConfig
+
+# Create logger
+logger = LoggingConfig('client_registry').setup_logger()
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def _transport_pool_stats(client: Optional[httpx.Client]) -> Dict[str, int]:
+    """Best-effort connection counts from the httpcore pool behind an httpx client"""
+    if client is None:
+        return {"open_connections": 0, "idle_connections": 0}
+    try:
+        connections = list(client._transport._pool.connections)
+        return {
+            "open_connections": len(connections),
+            "idle_connections": sum(1 for c in connections if c.is_idle())
+        }
+    except AttributeError:
+        return {}
+
+class ClientRegistry:
+    """
+    Process-wide owner of the Supabase, chat and embedding clients.
+
+    Clients are created lazily on first use and then shared by every request, so
+    their underlying HTTP connection pools stay warm (keep-alive, optional HTTP/2).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._http_client: Optional[httpx.Client] = None
+        self._async_http_client: Optional[httpx.AsyncClient] = None
+        self._supabase: Optional[Client] = None
+        self._async_supabase: Optional[AsyncClient] = None
+        self._async_supabase_lock: Optional[asyncio.Lock] = None
+        self._chat_models: Dict[float, ChatOpenAI] = {}
+        self._embeddings: Optional[OpenAIEmbeddings] = None
+        self._stats = {
+            "supabase": {"created": 0, "requests": 0},
+            "async_supabase": {"created": 0, "requests": 0},
+            "chat_models": {"created": 0, "requests": 0},
+            "embeddings": {"created": 0, "requests": 0}
+        }
+
+    def _count_request(self, name: str) -> None:
+        with self._lock:
+            self._stats[name]["requests"] += 1
+
+    def _http_options(self) -> Dict[str, Any]:
+        http2 = settings.http.http2 and _http2_available()
+        if settings.http.http2 and not http2:
+            logger.warning("HTTP2_ENABLED is set but the 'h2' package is not installed; using HTTP/1.1")
+        return {
+            "http2": http2,
+            "timeout": settings.http.timeout,
+            "limits": httpx.Limits(
+                max_connections=settings.http.max_connections,
+                max_keepalive_connections=settings.http.max_keepalive_connections,
+                keepalive_expiry=settings.http.keepalive_expiry
+            )
+        }
+
+    def http_client(self) -> httpx.Client:
+        """Shared keep-alive HTTP client used by the OpenAI-compatible clients"""
+        if self._http_client is None:
+            with self._lock:
+                if self._http_client is None:
+                    options = self._http_options()
+                    self._http_client = httpx.Client(**options)
+                    logger.info(f"Created shared HTTP client (http2: {options['http2']})")
+        return self._http_client
+
+    def async_http_client(self) -> httpx.AsyncClient:
+        """Shared async HTTP client for ainvoke/astream; only used from the agent event loop"""
+        if self._async_http_client is None:
+            with self._lock:
+                if self._async_http_client is None:
+                    options = self._http_options()
+                    self._async_http_client = httpx.AsyncClient(**options)
+                    logger.info(f"Created shared async HTTP client (http2: {options['http2']})")
+        return self._async_http_client
+
+    def supabase(self) -> Client:
+        """Shared Supabase client"""
+        if self._supabase is None:
+            with self._lock:
+                if self._supabase is None:
+                    self._supabase = create_supabase_client(
+                        settings.supabase.url,
+                        settings.supabase.service_role_key
+                    )
+                    self._stats["supabase"]["created"] += 1
+                    logger.info("Created shared Supabase client")
+        self._count_request("supabase")
+        return self._supabase
+
+    async def async_supabase(self) -> AsyncClient:
+        """Shared async Supabase client; only used from the agent event loop"""
+        if self._async_supabase is None:
+            if self._async_supabase_lock is None:
+                self._async_supabase_lock = asyncio.Lock()
+            async with self._async_supabase_lock:
+                if self._async_supabase is None:
+                    self._async_supabase = await create_async_supabase_client(
+                        settings.supabase.url,
+                        settings.supabase.service_role_key
+                    )
+                    with self._lock:
+                        self._stats["async_supabase"]["created"] += 1
+                    logger.info("Created shared async Supabase client")
+        self._count_request("async_supabase")
+        return self._async_supabase
+
+    def chat_model(self, temperature: float = 0) -> ChatOpenAI:
+        """Shared chat model for the given temperature"""
+        temperature = float(temperature)
+        model = self._chat_models.get(temperature)
+        if model is None:
+            http_client = self.http_client()
+            http_async_client = self.async_http_client()
+            with self._lock:
+                model = self._chat_models.get(temperature)
+                if model is None:
+                    model = ChatOpenAI(
+                        api_key=settings.openai.api_key,
+                        base_url=settings.openai.base_url,
+                        model_name=settings.openai.model_name,
+                        temperature=temperature,
+                        http_client=http_client,
+                        http_async_client=http_async_client
+                    )
+                    self._chat_models[temperature] = model
+                    self._stats["chat_models"]["created"] += 1
+                    logger.info(f"Created shared chat model (temperature: {temperature})")
+        self._count_request("chat_models")
+        return model
+
+    def embeddings(self) -> OpenAIEmbeddings:
+        """Shared embedding client"""
+        if self._embeddings is None:
+            if not settings.embeddings.api_key:
+                raise ValueError("OPENAI_API_KEY environment variable is required but not set")
+            http_client = self.http_client()
+            with self._lock:
+                if self._embeddings is None:
+                    self._embeddings = OpenAIEmbeddings(
+                        api_key=settings.embeddings.api_key,
+                        base_url=settings.embeddings.base_url if settings.embeddings.base_url else None,
+                        model=settings.embeddings.model,
+                        http_client=http_client
+                    )
+                    self._stats["embeddings"]["created"] += 1
+                    logger.info("Created shared embedding client")
+        self._count_request("embeddings")
+        return self._embeddings
+
+    def stats(self) -> Dict[str, Any]:
+        """Client reuse counters and HTTP pool statistics"""
+        with self._lock:
+            stats = {name: dict(counters) for name, counters in self._stats.items()}
+            stats["chat_models"]["temperatures"] = sorted(self._chat_models.keys())
+            http_client = self._http_client
+        stats["http"] = {
+            "http2": bool(http_client is not None and settings.http.http2 and _http2_available()),
+            "max_connections": settings.http.max_connections,
+            "max_keepalive_connections": settings.http.max_keepalive_connections,
+            **_transport_pool_stats(http_client)
+        }
+        return stats
+
+# Global registry instance
+registry = ClientRegistry()
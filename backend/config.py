@@ -1,34 +1,50 @@
 import os
+import threading
 from dataclasses import dataclass
-from typing import Optional
+from typing import List, Optional
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import create_client, acreate_client, Client, AsyncClient
 import logging
 
 # Load environment variables from .env file
 load_dotenv()
 
+_httpx_patch_lock = threading.Lock()
+_httpx_patched = False
+
+def patch_httpx_proxy_kwarg() -> None:
+    """Make httpx.Client and httpx.AsyncClient ignore the `proxy` kwarg newer gotrue/postgrest pass (applied once per process)"""
+    global _httpx_patched
+    if _httpx_patched:
+        return
+    with _httpx_patch_lock:
+        if _httpx_patched:
+            return
+        try:
+            import httpx
+
+            def wrap_init(original_init):
+                def init_wrapper(self, *args, **kwargs):
+                    if 'proxy' in kwargs:
+                        del kwargs['proxy']
+                    return original_init(self, *args, **kwargs)
+                return init_wrapper
+
+            httpx.Client.__init__ = wrap_init(httpx.Client.__init__)
+            httpx.AsyncClient.__init__ = wrap_init(httpx.AsyncClient.__init__)
+        except Exception as e:
+            logging.error(f"Error patching httpx client: {str(e)}")
+        _httpx_patched = True
+
 def create_supabase_client(url: str, key: str) -> Client:
     """Create Supabase client with proper handling of version differences"""
-    # Patch the httpx Client class to filter out proxy parameter
-    try:
-        import httpx
-        original_init = httpx.Client.__init__
-        
-        def init_wrapper(self, *args, **kwargs):
-            if 'proxy' in kwargs:
-                del kwargs['proxy']
-            return original_init(self, *args, **kwargs)
-        
-        # Apply the patch
-        httpx.Client.__init__ = init_wrapper
-        
-        # Now create the client normally
-        return create_client(url, key)
-    except Exception as e:
-        logging.error(f"Error creating Supabase client: {str(e)}")
-        # Fallback to basic client creation
-        return create_client(url, key)
+    patch_httpx_proxy_kwarg()
+    return create_client(url, key)
+
+async def create_async_supabase_client(url: str, key: str) -> AsyncClient:
+    """Create an async Supabase client for code running on the agent event loop"""
+    patch_httpx_proxy_kwarg()
+    return await acreate_client(url, key)
 
 @dataclass
 class OpenAIConfig:
@@ -51,18 +67,144 @@ class DatabaseConfig:
     user: str
     password: str
 
+@dataclass
+class DatabasePoolConfig:
+    min_size: int
+    max_size: int
+    max_lifetime: float
+    checkout_timeout: float
+    health_check_after: float
+
 @dataclass
 class EmbeddingConfig:
     api_key: str
     base_url: str
     model: str
 
+@dataclass
+class VectorStoreConfig:
+    path: str
+    startup_mode: str
+    embedding_cache_path: str
+
+@dataclass
+class SchemaContextConfig:
+    top_k: int
+    token_budget: int
+
+@dataclass
+class SQLAgentConfig:
+    candidates: int
+    candidate_max_temperature: float
+
+@dataclass
+class SQLCacheConfig:
+    enabled: bool
+    path: str
+    max_entries: int
+
+@dataclass
+class SemanticCacheConfig:
+    enabled: bool
+    path: str
+    threshold: float
+    verify_with_llm: bool
+
+@dataclass
+class QueryGuardConfig:
+    enabled: bool
+    max_rows: int
+    row_limit: int
+    max_cost: float
+    refuse_cost: float
+
+@dataclass
+class SQLExecutorConfig:
+    mode: str
+    max_rows: int
+    batch_size: int
+    statement_timeout_ms: int
+    display_rows: int
+
+@dataclass
+class ExecutionConfig:
+    mode: str
+    offload_workers: int
+    workers: int
+    max_queued: int
+
+@dataclass
+class ProgressStoreConfig:
+    backend: str
+    redis_url: str
+    max_events: int
+    idle_ttl: float
+    completed_ttl: float
+
+@dataclass
+class DashboardBundleConfig:
+    workers: int
+    timeout: float
+
+@dataclass
+class ResultCacheConfig:
+    enabled: bool
+    max_mb: int
+    ttl: float
+    refresh_times: List[str]
+    refresh_grace: float
+
+@dataclass
+class SpotlightPrecomputeConfig:
+    enabled: bool
+    interval: float
+    ranges: List[int]
+    top_countries: int
+    snapshot_dir: str
+    keep_versions: int
+    max_age: float
+
+@dataclass
+class HttpClientConfig:
+    max_connections: int
+    max_keepalive_connections: int
+    keepalive_expiry: float
+    timeout: float
+    http2: bool
+
+@dataclass
+class ServerConfig:
+    host: str
+    port: int
+    workers: int
+    threads: int
+    timeout: int
+    graceful_timeout: int
+    keepalive: int
+    preload: bool
+    debug: bool
+
 @dataclass
 class Settings:
     openai: OpenAIConfig
     supabase: SupabaseConfig
     database: DatabaseConfig
-    embeddings: EmbeddingConfig        
+    db_pool: DatabasePoolConfig
+    embeddings: EmbeddingConfig
+    vector_store: VectorStoreConfig
+    schema_context: SchemaContextConfig
+    sql_agent: SQLAgentConfig
+    sql_cache: SQLCacheConfig
+    semantic_cache: SemanticCacheConfig
+    query_guard: QueryGuardConfig
+    sql_executor: SQLExecutorConfig
+    execution: ExecutionConfig
+    progress_store: ProgressStoreConfig
+    dashboard_bundle: DashboardBundleConfig
+    result_cache: ResultCacheConfig
+    spotlight_precompute: SpotlightPrecomputeConfig
+    http: HttpClientConfig
+    server: ServerConfig
 
 def get_settings() -> Settings:
     """Get application settings from environment variables"""
@@ -85,10 +227,107 @@ def get_settings() -> Settings:
             user=os.getenv('user', ''),
             password=os.getenv('password', '')
         ),
+        db_pool=DatabasePoolConfig(
+            min_size=int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+            max_size=int(os.getenv('DB_POOL_MAX_SIZE', '20')),
+            max_lifetime=float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+            checkout_timeout=float(os.getenv('DB_POOL_CHECKOUT_TIMEOUT', '30')),
+            health_check_after=float(os.getenv('DB_POOL_HEALTH_CHECK_AFTER', '5'))
+        ),
         embeddings=EmbeddingConfig(
             api_key=os.getenv('OPENAI_API_KEY', ''),
             base_url=os.getenv('API_BASE_URL', ''),
             model=os.getenv('EMBEDDING_MODEL_NAME', '')
+        ),
+        vector_store=VectorStoreConfig(
+            path=os.getenv('VECTOR_STORE_PATH', 'metadata/schema_vectorstore'),
+            startup_mode=os.getenv('VECTOR_STORE_STARTUP', 'lazy'),
+            embedding_cache_path=os.getenv('EMBEDDING_CACHE_PATH', 'metadata/embedding_cache.sqlite')
+        ),
+        schema_context=SchemaContextConfig(
+            top_k=int(os.getenv('SCHEMA_CONTEXT_TOP_K', '6')),
+            token_budget=int(os.getenv('SCHEMA_CONTEXT_TOKEN_BUDGET', '6000'))
+        ),
+        sql_agent=SQLAgentConfig(
+            candidates=int(os.getenv('SQL_CANDIDATES', '1')),
+            candidate_max_temperature=float(os.getenv('SQL_CANDIDATE_MAX_TEMPERATURE', '0.8'))
+        ),
+        sql_cache=SQLCacheConfig(
+            enabled=os.getenv('SQL_CACHE_ENABLED', 'true').lower() == 'true',
+            path=os.getenv('SQL_CACHE_PATH', 'metadata/sql_cache.sqlite'),
+            max_entries=int(os.getenv('SQL_CACHE_MAX_ENTRIES', '500'))
+        ),
+        semantic_cache=SemanticCacheConfig(
+            enabled=os.getenv('SEMANTIC_CACHE_ENABLED', 'true').lower() == 'true',
+            path=os.getenv('SEMANTIC_CACHE_PATH', 'metadata/semantic_cache_vectorstore'),
+            threshold=float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.92')),
+            verify_with_llm=os.getenv('SEMANTIC_CACHE_VERIFY', 'true').lower() == 'true'
+        ),
+        query_guard=QueryGuardConfig(
+            enabled=os.getenv('QUERY_GUARD_ENABLED', 'true').lower() == 'true',
+            max_rows=int(os.getenv('QUERY_MAX_ROWS', '5000')),
+            row_limit=int(os.getenv('QUERY_ROW_LIMIT', '1000')),
+            max_cost=float(os.getenv('QUERY_MAX_COST', '100000')),
+            refuse_cost=float(os.getenv('QUERY_REFUSE_COST', '1000000'))
+        ),
+        sql_executor=SQLExecutorConfig(
+            mode=os.getenv('SQL_EXECUTOR', 'rpc').lower(),
+            max_rows=int(os.getenv('SQL_MAX_ROWS', '50000')),
+            batch_size=int(os.getenv('SQL_FETCH_BATCH_SIZE', '2000')),
+            statement_timeout_ms=int(os.getenv('SQL_STATEMENT_TIMEOUT_MS', '30000')),
+            display_rows=int(os.getenv('SQL_DISPLAY_ROWS', '200'))
+        ),
+        execution=ExecutionConfig(
+            mode=os.getenv('AGENT_EXECUTION_MODE', 'threads').lower(),
+            offload_workers=int(os.getenv('AGENT_OFFLOAD_WORKERS', '8')),
+            workers=int(os.getenv('AGENT_WORKERS', '4')),
+            max_queued=int(os.getenv('AGENT_QUEUE_SIZE', '50'))
+        ),
+        progress_store=ProgressStoreConfig(
+            backend=os.getenv('PROGRESS_STORE', 'memory').lower(),
+            redis_url=os.getenv('PROGRESS_REDIS_URL', 'redis://localhost:6379/0'),
+            max_events=int(os.getenv('PROGRESS_MAX_EVENTS', '500')),
+            idle_ttl=float(os.getenv('PROGRESS_IDLE_TTL', '3600')),
+            completed_ttl=float(os.getenv('PROGRESS_COMPLETED_TTL', '300'))
+        ),
+        dashboard_bundle=DashboardBundleConfig(
+            workers=int(os.getenv('DASHBOARD_BUNDLE_WORKERS', '6')),
+            timeout=float(os.getenv('DASHBOARD_BUNDLE_TIMEOUT', '60'))
+        ),
+        result_cache=ResultCacheConfig(
+            enabled=os.getenv('RESULT_CACHE_ENABLED', 'true').lower() == 'true',
+            max_mb=int(os.getenv('RESULT_CACHE_MAX_MB', '256')),
+            ttl=float(os.getenv('RESULT_CACHE_TTL', '300')),
+            refresh_times=[t.strip() for t in os.getenv('SUMMARY_REFRESH_TIMES', '02:00').split(',') if t.strip()],
+            refresh_grace=float(os.getenv('SUMMARY_REFRESH_GRACE', '900'))
+        ),
+        spotlight_precompute=SpotlightPrecomputeConfig(
+            enabled=os.getenv('SPOTLIGHT_PRECOMPUTE_ENABLED', 'true').lower() == 'true',
+            interval=float(os.getenv('SPOTLIGHT_PRECOMPUTE_INTERVAL', '3600')),
+            ranges=[int(r) for r in os.getenv('SPOTLIGHT_PRECOMPUTE_RANGES', '30,60,90,180,365,0').split(',') if r.strip()],
+            top_countries=int(os.getenv('SPOTLIGHT_PRECOMPUTE_TOP_COUNTRIES', '10')),
+            snapshot_dir=os.getenv('SPOTLIGHT_SNAPSHOT_DIR', 'metadata/spotlight_snapshots'),
+            keep_versions=int(os.getenv('SPOTLIGHT_SNAPSHOT_VERSIONS', '3')),
+            max_age=float(os.getenv('SPOTLIGHT_SNAPSHOT_MAX_AGE', '10800'))
+        ),
+        http=HttpClientConfig(
+            max_connections=int(os.getenv('HTTP_MAX_CONNECTIONS', '100')),
+            max_keepalive_connections=int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', '20')),
+            keepalive_expiry=float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '60')),
+            timeout=float(os.getenv('HTTP_TIMEOUT', '120')),
+            http2=os.getenv('HTTP2_ENABLED', 'false').lower() == 'true'
+        ),
+        server=ServerConfig(
+            host=os.getenv('SERVER_HOST', '0.0.0.0'),
+            port=int(os.getenv('SERVER_PORT', '5001')),
+            # In-memory progress channels only reach the worker that owns them
+            workers=int(os.getenv('SERVER_WORKERS', '2' if os.getenv('PROGRESS_STORE', 'memory').lower() == 'redis' else '1')),
+            threads=int(os.getenv('SERVER_THREADS', '8')),
+            timeout=int(os.getenv('SERVER_TIMEOUT', '300')),
+            graceful_timeout=int(os.getenv('SERVER_GRACEFUL_TIMEOUT', '60')),
+            keepalive=int(os.getenv('SERVER_KEEPALIVE', '5')),
+            preload=os.getenv('SERVER_PRELOAD', 'true').lower() == 'true',
+            debug=os.getenv('FLASK_DEBUG', 'false').lower() == 'true'
         )
     )
 
@@ -3,15 +3,17 @@ from utils import get_db_connection, get_supabase_client
 import logging
 from datetime import datetime
 import json
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
 from config import settings
+from progress_manager import TokenCallback, stream_llm
+from result_cache import cached_result
 
 logger = logging.getLogger(__name__)
 
-def generate_country_dashboard_insights(dashboard_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Generate AI insights for country dashboard based on current data"""
+def generate_country_dashboard_insights(dashboard_data: Dict[str, Any], token_callback: Optional[TokenCallback] = None) -> Dict[str, Any]:
+    """Generate AI insights for country dashboard based on current data, optionally streaming tokens"""
     try:
         # Check if OpenAI is configured
         if not settings.openai.api_key or not settings.openai.base_url or not settings.openai.model_name:
@@ -127,11 +129,11 @@ Be specific with numbers and percentages. Keep each point concise and actionable
             HumanMessage(content=f"Analyze this country dashboard data and provide strategic insights:\n\n{data_summary}")
         ]
         
-        response = llm.invoke(messages)
+        content = stream_llm(llm, messages, token_callback, stream="insights")
         
         # Parse the JSON response
         try:
-            insights = json.loads(response.content)
+            insights = json.loads(content)
             # Ensure all required keys exist
             if not all(key in insights for key in ['highlights', 'concerns', 'recommendations']):
                 raise ValueError("Missing required keys in response")
@@ -156,6 +158,7 @@ Be specific with numbers and percentages. Keep each point concise and actionable
             'error': str(e)
         }
 
+@cached_result(refresh_aligned=True)
 def get_country_performance_overview(date_range=90):
     """Get overall country performance metrics with financial data"""
     conn = get_db_connection()
@@ -277,6 +280,7 @@ def get_country_performance_overview(date_range=90):
     finally:
         conn.close()
 
+@cached_result()
 def get_country_growth_trends(date_range=180):
     """Get country growth trends over time"""
     conn = get_db_connection()
@@ -447,6 +451,7 @@ def get_country_comparison_data(countries, date_range=90):
     finally:
         conn.close()
 
+@cached_result()
 def get_available_countries():
     """Get list of available countries with partner data"""
     conn = get_db_connection()
@@ -477,6 +482,7 @@ def get_available_countries():
     finally:
         conn.close() 
 
+@cached_result()
 def get_partner_application_chart_data(date_range=90, period_type='monthly', start_date=None, end_date=None, partner_country=None):
     """Get partner application chart data showing applications attributed to events"""
     conn = get_db_connection()
@@ -1193,6 +1199,7 @@ END;
 $$ LANGUAGE plpgsql SECURITY DEFINER;
 """ 
 
+@cached_result()
 def get_partner_funnel_data(date_range=90, partner_country=None):
     """Get basic partner funnel conversion data (signups -> approved -> active)
     
@@ -1272,6 +1279,7 @@ def get_partner_funnel_data(date_range=90, partner_country=None):
     finally:
         conn.close() 
 
+@cached_result()
 def get_partner_activation_chart_data(date_range=90, period_type='monthly', partner_country=None):
     """Get partner activation chart data over time periods"""
     conn = get_db_connection()
@@ -1376,6 +1384,7 @@ def get_partner_activation_chart_data(date_range=90, period_type='monthly', part
     finally:
         conn.close() 
 
+@cached_result()
 def get_events_data(date_range=90, partner_country=None):
     """Get past and upcoming events data with filtering"""
     conn = get_db_connection()
@@ -1497,6 +1506,7 @@ def get_events_data(date_range=90, partner_country=None):
     finally:
         conn.close() 
 
+@cached_result()
 def get_country_performance_contribution(date_range=90, partner_country=None):
     """Get country performance contribution to current regions with percentage breakdowns"""
     conn = get_db_connection()
@@ -1612,6 +1622,7 @@ def get_country_performance_contribution(date_range=90, partner_country=None):
     finally:
         conn.close()
 
+@cached_result(refresh_aligned=True)
 def get_active_partners_chart_data(date_range=90, period_type='monthly', start_date=None, end_date=None, partner_country=None):
     """Get active partners chart data over time periods (partners with new client signups, trades, or deposits)"""
     conn = get_db_connection()
@@ -1806,6 +1817,7 @@ def get_active_partners_chart_data(date_range=90, period_type='monthly', start_d
     finally:
         conn.close() 
 
+@cached_result(refresh_aligned=True)
 def get_performance_stats_data(date_range=90, period_type='monthly', start_date=None, end_date=None, partner_country=None):
     """Get performance stats data over time periods"""
     conn = get_db_connection()
@@ -1968,6 +1980,7 @@ def get_performance_stats_data(date_range=90, period_type='monthly', start_date=
     finally:
         conn.close() 
 
+@cached_result(refresh_aligned=True)
 def get_earning_partners_chart_data(date_range=90, period_type='monthly', start_date=None, end_date=None, partner_country=None):
     """Get earning partners chart data over time periods (partners who generated commission during the period)"""
     conn = get_db_connection()
@@ -2156,6 +2169,7 @@ def get_earning_partners_chart_data(date_range=90, period_type='monthly', start_
     finally:
         conn.close()
 
+@cached_result(refresh_aligned=True)
 def get_top_partners_data(date_range=90, partner_country=None, limit=20):
     """Get top 20 partners based on performance metrics"""
     conn = get_db_connection()
@@ -2289,6 +2303,7 @@ def get_top_partners_data(date_range=90, partner_country=None, limit=20):
     finally:
         conn.close()
 
+@cached_result(refresh_aligned=True)
 def get_inactive_partners_data(date_range=90, partner_country=None, limit=50):
     """Get inactive partners sorted by commission tiers based on 3-month average earnings"""
     conn = get_db_connection()
@@ -2476,6 +2491,7 @@ def get_inactive_partners_data(date_range=90, partner_country=None, limit=50):
     finally:
         conn.close()
 
+@cached_result(refresh_aligned=True)
 def get_new_partner_support_data(date_range=90, partner_country=None, limit=100):
     """Get new partners who need support - not yet activated or need help moving to next funnel stage"""
     conn = get_db_connection()
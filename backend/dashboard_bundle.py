@@ -0,0 +1,141 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from config import settings
+from country_dashboard import (
+    get_country_performance_overview,
+    get_country_growth_trends,
+    get_available_countries,
+    get_partner_application_chart_data,
+    get_partner_funnel_data,
+    get_partner_activation_chart_data,
+    get_events_data,
+    get_country_performance_contribution,
+    get_active_partners_chart_data,
+    get_performance_stats_data,
+    get_earning_partners_chart_data,
+    get_top_partners_data,
+    get_inactive_partners_data,
+    get_new_partner_support_data
+)
+from logging_config import LoggingConfig
+
+# Create logger
+logger = LoggingConfig('dashboard_bundle').setup_logger()
+
+# Section name -> loader taking the shared bundle parameters. Each loader matches
+# what the corresponding /country-dashboard/<section> endpoint returns as "data".
+COUNTRY_DASHBOARD_SECTIONS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "overview": lambda p: get_country_performance_overview(p["date_range"]),
+    "countries": lambda p: get_available_countries(),
+    "growth_trends": lambda p: get_country_growth_trends(p["date_range"]),
+    "application_chart": lambda p: get_partner_application_chart_data(
+        p["date_range"], p["period_type"], p["start_date"], p["end_date"], p["partner_country"]),
+    "partner_funnel": lambda p: get_partner_funnel_data(p["date_range"], p["partner_country"]),
+    "activation_chart": lambda p: get_partner_activation_chart_data(p["date_range"], p["period_type"], p["partner_country"]),
+    "active_partners_chart": lambda p: get_active_partners_chart_data(
+        p["date_range"], p["period_type"], p["start_date"], p["end_date"], p["partner_country"]),
+    "events": lambda p: get_events_data(p["date_range"], p["partner_country"]),
+    "performance_contribution": lambda p: get_country_performance_contribution(p["date_range"], p["partner_country"]),
+    "performance_stats": lambda p: get_performance_stats_data(
+        p["date_range"], p["period_type"], p["start_date"], p["end_date"], p["partner_country"]),
+    "earning_partners_chart": lambda p: get_earning_partners_chart_data(
+        p["date_range"], p["period_type"], p["start_date"], p["end_date"], p["partner_country"]),
+    "top_partners": lambda p: get_top_partners_data(p["date_range"], p["partner_country"], p["top_partners_limit"]),
+    "inactive_partners": lambda p: get_inactive_partners_data(p["date_range"], p["partner_country"], p["inactive_partners_limit"]),
+    "new_partner_support": lambda p: get_new_partner_support_data(p["date_range"], p["partner_country"], p["new_partner_support_limit"])
+}
+
+# Per-section defaults of the individual endpoints
+DEFAULT_BUNDLE_PARAMS: Dict[str, Any] = {
+    "date_range": 90,
+    "period_type": "monthly",
+    "start_date": None,
+    "end_date": None,
+    "partner_country": None,
+    "top_partners_limit": 20,
+    "inactive_partners_limit": 50,
+    "new_partner_support_limit": 100
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_bundle_executor() -> ThreadPoolExecutor:
+    """Get the process-wide pool shared by every bundle request"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=settings.dashboard_bundle.workers, thread_name_prefix="dashboard-bundle")
+    return _executor
+
+def _run_section(name: str, params: Dict[str, Any]) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    data = COUNTRY_DASHBOARD_SECTIONS[name](params)
+    return data, (time.perf_counter() - started) * 1000
+
+def iter_country_dashboard_sections(params: Dict[str, Any],
+                                    sections: Optional[List[str]] = None,
+                                    timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Compute dashboard sections concurrently and yield each one as it finishes.
+
+    A failing section is reported on its own and does not affect the others.
+
+    Args:
+        params (Dict[str, Any]): Shared parameters, missing keys fall back to DEFAULT_BUNDLE_PARAMS
+        sections (Optional[List[str]]): Section names, defaults to all of COUNTRY_DASHBOARD_SECTIONS
+        timeout (Optional[float]): Seconds for the whole bundle, defaults to DASHBOARD_BUNDLE_TIMEOUT
+
+    Yields:
+        Dict[str, Any]: {"section", "success", "data" or "error", "elapsed_ms"}
+    """
+    params = {**DEFAULT_BUNDLE_PARAMS, **params}
+    sections = sections or list(COUNTRY_DASHBOARD_SECTIONS)
+    timeout = timeout if timeout is not None else settings.dashboard_bundle.timeout
+    deadline = time.monotonic() + timeout
+
+    executor = get_bundle_executor()
+    pending = {executor.submit(_run_section, name, params): name for name in sections}
+    while pending:
+        done, _ = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            name = pending.pop(future)
+            try:
+                data, elapsed_ms = future.result()
+                yield {"section": name, "success": True, "data": data, "elapsed_ms": round(elapsed_ms, 1)}
+            except Exception as e:
+                logger.error(f"Country dashboard section '{name}' failed: {str(e)}")
+                yield {"section": name, "success": False, "error": str(e)}
+
+    for future, name in pending.items():
+        # Queued sections are dropped; running ones finish in the background
+        future.cancel()
+        logger.warning(f"Country dashboard section '{name}' timed out after {timeout}s")
+        yield {"section": name, "success": False, "error": f"Timed out after {timeout}s"}
+
+def get_country_dashboard_bundle(params: Dict[str, Any],
+                                 sections: Optional[List[str]] = None,
+                                 timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Compute dashboard sections concurrently and combine them.
+
+    Returns:
+        Dict[str, Any]: {"data": {section: data}, "errors": {section: error}, "timings_ms": {section: ms}}
+    """
+    started = time.perf_counter()
+    bundle = {"data": {}, "errors": {}, "timings_ms": {}}
+    for result in iter_country_dashboard_sections(params, sections, timeout):
+        if result["success"]:
+            bundle["data"][result["section"]] = result["data"]
+            bundle["timings_ms"][result["section"]] = result["elapsed_ms"]
+        else:
+            bundle["errors"][result["section"]] = result["error"]
+    logger.info(f"Country dashboard bundle: {len(bundle['data'])} section(s) in {(time.perf_counter() - started) * 1000:.0f}ms"
+                + (f", {len(bundle['errors'])} failed" if bundle["errors"] else ""))
+    return bundle
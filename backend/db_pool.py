@@ -0,0 +1,299 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from config import settings
+from logging_config import LoggingConfig
+
+# Create logger
+logger = LoggingConfig('db_pool').setup_logger()
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the checkout timeout"""
+
+class _PooledEntry:
+    """Raw psycopg2 connection plus the bookkeeping the pool needs"""
+    __slots__ = ('conn', 'created_at', 'last_used')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+class PooledConnection:
+    """
+    Proxy returned by the pool. Behaves like a psycopg2 connection, except that
+    close() hands the connection back to the pool instead of closing the socket.
+    """
+
+    def __init__(self, pool: 'ConnectionPool', entry: _PooledEntry):
+        self._pool = pool
+        self._entry = entry
+
+    def close(self) -> None:
+        if self._entry is not None:
+            entry, self._entry = self._entry, None
+            self._pool.release(entry)
+
+    @property
+    def closed(self) -> int:
+        return 1 if self._entry is None else self._entry.conn.closed
+
+    def __getattr__(self, name):
+        if self._entry is None:
+            raise psycopg2.InterfaceError("connection already returned to the pool")
+        return getattr(self._entry.conn, name)
+
+class ConnectionPool:
+    def __init__(self,
+                 dsn_params: Dict[str, Any],
+                 min_size: int = 2,
+                 max_size: int = 20,
+                 max_lifetime: float = 1800,
+                 checkout_timeout: float = 30,
+                 health_check_after: float = 5):
+        """
+        Thread-safe PostgreSQL connection pool.
+
+        Args:
+            dsn_params (Dict[str, Any]): Keyword arguments for psycopg2.connect
+            min_size (int): Connections opened eagerly and kept idle
+            max_size (int): Hard cap on open connections (checked out + idle)
+            max_lifetime (float): Seconds after which a connection is recycled
+            checkout_timeout (float): Seconds to wait for a free connection before failing
+            health_check_after (float): Idle seconds after which a connection is pinged on checkout
+        """
+        if min_size > max_size:
+            raise ValueError("min_size cannot be larger than max_size")
+
+        self.dsn_params = dsn_params
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.checkout_timeout = checkout_timeout
+        self.health_check_after = health_check_after
+
+        self._idle = deque()
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self._stats = {
+            "checkouts": 0,
+            "connections_created": 0,
+            "connections_recycled": 0,
+            "health_check_failures": 0,
+            "checkout_timeouts": 0,
+            "total_wait_ms": 0.0,
+            "max_wait_ms": 0.0
+        }
+
+        self._fill_to_min_size()
+        logger.info(f"Initialized connection pool (min: {min_size}, max: {max_size})")
+
+    def _connect(self) -> _PooledEntry:
+        conn = psycopg2.connect(**self.dsn_params)
+        with self._cond:
+            self._stats["connections_created"] += 1
+        return _PooledEntry(conn)
+
+    def _fill_to_min_size(self) -> None:
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                entry = self._connect()
+            except Exception as e:
+                with self._cond:
+                    self._size -= 1
+                logger.warning(f"Could not pre-open pool connection: {str(e)}")
+                return
+            with self._cond:
+                self._idle.append(entry)
+                self._cond.notify()
+
+    def _discard(self, entry: _PooledEntry) -> None:
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _is_usable(self, entry: _PooledEntry) -> bool:
+        """Check lifetime and liveness of an idle connection before handing it out"""
+        if entry.conn.closed:
+            return False
+
+        now = time.monotonic()
+        if now - entry.created_at > self.max_lifetime:
+            with self._cond:
+                self._stats["connections_recycled"] += 1
+            return False
+
+        if now - entry.last_used > self.health_check_after:
+            try:
+                with entry.conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                entry.conn.rollback()
+            except Exception as e:
+                logger.warning(f"Pooled connection failed health check: {str(e)}")
+                with self._cond:
+                    self._stats["health_check_failures"] += 1
+                return False
+        return True
+
+    def acquire(self) -> PooledConnection:
+        """Check out a connection, waiting up to checkout_timeout for one to free up"""
+        started = time.monotonic()
+        deadline = started + self.checkout_timeout
+
+        while True:
+            entry = None
+            create = False
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise psycopg2.InterfaceError("connection pool is closed")
+                    if self._idle:
+                        entry = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        create = True
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["checkout_timeouts"] += 1
+                        raise PoolTimeoutError(
+                            f"Timed out after {self.checkout_timeout}s waiting for a database connection "
+                            f"(pool max size: {self.max_size})"
+                        )
+                    self._cond.wait(remaining)
+
+            if create:
+                try:
+                    entry = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_usable(entry):
+                self._discard(entry)
+                continue
+
+            waited_ms = (time.monotonic() - started) * 1000
+            with self._cond:
+                self._stats["checkouts"] += 1
+                self._stats["total_wait_ms"] += waited_ms
+                self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], waited_ms)
+            return PooledConnection(self, entry)
+
+    def release(self, entry: _PooledEntry) -> None:
+        """Return a connection to the pool, resetting any session state left behind"""
+        if entry.conn.closed or self._closed:
+            self._discard(entry)
+            return
+
+        conn = entry.conn
+        try:
+            if conn.autocommit:
+                # Session-level SETs survive in autocommit mode, so wipe them explicitly
+                conn.reset()
+                conn.autocommit = False
+            elif conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                # Rolling back also undoes SET statement_timeout & co. issued in the transaction
+                conn.rollback()
+        except Exception as e:
+            logger.warning(f"Discarding connection that failed to reset: {str(e)}")
+            self._discard(entry)
+            return
+
+        entry.last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks out a connection and always returns it"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool sizing and checkout wait-time metrics"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size
+            })
+        checkouts = stats["checkouts"]
+        stats["avg_wait_ms"] = round(stats["total_wait_ms"] / checkouts, 3) if checkouts else 0.0
+        stats["total_wait_ms"] = round(stats["total_wait_ms"], 3)
+        stats["max_wait_ms"] = round(stats["max_wait_ms"], 3)
+        return stats
+
+    def close(self) -> None:
+        """Close all idle connections; checked-out ones are closed when released"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._cond.notify_all()
+        for entry in idle:
+            self._discard(entry)
+        logger.info("Connection pool closed")
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    """Get the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    dsn_params={
+                        "host": settings.database.host,
+                        "port": settings.database.port,
+                        "dbname": settings.database.database,
+                        "user": settings.database.user,
+                        "password": settings.database.password
+                    },
+                    min_size=settings.db_pool.min_size,
+                    max_size=settings.db_pool.max_size,
+                    max_lifetime=settings.db_pool.max_lifetime,
+                    checkout_timeout=settings.db_pool.checkout_timeout,
+                    health_check_after=settings.db_pool.health_check_after
+                )
+    return _pool
+
+def reset_after_fork() -> None:
+    """
+    Forget a pool inherited from the parent process.
+
+    The inherited connections are dropped without closing them: their sockets are
+    shared with the parent, and closing would end the parent's sessions too.
+    """
+    global _pool, _pool_lock
+    _pool_lock = threading.Lock()
+    _pool = None
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Pool statistics, or an empty dict if no connection was ever requested"""
+    return _pool.stats() if _pool is not None else {}
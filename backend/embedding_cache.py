@@ -0,0 +1,123 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from contextlib import contextmanager
+from typing import Dict, List, Sequence
+
+from config import settings
+from logging_config import LoggingConfig
+
+# Create logger
+logger = LoggingConfig('embedding_cache').setup_logger()
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache keyed by sha256(embedding model, text).
+
+    Vectors are stored as float32 blobs in a small SQLite file, so unchanged
+    schema chunks never have to be sent to the embeddings API again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    dimensions INTEGER NOT NULL,
+                    vector BLOB NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(text: str, model: str) -> str:
+        return hashlib.sha256(f"{model}\0{text}".encode('utf-8')).hexdigest()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        """Look up cached vectors; missing keys are simply absent from the result."""
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock, self._connect() as conn:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ','.join('?' * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array('f')
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+        return found
+
+    def put_many(self, items: Dict[str, List[float]], model: str) -> None:
+        """Store vectors for the given keys, replacing any existing entries."""
+        rows = [
+            (key, model, len(vector), array('f', vector).tobytes())
+            for key, vector in items.items()
+        ]
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, dimensions, vector) VALUES (?, ?, ?, ?)",
+                rows
+            )
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get the process-wide embedding cache, opening it on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache(settings.vector_store.embedding_cache_path)
+    return _cache
+
+def embed_documents_cached(texts: List[str], embedding, model: str) -> List[List[float]]:
+    """
+    Embed texts, only sending the ones not already in the cache to the embeddings API.
+
+    Args:
+        texts (List[str]): Texts to embed
+        embedding: LangChain embeddings client used for cache misses
+        model (str): Embedding model name, part of the cache key
+
+    Returns:
+        List[List[float]]: One vector per input text, in input order
+    """
+    cache = get_embedding_cache()
+    keys = [EmbeddingCache.make_key(text, model) for text in texts]
+    cached = cache.get_many(keys)
+
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in cached and key not in missing:
+            missing[key] = text
+
+    logger.info(f"Embedding cache: {len(texts) - len(missing)} hit(s), {len(missing)} miss(es)")
+
+    if missing:
+        vectors = embedding.embed_documents(list(missing.values()))
+        new_entries = dict(zip(missing.keys(), vectors))
+        cache.put_many(new_entries, model)
+        cached.update(new_entries)
+
+    return [cached[key] for key in keys]
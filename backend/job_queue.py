@@ -0,0 +1,200 @@
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Coroutine, Dict, Optional
+
+from agent_loop import asyncio_mode, get_agent_loop
+from config import settings
+from logging_config import LoggingConfig
+
+# Create logger
+logger = LoggingConfig('job_queue').setup_logger()
+
+# Receives the job's queue position: 1 is next in line, 0 means it started
+PositionCallback = Callable[[int], None]
+
+# Retry-After used until some jobs have finished and an average duration is known
+DEFAULT_JOB_SECONDS = 30
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class _Job:
+    __slots__ = ('run', 'arun', 'on_position', 'enqueued_at', 'started_at')
+
+    def __init__(self, run: Callable[[], Any], arun: Optional[Callable[[], Coroutine]], on_position: Optional[PositionCallback]):
+        self.run = run
+        self.arun = arun
+        self.on_position = on_position
+        self.enqueued_at = time.monotonic()
+        self.started_at = 0.0
+
+class JobQueue:
+    """
+    Bounded queue in front of a fixed number of agent workflow slots.
+
+    In threads mode the slots are worker threads; in asyncio mode they cap how many
+    coroutines run on the agent event loop at once. Jobs beyond the slots wait in
+    FIFO order, are told their position as it changes, and submit() refuses new
+    jobs with QueueFullError once max_queued are waiting.
+    """
+
+    def __init__(self, workers: int = 4, max_queued: int = 50):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.use_event_loop = asyncio_mode()
+        self._cond = threading.Condition()
+        self._pending = deque()
+        self._running = 0
+        self._threads = []
+        self._durations = deque(maxlen=50)
+        self._stats = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0}
+
+    def submit(self,
+               run: Callable[[], Any],
+               arun: Optional[Callable[[], Coroutine]] = None,
+               on_position: Optional[PositionCallback] = None) -> int:
+        """
+        Queue a job.
+
+        Args:
+            run (Callable): Runs the job in a worker thread (threads mode)
+            arun (Callable): Returns the job's coroutine (asyncio mode)
+            on_position (Optional[PositionCallback]): Told the job's queue position as it changes
+
+        Returns:
+            int: Queue position at submission, 0 if a slot was free
+
+        Raises:
+            QueueFullError: If max_queued jobs are already waiting
+        """
+        job = _Job(run, arun, on_position)
+        with self._cond:
+            if len(self._pending) >= self.max_queued:
+                self._stats["rejected"] += 1
+                retry_after = self._retry_after()
+                logger.warning(f"Job queue full ({len(self._pending)} waiting), rejecting job; retry after {retry_after}s")
+                raise QueueFullError(retry_after)
+            self._stats["submitted"] += 1
+            self._pending.append(job)
+            position = max(0, len(self._pending) - (self.workers - self._running))
+            if self.use_event_loop:
+                started, waiting = self._dispatch_async()
+            else:
+                self._start_threads()
+                # notify_all: drain() may be waiting on the same condition
+                self._cond.notify_all()
+                started, waiting = [], []
+        self._notify(started, waiting)
+        return position
+
+    def _retry_after(self) -> int:
+        """Seconds until a queue slot is likely to free up"""
+        average = sum(self._durations) / len(self._durations) if self._durations else DEFAULT_JOB_SECONDS
+        return max(1, math.ceil(average * (len(self._pending) + 1) / self.workers))
+
+    def _start_threads(self) -> None:
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._worker, name=f"agent-worker-{len(self._threads)}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                job = self._take()
+                waiting = list(self._pending)
+            self._notify([job], waiting)
+            failed = False
+            try:
+                job.run()
+            except Exception as e:
+                failed = True
+                logger.error(f"Agent job failed: {str(e)}")
+            finally:
+                with self._cond:
+                    self._finish(job, failed)
+
+    def _take(self) -> _Job:
+        """Move the next pending job into a slot (lock held)"""
+        job = self._pending.popleft()
+        job.started_at = time.monotonic()
+        self._running += 1
+        return job
+
+    def _finish(self, job: _Job, failed: bool) -> None:
+        """Free a job's slot (lock held)"""
+        self._running -= 1
+        self._durations.append(time.monotonic() - job.started_at)
+        self._stats["failed" if failed else "completed"] += 1
+        self._cond.notify_all()
+
+    def _dispatch_async(self):
+        """Start pending coroutines on the agent loop while slots are free (lock held)"""
+        started = []
+        while self._pending and self._running < self.workers:
+            job = self._take()
+            started.append(job)
+            future = get_agent_loop().submit(job.arun())
+            future.add_done_callback(lambda f, job=job: self._async_done(job, f))
+        return started, list(self._pending) if started else []
+
+    def _async_done(self, job: _Job, future) -> None:
+        failed = future.cancelled() or future.exception() is not None
+        with self._cond:
+            self._finish(job, failed)
+            started, waiting = self._dispatch_async()
+        self._notify(started, waiting)
+
+    def _notify(self, started, waiting) -> None:
+        """Report positions outside the lock; a broken listener must not stall the queue"""
+        for position, job in [(0, job) for job in started] + list(enumerate(waiting, start=1)):
+            if job.on_position is None:
+                continue
+            try:
+                job.on_position(position)
+            except Exception as e:
+                logger.warning(f"Queue position callback failed: {str(e)}")
+
+    def drain(self, timeout: float) -> bool:
+        """Wait up to timeout seconds for queued and running jobs to finish; True if they did"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(min(remaining, 1.0))
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue state for /metrics"""
+        with self._cond:
+            return {
+                **self._stats,
+                "mode": "asyncio" if self.use_event_loop else "threads",
+                "workers": self.workers,
+                "running": self._running,
+                "queued": len(self._pending),
+                "max_queued": self.max_queued,
+                "average_job_seconds": round(sum(self._durations) / len(self._durations), 2) if self._durations else None
+            }
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue() -> JobQueue:
+    """Get the process-wide agent job queue"""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = JobQueue(settings.execution.workers, settings.execution.max_queued)
+    return _job_queue
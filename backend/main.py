@@ -8,17 +8,24 @@ This API provides endpoints to test:
 
 from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
-from sql_agent import create_workflow
-from analytics_agent import analyze_sql_results
+from sql_agent import run_sql_workflow, arun_sql_workflow
+from analytics_agent import analyze_sql_results, aanalyze_sql_results
+from agent_loop import get_agent_loop
+from job_queue import QueueFullError, get_job_queue
+from progress_channels import ChannelNotFoundError, get_progress_store
 from logging_config import LoggingConfig
+from db_pool import get_pool_stats
+from client_registry import registry
+from vector_store import get_vector_store_status
+from config import settings
+from utils import get_openai_client
 import traceback
 import json
 from psycopg2.extras import RealDictCursor
 from collections import OrderedDict
 import datetime
 import os
-import queue
-import threading
+import asyncio
 
 # Import screener functions
 from screener import (
@@ -57,6 +64,9 @@ from country_dashboard import (
     get_new_partner_support_data,
     generate_country_dashboard_insights
 )
+from result_cache import get_result_cache
+from spotlight_precompute import dashboard_key, funnel_key, get_spotlight_precomputer, start_spotlight_precompute
+from dashboard_bundle import COUNTRY_DASHBOARD_SECTIONS, get_country_dashboard_bundle, iter_country_dashboard_sections
 
 # Set up Flask app
 app = Flask(__name__)
@@ -65,35 +75,130 @@ CORS(app)  # Enable CORS for React frontend
 # Set up logging
 logger = LoggingConfig('flask_app').setup_logger()
 
-# Create a thread-safe queue for progress updates
-progress_queues = {}
+# Progress channels for the SSE endpoint; expired channels are evicted by the store
+progress_store = get_progress_store()
 
-def generate_progress_id():
-    """Generate a unique progress ID"""
-    import uuid
-    return str(uuid.uuid4())
+def format_sse(payload):
+    """Format a queue item as an SSE frame; items with an "event" key become named events (e.g. token)"""
+    event = payload.get("event") if isinstance(payload, dict) else None
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(payload, default=str)}\n\n"
+
+def make_token_callback(publish):
+    """Token callback that hands coalesced LLM output to publish() as "token" events"""
+    def token_callback(stream: str, text: str):
+        publish({"event": "token", "stream": stream, "text": text})
+    return token_callback
+
+def make_publisher(progress_id):
+    """Publish events to a progress channel"""
+    return lambda payload: progress_store.publish(progress_id, payload)
+
+def publish_error(progress_id, e):
+    """Push a workflow failure onto a progress channel"""
+    progress_store.publish(progress_id, {
+        "message": f"Error: {str(e)}",
+        "progress": 100,
+        "error": str(e)
+    })
+
+def make_position_callback(progress_id):
+    """Push a job's queue position to its progress channel as "queue" events"""
+    def on_position(position: int):
+        progress_store.publish(progress_id, {
+            "event": "queue",
+            "position": position,
+            "message": "Started processing" if position == 0 else f"Waiting in queue (position {position})",
+            "progress": 0
+        })
+    return on_position
+
+def queue_full_response(e, error):
+    """429 with Retry-After for a job the queue refused"""
+    response = jsonify({
+        "success": False,
+        "error": error,
+        "retry_after": e.retry_after
+    })
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response, 429
+
+def start_background(progress_id, run_workflow, arun_workflow):
+    """
+    Queue an agent workflow on the bounded job queue and answer the request.
+
+    The job's queue position is pushed to its SSE stream as "queue" events. When
+    the queue is full the progress stream is dropped and the client gets a 429.
+    """
+    try:
+        position = get_job_queue().submit(run_workflow, arun_workflow, make_position_callback(progress_id))
+    except QueueFullError as e:
+        progress_store.discard(progress_id)
+        return queue_full_response(e, "Too many questions are being processed, please retry shortly")
+
+    return jsonify({
+        "success": True,
+        "message": "Processing started" if position == 0 else "Queued",
+        "progress_id": progress_id,
+        "queue_position": position
+    })
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({"status": "healthy", "message": "API is running"})
 
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness endpoint: 503 until the schema vector store can serve retrieval"""
+    vector_store_status = get_vector_store_status()
+    ready = vector_store_status["ready"]
+    return jsonify({
+        "ready": ready,
+        "vector_store": vector_store_status
+    }), 200 if ready else 503
+
+@app.route('/metrics', methods=['GET'])
+def get_runtime_metrics():
+    """Runtime metrics for shared resources (connection pool, ...)"""
+    return jsonify({
+        "success": True,
+        "db_pool": get_pool_stats(),
+        "clients": registry.stats(),
+        "agent_loop": get_agent_loop().stats(),
+        "job_queue": get_job_queue().stats(),
+        "progress_channels": progress_store.stats(),
+        "result_cache": get_result_cache().stats(),
+        "spotlight_precompute": get_spotlight_precomputer().stats()
+    })
+
 @app.route('/sql-agent/progress/<progress_id>', methods=['GET'])
 def get_progress(progress_id):
-    """SSE endpoint for progress updates"""
+    """SSE endpoint for progress updates; late subscribers replay the buffered events"""
+    try:
+        # Fail fast for unknown or expired IDs instead of holding the connection open
+        events, cursor, closed = progress_store.read(progress_id, timeout=0)
+    except ChannelNotFoundError:
+        return jsonify({"success": False, "error": "Unknown or expired progress ID"}), 404
+
     def generate():
-        if progress_id not in progress_queues:
-            progress_queues[progress_id] = queue.Queue()
-        
-        q = progress_queues[progress_id]
-        
+        nonlocal events, cursor, closed
+        queued = False
         while True:
+            for event in events:
+                queued = event.get("event") == "queue" and event.get("position", 0) > 0
+                yield format_sse(event)
+            if closed:
+                return
             try:
-                progress_data = q.get(timeout=30)  # 30 second timeout
-                if progress_data == "DONE":
-                    return
-                yield f"data: {json.dumps(progress_data)}\n\n"
-            except queue.Empty:
+                events, cursor, closed = progress_store.read(progress_id, cursor, timeout=30)  # 30 second timeout
+            except ChannelNotFoundError:
+                return
+            if not events and not closed:
+                if queued:
+                    # Still waiting in the job queue: keep the connection alive
+                    yield ": keepalive\n\n"
+                    continue
                 yield f"data: {json.dumps({'progress': -1, 'message': 'Timeout'})}\n\n"
                 return
     
@@ -119,27 +224,8 @@ def test_sql_agent():
                 # In sync mode, we just log progress
                 print(f"Progress: {progress}% - {message}")
 
-            # Create workflow with progress callback - independent mode
-            workflow = create_workflow(progress_callback, is_analytics_workflow=False)
-            
-            # Initialize state
-            initial_state = {
-                "prompt": user_query,
-                "sql_query": "",
-                "verification_result": "",
-                "matches_intent": False,
-                "results": "",
-                "error": "",
-                "attempt": 0,
-                "syntax_validation_passed": False,
-                "explain_output": "",
-                "improved_prompt": "",
-                "error_message": "",
-                "progress": 0
-            }
-
             try:
-                result = workflow.invoke(initial_state, config={"recursion_limit": 50})
+                result = run_sql_workflow(user_query, progress_callback, is_sub_workflow=False)
                 return jsonify({
                     "success": True,
                     "result": {
@@ -159,70 +245,48 @@ def test_sql_agent():
         else:
             # Asynchronous mode with SSE (original behavior)
             # Generate a progress ID for this request
-            progress_id = generate_progress_id()
-            progress_queues[progress_id] = queue.Queue()
+            progress_id = progress_store.create()
 
             def progress_callback(message: str, progress: int):
-                progress_queues[progress_id].put({
+                progress_store.publish(progress_id, {
                     "message": message,
                     "progress": progress
                 })
 
-            # Create workflow with progress callback - independent mode
-            workflow = create_workflow(progress_callback, is_analytics_workflow=False)
-            
-            # Initialize state
-            initial_state = {
-                "prompt": user_query,
-                "sql_query": "",
-                "verification_result": "",
-                "matches_intent": False,
-                "results": "",
-                "error": "",
-                "attempt": 0,
-                "syntax_validation_passed": False,
-                "explain_output": "",
-                "improved_prompt": "",
-                "error_message": "",
-                "progress": 0
-            }
+            token_callback = make_token_callback(make_publisher(progress_id))
+
+            def publish_result(result):
+                # Send final result
+                progress_store.publish(progress_id, {
+                    "message": "Completed",
+                    "progress": 100,
+                    "result": {
+                        "success": True,
+                        "results": result["results"],
+                        "sql_query": result.get("sql_query", ""),
+                        "attempt": result.get("attempt", 0),
+                        "verification_result": result.get("verification_result", "")
+                    }
+                })
 
-            # Run workflow in a background thread
             def run_workflow():
                 try:
-                    result = workflow.invoke(initial_state, config={"recursion_limit": 50})
-                    # Send final result
-                    progress_queues[progress_id].put({
-                        "message": "Completed",
-                        "progress": 100,
-                        "result": {
-                            "success": True,
-                            "results": result["results"],
-                            "sql_query": result.get("sql_query", ""),
-                            "attempt": result.get("attempt", 0),
-                            "verification_result": result.get("verification_result", "")
-                        }
-                    })
+                    publish_result(run_sql_workflow(user_query, progress_callback, is_sub_workflow=False, token_callback=token_callback))
                 except Exception as e:
-                    # Send error
-                    progress_queues[progress_id].put({
-                        "message": f"Error: {str(e)}",
-                        "progress": 100,
-                        "error": str(e)
-                    })
+                    publish_error(progress_id, e)
                 finally:
                     # Signal completion
-                    progress_queues[progress_id].put("DONE")
+                    progress_store.close(progress_id)
 
-            # Start workflow in background thread
-            thread = threading.Thread(target=run_workflow)
-            thread.start()
-            
-            return jsonify({
-                "success": True,
-                "message": "Processing started",
-                "progress_id": progress_id
-            })
+            async def arun_workflow():
+                try:
+                    publish_result(await arun_sql_workflow(user_query, progress_callback, is_sub_workflow=False, token_callback=token_callback))
+                except Exception as e:
+                    publish_error(progress_id, e)
+                finally:
+                    progress_store.close(progress_id)
+
+            return start_background(progress_id, run_workflow, arun_workflow)
 
     except Exception as e:
         traceback.print_exc()
@@ -258,24 +322,7 @@ def test_sql_analytics():
             try:
                 # Step 1: Run SQL Agent (0-50% progress)
                 logger.info("Step 1: Running SQL Agent...")
-                workflow = create_workflow(sql_progress_callback, is_analytics_workflow=True)
-                
-                sql_initial_state = {
-                    "prompt": user_query,
-                    "sql_query": "",
-                    "verification_result": "",
-                    "matches_intent": False,
-                    "results": "",
-                    "error": "",
-                    "attempt": 0,
-                    "syntax_validation_passed": False,
-                    "explain_output": "",
-                    "improved_prompt": "",
-                    "error_message": "",
-                    "progress": 0
-                }
-                
-                sql_result = workflow.invoke(sql_initial_state, config={"recursion_limit": 50})
+                sql_result = run_sql_workflow(user_query, sql_progress_callback, is_sub_workflow=True)
                 sql_output = sql_result["results"]
                 
                 # Check if SQL agent failed
@@ -287,7 +334,7 @@ def test_sql_analytics():
                 
                 # Step 2: Run Analytics Agent (50-100% progress)
                 logger.info("Step 2: Running Analytics Agent...")
-                analytics_result = analyze_sql_results(user_query, sql_output, analytics_progress_callback)
+                analytics_result = analyze_sql_results(user_query, sql_output, analytics_progress_callback, sql_result.get("result_table"))
                 
                 # Extract visualization images and formatted response from analytics result
                 if isinstance(analytics_result, dict):
@@ -319,103 +366,99 @@ def test_sql_analytics():
         else:
             # Asynchronous mode with SSE (original behavior)
             # Generate a progress ID for this request
-            progress_id = generate_progress_id()
-            progress_queues[progress_id] = queue.Queue()
+            progress_id = progress_store.create()
 
             def sql_progress_callback(message: str, progress: int):
-                progress_queues[progress_id].put({
+                progress_store.publish(progress_id, {
                     "message": message,
                     "progress": progress
                 })
 
             def analytics_progress_callback(message: str, progress: int):
-                progress_queues[progress_id].put({
+                progress_store.publish(progress_id, {
                     "message": message,
                     "progress": progress
                 })
 
+            token_callback = make_token_callback(make_publisher(progress_id))
+
+            def sql_failed(sql_result):
+                # Check if SQL agent failed
+                if not sql_result.get("error"):
+                    return False
+                progress_store.publish(progress_id, {
+                    "message": f"SQL Agent failed: {sql_result['error']}",
+                    "progress": 50,
+                    "error": sql_result['error']
+                })
+                return True
+
+            def publish_result(sql_result, analytics_result):
+                # Extract visualization images and formatted response from analytics result
+                if isinstance(analytics_result, dict):
+                    visualization_images = analytics_result.get("visualization_images", [])
+                    analytics_formatted_response = analytics_result.get("formatted_response", str(analytics_result))
+                else:
+                    # Fallback for old string format
+                    visualization_images = []
+                    analytics_formatted_response = str(analytics_result)
+                
+                # Send final result
+                progress_store.publish(progress_id, {
+                    "message": "Completed",
+                    "progress": 100,
+                    "result": {
+                        "success": True,
+                        "query": user_query,
+                        "sql_query": sql_result.get("sql_query", ""),
+                        "sql_results": sql_result["results"],
+                        "analytics_report": analytics_formatted_response,
+                        "visualization_images": visualization_images,
+                        "sql_attempts": sql_result.get("attempt", 0),
+                        "verification_result": sql_result.get("verification_result", "")
+                    }
+                })
+
             def run_workflow():
                 try:
                     # Step 1: Run SQL Agent (0-50% progress)
                     logger.info("Step 1: Running SQL Agent...")
-                    workflow = create_workflow(sql_progress_callback, is_analytics_workflow=True)
-                    
-                    sql_initial_state = {
-                        "prompt": user_query,
-                        "sql_query": "",
-                        "verification_result": "",
-                        "matches_intent": False,
-                        "results": "",
-                        "error": "",
-                        "attempt": 0,
-                        "syntax_validation_passed": False,
-                        "explain_output": "",
-                        "improved_prompt": "",
-                        "error_message": "",
-                        "progress": 0
-                    }
-                    
-                    sql_result = workflow.invoke(sql_initial_state, config={"recursion_limit": 50})
-                    sql_output = sql_result["results"]
-                    
-                    # Check if SQL agent failed
-                    if sql_result.get("error"):
-                        progress_queues[progress_id].put({
-                            "message": f"SQL Agent failed: {sql_result['error']}",
-                            "progress": 50,
-                            "error": sql_result['error']
-                        })
-                        progress_queues[progress_id].put("DONE")
+                    sql_result = run_sql_workflow(user_query, sql_progress_callback, is_sub_workflow=True, token_callback=token_callback)
+                    if sql_failed(sql_result):
                         return
                     
                     # Step 2: Run Analytics Agent (50-100% progress)
                     logger.info("Step 2: Running Analytics Agent...")
-                    analytics_result = analyze_sql_results(user_query, sql_output, analytics_progress_callback)
-                    
-                    # Extract visualization images and formatted response from analytics result
-                    if isinstance(analytics_result, dict):
-                        visualization_images = analytics_result.get("visualization_images", [])
-                        analytics_formatted_response = analytics_result.get("formatted_response", str(analytics_result))
-                    else:
-                        # Fallback for old string format
-                        visualization_images = []
-                        analytics_formatted_response = str(analytics_result)
-                    
-                    # Send final result
-                    progress_queues[progress_id].put({
-                        "message": "Completed",
-                        "progress": 100,
-                        "result": {
-                            "success": True,
-                            "query": user_query,
-                            "sql_query": sql_result.get("sql_query", ""),
-                            "sql_results": sql_output,
-                            "analytics_report": analytics_formatted_response,
-                            "visualization_images": visualization_images,
-                            "sql_attempts": sql_result.get("attempt", 0),
-                            "verification_result": sql_result.get("verification_result", "")
-                        }
-                    })
+                    analytics_result = analyze_sql_results(
+                        user_query, sql_result["results"], analytics_progress_callback,
+                        sql_result.get("result_table"), token_callback=token_callback
+                    )
+                    publish_result(sql_result, analytics_result)
                 except Exception as e:
-                    # Send error
-                    progress_queues[progress_id].put({
-                        "message": f"Error: {str(e)}",
-                        "progress": 100,
-                        "error": str(e)
-                    })
+                    publish_error(progress_id, e)
                 finally:
                     # Signal completion
-                    progress_queues[progress_id].put("DONE")
+                    progress_store.close(progress_id)
 
-            # Start workflow in background thread
-            thread = threading.Thread(target=run_workflow)
-            thread.start()
-            
-            return jsonify({
-                "success": True,
-                "message": "Processing started",
-                "progress_id": progress_id
-            })
+            async def arun_workflow():
+                try:
+                    logger.info("Step 1: Running SQL Agent...")
+                    sql_result = await arun_sql_workflow(user_query, sql_progress_callback, is_sub_workflow=True, token_callback=token_callback)
+                    if sql_failed(sql_result):
+                        return
+
+                    logger.info("Step 2: Running Analytics Agent...")
+                    analytics_result = await aanalyze_sql_results(
+                        user_query, sql_result["results"], analytics_progress_callback,
+                        sql_result.get("result_table"), token_callback=token_callback
+                    )
+                    publish_result(sql_result, analytics_result)
+                except Exception as e:
+                    publish_error(progress_id, e)
+                finally:
+                    progress_store.close(progress_id)
+
+            return start_background(progress_id, run_workflow, arun_workflow)
 
     except Exception as e:
         traceback.print_exc()
@@ -1248,11 +1291,16 @@ def get_spotlight_dashboard():
         # Get date range from query parameter, default to 90 days
         date_range = request.args.get('date_range', 90, type=int)
         
-        dashboard_data = get_spotlight_dashboard_data(date_range)
+        # Canonical ranges are served from the latest precomputed snapshot
+        dashboard_data, as_of, source = get_spotlight_precomputer().serve(
+            date_range, dashboard_key(date_range), lambda: get_spotlight_dashboard_data(date_range)
+        )
         
         return jsonify({
             'success': True,
-            'data': dashboard_data
+            'data': dashboard_data,
+            'as_of': as_of,
+            'source': source
         })
     except Exception as e:
         logger.error(f"Error in spotlight dashboard: {str(e)}")
@@ -1271,12 +1319,16 @@ def get_funnel_metrics_endpoint():
         
         logger.info(f"Fetching funnel metrics for date_range={date_range}, country={country}")
         
-        # Get funnel data
-        funnel_data = get_funnel_metrics(date_range=date_range, country=country)
+        # Get funnel data, from a snapshot for canonical ranges and precomputed countries
+        funnel_data, as_of, source = get_spotlight_precomputer().serve(
+            date_range, funnel_key(date_range, country), lambda: get_funnel_metrics(date_range=date_range, country=country)
+        )
         
         return jsonify({
             'success': True,
-            'data': funnel_data
+            'data': funnel_data,
+            'as_of': as_of,
+            'source': source
         })
         
     except Exception as e:
@@ -1740,35 +1792,117 @@ def get_country_dashboard_new_partner_support():
             'error': str(e)
         }), 500
 
-@app.route('/country-dashboard/ai-insights', methods=['GET'])
-def get_country_dashboard_ai_insights():
-    """Generate AI insights for country dashboard by fetching data directly from backend"""
+def get_bundle_request():
+    """Shared bundle parameters and requested sections from the query string"""
+    params = {
+        'date_range': request.args.get('date_range', 90, type=int),
+        'period_type': request.args.get('period_type', 'monthly', type=str),
+        'start_date': request.args.get('start_date', None, type=str),
+        'end_date': request.args.get('end_date', None, type=str),
+        'partner_country': request.args.get('partner_country', None, type=str),
+        'top_partners_limit': request.args.get('top_partners_limit', 20, type=int),
+        'inactive_partners_limit': request.args.get('inactive_partners_limit', 50, type=int),
+        'new_partner_support_limit': request.args.get('new_partner_support_limit', 100, type=int)
+    }
+    sections = [name.strip() for name in request.args.get('sections', '').split(',') if name.strip()]
+    unknown = [name for name in sections if name not in COUNTRY_DASHBOARD_SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown section(s): {', '.join(unknown)}")
+    return params, sections or None
+
+@app.route('/country-dashboard/bundle', methods=['GET'])
+def get_country_dashboard_bundle_endpoint():
+    """Get several country dashboard sections (all by default) computed concurrently in one response"""
     try:
-        # Get parameters from query string
-        date_range = request.args.get('date_range', 90, type=int)
-        partner_country = request.args.get('partner_country', 'All')
-        report_type = request.args.get('report_type', 'monthly')
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
+        params, sections = get_bundle_request()
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+    try:
+        logger.info(f"Fetching country dashboard bundle - params: {params}, sections: {sections or 'all'}")
         
-        logger.info(f"Generating AI insights for country dashboard - range: {date_range} days, country: {partner_country}, type: {report_type}")
+        bundle = get_country_dashboard_bundle(params, sections)
         
-        # Fetch all necessary data directly from backend functions
-        overview_data = get_country_performance_overview(date_range)
+        # Per-section failures are reported in "errors"; the request only fails if nothing loaded
+        return jsonify({
+            'success': bool(bundle['data']) or not bundle['errors'],
+            **bundle
+        })
         
-        # Prepare dashboard data by calling backend functions directly
-        dashboard_data = {
-            'date_range': date_range,
-            'partner_country': partner_country,
-            'report_type': report_type,
-            'start_date': start_date,
-            'end_date': end_date,
-            'overview': overview_data,
-            'funnel': get_partner_funnel_data(date_range, partner_country),
-            'top_partners': get_top_partners_data(date_range, partner_country, limit=20),
-            'inactive_partners': get_inactive_partners_data(date_range, partner_country, limit=50),
-            'performance_contribution': get_country_performance_contribution(date_range, partner_country)
-        }
+    except Exception as e:
+        logger.error(f"Error in country dashboard bundle endpoint: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/country-dashboard/bundle/stream', methods=['GET'])
+def stream_country_dashboard_bundle():
+    """SSE variant of /country-dashboard/bundle: one "section" event per section as it finishes, then a "done" event"""
+    try:
+        params, sections = get_bundle_request()
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+    logger.info(f"Streaming country dashboard bundle - params: {params}, sections: {sections or 'all'}")
+
+    def generate():
+        failed = 0
+        try:
+            for result in iter_country_dashboard_sections(params, sections):
+                failed += 0 if result['success'] else 1
+                yield format_sse({"event": "section", **result})
+        except Exception as e:
+            logger.error(f"Error streaming country dashboard bundle: {str(e)}")
+            yield format_sse({"event": "error", "error": str(e)})
+        yield format_sse({"event": "done", "failed": failed})
+
+    return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def get_country_insights_dashboard_data():
+    """Collect the dashboard data the country AI insights are generated from, using query string parameters"""
+    date_range = request.args.get('date_range', 90, type=int)
+    partner_country = request.args.get('partner_country', 'All')
+    report_type = request.args.get('report_type', 'monthly')
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    
+    logger.info(f"Generating AI insights for country dashboard - range: {date_range} days, country: {partner_country}, type: {report_type}")
+    
+    # Fetch all necessary data concurrently from backend functions
+    bundle = get_country_dashboard_bundle(
+        {'date_range': date_range, 'partner_country': partner_country},
+        ['overview', 'partner_funnel', 'top_partners', 'inactive_partners', 'performance_contribution']
+    )
+    if bundle['errors']:
+        section, error = next(iter(bundle['errors'].items()))
+        raise RuntimeError(f"Failed to load {section}: {error}")
+    data = bundle['data']
+    
+    return {
+        'date_range': date_range,
+        'partner_country': partner_country,
+        'report_type': report_type,
+        'start_date': start_date,
+        'end_date': end_date,
+        'overview': data['overview'],
+        'funnel': data['partner_funnel'],
+        'top_partners': data['top_partners'],
+        'inactive_partners': data['inactive_partners'],
+        'performance_contribution': data['performance_contribution']
+    }
+
+@app.route('/country-dashboard/ai-insights', methods=['GET'])
+def get_country_dashboard_ai_insights():
+    """Generate AI insights for country dashboard by fetching data directly from backend"""
+    try:
+        dashboard_data = get_country_insights_dashboard_data()
         
         # Generate insights
         insights_result = generate_country_dashboard_insights(dashboard_data)
@@ -1785,6 +1919,73 @@ def get_country_dashboard_ai_insights():
             'error': str(e)
         }), 500
 
+@app.route('/country-dashboard/ai-insights/stream', methods=['GET'])
+def stream_country_dashboard_ai_insights():
+    """
+    SSE variant of /country-dashboard/ai-insights: streams insight tokens, then a final "result" event.
+
+    The LLM call runs as a job on the bounded agent job queue, so while it waits for
+    a slot the stream carries "queue" events; a full queue answers 429.
+    """
+    try:
+        dashboard_data = get_country_insights_dashboard_data()
+    except Exception as e:
+        logger.error(f"Error collecting country dashboard data for AI insights: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+    progress_id = progress_store.create()
+    publish = make_publisher(progress_id)
+
+    def run_insights():
+        try:
+            insights_result = generate_country_dashboard_insights(dashboard_data, token_callback=make_token_callback(publish))
+            publish({"event": "result", "success": True, "data": insights_result})
+        except Exception as e:
+            logger.error(f"Error generating country dashboard AI insights: {str(e)}")
+            publish({"event": "result", "success": False, "error": str(e)})
+        finally:
+            progress_store.close(progress_id)
+
+    async def arun_insights():
+        # The insights chain only has a sync client; keep it off the agent loop
+        await asyncio.to_thread(run_insights)
+
+    try:
+        get_job_queue().submit(run_insights, arun_insights, make_position_callback(progress_id))
+    except QueueFullError as e:
+        progress_store.discard(progress_id)
+        return queue_full_response(e, "Too many insight requests are being processed, please retry shortly")
+
+    def generate():
+        cursor = None
+        queued = False
+        try:
+            while True:
+                try:
+                    events, cursor, closed = progress_store.read(progress_id, cursor, timeout=60)
+                except ChannelNotFoundError:
+                    return
+                for event in events:
+                    queued = event.get("event") == "queue" and event.get("position", 0) > 0
+                    yield format_sse(event)
+                if closed:
+                    return
+                if not events:
+                    if queued:
+                        # Still waiting in the job queue: keep the connection alive
+                        yield ": keepalive\n\n"
+                        continue
+                    yield format_sse({"event": "result", "success": False, "error": "Timeout"})
+                    return
+        finally:
+            # This response is the channel's only subscriber
+            progress_store.discard(progress_id)
+
+    return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 def generate_widget_insight(widget_type, data, title):
     """Generate contextual insights based on widget data using LLM"""
     
@@ -1793,21 +1994,10 @@ def generate_widget_insight(widget_type, data, title):
     
     # Try to use LLM for insights if available
     try:
-        import os
-        from langchain_openai import ChatOpenAI
         from langchain_core.messages import SystemMessage, HumanMessage
         
-        OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-        API_BASE_URL = os.getenv('API_BASE_URL')
-        OPENAI_MODEL_NAME = os.getenv('OPENAI_MODEL_NAME')
-        
-        if OPENAI_API_KEY and API_BASE_URL and OPENAI_MODEL_NAME:
-            llm = ChatOpenAI(
-                api_key=OPENAI_API_KEY,
-                base_url=API_BASE_URL,
-                model=OPENAI_MODEL_NAME,
-                temperature=0.7
-            )
+        if settings.openai.api_key and settings.openai.base_url and settings.openai.model_name:
+            llm = get_openai_client(temperature=0.7)
             
             # Prepare data summary based on data structure
             if isinstance(data, dict):
@@ -2078,6 +2268,8 @@ if __name__ == '__main__':
     print("🚀 Starting Flask API Server...")
     print("📊 Available endpoints:")
     print("  • GET  /health - Health check")
+    print("  • GET  /ready - Readiness check (schema vector store)")
+    print("  • GET  /metrics - Runtime metrics (connection pool, ...)")
     print("  • POST /sql-agent - Test SQL Agent only")
     print("  • POST /sql-analytics - Test SQL + Analytics")
     print("  • GET  /screener/metrics - Get available metrics")
@@ -2096,7 +2288,13 @@ if __name__ == '__main__':
     print("  • POST /country-dashboard/compare - Compare multiple countries")
     print("  • GET  /country-dashboard/countries - Get available countries list")
     print("  • GET  /country-dashboard/application-chart - Get partner application chart with events")
-    print("\n🌐 API will be available at: http://localhost:5001")
+    print("  • GET  /country-dashboard/bundle - Get all country dashboard sections in one response")
+    print("  • GET  /country-dashboard/bundle/stream - Stream country dashboard sections as they finish (SSE)")
+    print(f"\n🌐 API will be available at: http://localhost:{settings.server.port}")
     print("📝 Make sure to start the React frontend on http://localhost:3000")
+    print("🏭 For production, run: python server.py")
+    
+    start_spotlight_precompute()
     
-    app.run(debug=True, host='0.0.0.0', port=5001) 
\ No newline at end of file
+    # Development server only; debug mode (reloader + debugger) is opt-in via FLASK_DEBUG
+    app.run(debug=settings.server.debug, host=settings.server.host, port=settings.server.port) 
\ No newline at end of file
@@ -0,0 +1,249 @@
+import json
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Dict, List, Tuple
+
+from config import settings
+from logging_config import LoggingConfig
+
+# Create logger
+logger = LoggingConfig('progress_channels').setup_logger()
+
+class ChannelNotFoundError(KeyError):
+    """Raised when a progress channel does not exist or has expired"""
+
+class ProgressChannelStore(ABC):
+    """
+    Per-request progress channels for the SSE endpoints.
+
+    A channel holds a bounded buffer of events (oldest dropped first) and is
+    removed once it has been idle for idle_ttl seconds, or completed_ttl seconds
+    after close(). Subscribers read from a cursor, so a late subscriber replays
+    what is still buffered, which always includes the last (final) event.
+    """
+
+    def __init__(self, max_events: int = 500, idle_ttl: float = 3600, completed_ttl: float = 300):
+        self.max_events = max_events
+        self.idle_ttl = idle_ttl
+        self.completed_ttl = completed_ttl
+
+    @abstractmethod
+    def create(self) -> str:
+        """Open a new channel and return its ID"""
+
+    @abstractmethod
+    def publish(self, channel_id: str, payload: Dict[str, Any]) -> None:
+        """Append an event; events for unknown or expired channels are dropped"""
+
+    @abstractmethod
+    def close(self, channel_id: str) -> None:
+        """Mark the channel complete; subscribers stop after the buffered events"""
+
+    @abstractmethod
+    def discard(self, channel_id: str) -> None:
+        """Remove a channel immediately"""
+
+    @abstractmethod
+    def read(self, channel_id: str, cursor: Any = None, timeout: float = 30) -> Tuple[List[Dict[str, Any]], Any, bool]:
+        """
+        Wait up to timeout seconds for events after cursor.
+
+        Returns:
+            Tuple[List[Dict[str, Any]], Any, bool]: (events, next cursor, closed), where
+                closed means the channel is complete and every event has been read
+
+        Raises:
+            ChannelNotFoundError: If the channel does not exist or has expired
+        """
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Channel counts for /metrics"""
+
+class _Channel:
+    __slots__ = ('events', 'next_seq', 'closed', 'updated_at')
+
+    def __init__(self, max_events: int):
+        self.events = deque(maxlen=max_events)
+        self.next_seq = 1
+        self.closed = False
+        self.updated_at = time.monotonic()
+
+class MemoryProgressStore(ProgressChannelStore):
+    """In-process channel store; subscribers must hit the same worker process as the job"""
+
+    def __init__(self, max_events: int = 500, idle_ttl: float = 3600, completed_ttl: float = 300, sweep_interval: float = 60):
+        super().__init__(max_events, idle_ttl, completed_ttl)
+        self.sweep_interval = sweep_interval
+        self._cond = threading.Condition()
+        self._channels: Dict[str, _Channel] = {}
+        self._last_sweep = time.monotonic()
+        self._expired = 0
+
+    def _sweep(self) -> None:
+        """Drop expired channels (lock held); runs at most once per sweep_interval"""
+        now = time.monotonic()
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        expired = [
+            channel_id for channel_id, channel in self._channels.items()
+            if now - channel.updated_at > (self.completed_ttl if channel.closed else self.idle_ttl)
+        ]
+        for channel_id in expired:
+            del self._channels[channel_id]
+        if expired:
+            self._expired += len(expired)
+            logger.info(f"Expired {len(expired)} progress channel(s), {len(self._channels)} open")
+
+    def create(self) -> str:
+        channel_id = str(uuid.uuid4())
+        with self._cond:
+            self._sweep()
+            self._channels[channel_id] = _Channel(self.max_events)
+        return channel_id
+
+    def publish(self, channel_id: str, payload: Dict[str, Any]) -> None:
+        with self._cond:
+            channel = self._channels.get(channel_id)
+            if channel is None or channel.closed:
+                return
+            channel.events.append((channel.next_seq, payload))
+            channel.next_seq += 1
+            channel.updated_at = time.monotonic()
+            self._cond.notify_all()
+
+    def close(self, channel_id: str) -> None:
+        with self._cond:
+            channel = self._channels.get(channel_id)
+            if channel is None:
+                return
+            channel.closed = True
+            channel.updated_at = time.monotonic()
+            self._cond.notify_all()
+
+    def discard(self, channel_id: str) -> None:
+        with self._cond:
+            self._channels.pop(channel_id, None)
+
+    def read(self, channel_id: str, cursor: Any = None, timeout: float = 30) -> Tuple[List[Dict[str, Any]], Any, bool]:
+        cursor = cursor or 0
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._sweep()
+            while True:
+                channel = self._channels.get(channel_id)
+                if channel is None:
+                    raise ChannelNotFoundError(channel_id)
+                # Events evicted from the buffer are skipped, the newest are kept
+                events = [(seq, payload) for seq, payload in channel.events if seq > cursor]
+                remaining = deadline - time.monotonic()
+                if events or channel.closed or remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            if events:
+                cursor = events[-1][0]
+            return [payload for _, payload in events], cursor, channel.closed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "backend": "memory",
+                "channels": len(self._channels),
+                "open": sum(1 for channel in self._channels.values() if not channel.closed),
+                "buffered_events": sum(len(channel.events) for channel in self._channels.values()),
+                "expired": self._expired
+            }
+
+class RedisProgressStore(ProgressChannelStore):
+    """
+    Redis Streams channel store, shared by every worker process.
+
+    Each channel is a capped stream (XADD MAXLEN) whose key expiry is pushed out
+    on every write, so Redis drops abandoned channels on its own.
+    """
+
+    OPEN_FIELD = "open"
+    DONE_FIELD = "done"
+
+    def __init__(self, url: str, max_events: int = 500, idle_ttl: float = 3600, completed_ttl: float = 300, prefix: str = "progress:"):
+        super().__init__(max_events, idle_ttl, completed_ttl)
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("PROGRESS_STORE=redis requires the 'redis' package (pip install redis)")
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url)
+
+    def _key(self, channel_id: str) -> str:
+        return f"{self.prefix}{channel_id}"
+
+    def _append(self, channel_id: str, fields: Dict[str, str], ttl: float) -> None:
+        key = self._key(channel_id)
+        pipe = self._redis.pipeline()
+        pipe.xadd(key, fields, maxlen=self.max_events, approximate=True)
+        pipe.expire(key, int(ttl))
+        pipe.execute()
+
+    def create(self) -> str:
+        channel_id = str(uuid.uuid4())
+        # Streams only exist once they hold an entry
+        self._append(channel_id, {self.OPEN_FIELD: "1"}, self.idle_ttl)
+        return channel_id
+
+    def publish(self, channel_id: str, payload: Dict[str, Any]) -> None:
+        if not self._redis.exists(self._key(channel_id)):
+            return
+        self._append(channel_id, {"data": json.dumps(payload, default=str)}, self.idle_ttl)
+
+    def close(self, channel_id: str) -> None:
+        if not self._redis.exists(self._key(channel_id)):
+            return
+        self._append(channel_id, {self.DONE_FIELD: "1"}, self.completed_ttl)
+
+    def discard(self, channel_id: str) -> None:
+        self._redis.delete(self._key(channel_id))
+
+    def read(self, channel_id: str, cursor: Any = None, timeout: float = 30) -> Tuple[List[Dict[str, Any]], Any, bool]:
+        key = self._key(channel_id)
+        cursor = cursor or "0-0"
+        # block=0 would wait forever; no block means return immediately
+        block = int(timeout * 1000) if timeout > 0 else None
+        response = self._redis.xread({key: cursor}, count=self.max_events, block=block)
+        if not response:
+            if not self._redis.exists(key):
+                raise ChannelNotFoundError(channel_id)
+            return [], cursor, False
+
+        events, closed = [], False
+        for entry_id, fields in response[0][1]:
+            cursor = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+            fields = {(k.decode() if isinstance(k, bytes) else k): v for k, v in fields.items()}
+            if self.DONE_FIELD in fields:
+                closed = True
+            elif "data" in fields:
+                events.append(json.loads(fields["data"]))
+        return events, cursor, closed
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis", "channels": sum(1 for _ in self._redis.scan_iter(match=f"{self.prefix}*", count=500))}
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_progress_store() -> ProgressChannelStore:
+    """Get the process-wide progress channel store selected by PROGRESS_STORE"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                config = settings.progress_store
+                if config.backend == "redis":
+                    _store = RedisProgressStore(config.redis_url, config.max_events, config.idle_ttl, config.completed_ttl)
+                else:
+                    _store = MemoryProgressStore(config.max_events, config.idle_ttl, config.completed_ttl)
+                logger.info(f"Using {config.backend} progress channel store")
+    return _store
@@ -1,4 +1,5 @@
-from typing import Callable, Optional
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from logging_config import LoggingConfig
 
 # Create logger
@@ -7,6 +8,9 @@ logger = LoggingConfig('progress_manager').setup_logger()
 # Type alias for progress callback
 ProgressCallback = Callable[[str, int], None]
 
+# Type alias for token callback: (stream name, text chunk)
+TokenCallback = Callable[[str, str], None]
+
 class ProgressManager:
     def __init__(self, is_sub_workflow: bool = False):
         """
@@ -52,6 +56,117 @@ class ProgressManager:
             callback(message, adjusted_progress)
             logger.info(f"Progress update: {message} ({adjusted_progress}%)")
 
+class TokenStreamer:
+    def __init__(self, callback: TokenCallback, stream: str, min_interval: float = 0.1, max_buffer: int = 200):
+        """
+        Coalesce LLM tokens into fewer, larger chunks before handing them to a callback.
+
+        Args:
+            callback (TokenCallback): Receives (stream, text) for each coalesced chunk
+            stream (str): Name of the stream, e.g. "sql" or "insights"
+            min_interval (float): Minimum seconds between chunks
+            max_buffer (int): Flush early once this many characters are buffered
+        """
+        self.callback = callback
+        self.stream = stream
+        self.min_interval = min_interval
+        self.max_buffer = max_buffer
+        self._buffer: List[str] = []
+        self._buffered = 0
+        self._last_flush = 0.0
+
+    def write(self, text: str) -> None:
+        if not text:
+            return
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.max_buffer or time.monotonic() - self._last_flush >= self.min_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        chunk = "".join(self._buffer)
+        self._buffer, self._buffered = [], 0
+        self._last_flush = time.monotonic()
+        try:
+            self.callback(self.stream, chunk)
+        except Exception as e:
+            # A disconnected listener must not break generation
+            logger.warning(f"Token callback failed: {str(e)}")
+
+def stream_llm(llm, messages, token_callback: Optional[TokenCallback] = None, stream: str = "llm") -> str:
+    """
+    Invoke a chat model, streaming its tokens to token_callback if one is given.
+
+    Returns:
+        str: The full response text
+    """
+    if token_callback is None:
+        return llm.invoke(messages).content
+
+    streamer = TokenStreamer(token_callback, stream)
+    parts = []
+    for chunk in llm.stream(messages):
+        text = chunk.content if isinstance(chunk.content, str) else ""
+        parts.append(text)
+        streamer.write(text)
+    streamer.flush()
+    return "".join(parts)
+
+async def astream_llm(llm, messages, token_callback: Optional[TokenCallback] = None, stream: str = "llm") -> str:
+    """Async counterpart of stream_llm for nodes running on the agent event loop."""
+    if token_callback is None:
+        return (await llm.ainvoke(messages)).content
+
+    streamer = TokenStreamer(token_callback, stream)
+    parts = []
+    async for chunk in llm.astream(messages):
+        text = chunk.content if isinstance(chunk.content, str) else ""
+        parts.append(text)
+        streamer.write(text)
+    streamer.flush()
+    return "".join(parts)
+
+def build_run_config(progress_callback: Optional[ProgressCallback] = None,
+                     is_sub_workflow: bool = False,
+                     recursion_limit: int = 50,
+                     token_callback: Optional[TokenCallback] = None) -> Dict[str, Any]:
+    """
+    Build the per-invocation config for a compiled workflow.
+
+    Graphs are compiled once and shared, so progress reporting is passed with each
+    invoke() call through config["configurable"] instead of being bound at build time.
+
+    Args:
+        progress_callback (Optional[ProgressCallback]): Progress callback for this run
+        is_sub_workflow (bool): If True, progress is reported in the 0-50% range
+        recursion_limit (int): LangGraph recursion limit for this run
+        token_callback (Optional[TokenCallback]): Receives streamed LLM tokens for this run
+    """
+    return {
+        "recursion_limit": recursion_limit,
+        "configurable": {
+            "progress_callback": progress_callback,
+            "token_callback": token_callback,
+            "is_sub_workflow": is_sub_workflow,
+            "progress_manager": ProgressManager(is_sub_workflow=is_sub_workflow) if progress_callback else None
+        }
+    }
+
+def progress_from_config(config: Optional[Dict[str, Any]]) -> Tuple[Optional[ProgressCallback], Optional[ProgressManager]]:
+    """Extract the progress callback and manager injected by build_run_config"""
+    configurable = (config or {}).get("configurable", {})
+    progress_callback = configurable.get("progress_callback")
+    progress_manager = configurable.get("progress_manager")
+    if progress_callback and progress_manager is None:
+        progress_manager = ProgressManager(is_sub_workflow=configurable.get("is_sub_workflow", False))
+    return progress_callback, progress_manager
+
+def token_callback_from_config(config: Optional[Dict[str, Any]]) -> Optional[TokenCallback]:
+    """Extract the token callback injected by build_run_config"""
+    return (config or {}).get("configurable", {}).get("token_callback")
+
 class SQLProgressStages:
     """Progress stages for SQL workflow"""
     GENERATE_SQL = 20
@@ -0,0 +1,262 @@
+import datetime
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from config import settings
+from logging_config import LoggingConfig
+
+# Create logger
+logger = LoggingConfig('result_cache').setup_logger()
+
+# Seconds a coalesced caller waits for the leader before computing the value itself
+FLIGHT_WAIT_TIMEOUT = 120
+
+def next_refresh(now: float, refresh_times: List[str], grace: float = 0) -> Optional[float]:
+    """
+    Next daily refresh after now, as a Unix timestamp.
+
+    Args:
+        now (float): Unix timestamp
+        refresh_times (List[str]): Daily refresh times as "HH:MM" in UTC
+        grace (float): Seconds added to each refresh time to let the refresh job finish
+
+    Returns:
+        Optional[float]: Timestamp of the next refresh (plus grace), or None without a schedule
+    """
+    current = datetime.datetime.fromtimestamp(now, tz=datetime.timezone.utc)
+    candidates = []
+    for value in refresh_times:
+        hour, minute = (int(part) for part in value.split(':'))
+        at = current.replace(hour=hour, minute=minute, second=0, microsecond=0) + datetime.timedelta(seconds=grace)
+        if at.timestamp() <= now:
+            at += datetime.timedelta(days=1)
+        candidates.append(at.timestamp())
+    return min(candidates) if candidates else None
+
+class _Entry:
+    __slots__ = ('value', 'expires_at', 'size')
+
+    def __init__(self, value: Any, expires_at: float, size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+class _Flight:
+    """A computation in progress that concurrent callers for the same key wait on"""
+    __slots__ = ('done', 'value', 'error', 'ok')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        # False if the leader was interrupted before producing a value or an error
+        self.ok = False
+
+class ResultCache:
+    """
+    In-memory TTL + LRU cache for dashboard query results.
+
+    Entries are sized by their JSON encoding and the least recently used are evicted
+    once the total exceeds max_bytes. Concurrent misses for the same key are
+    coalesced: one caller computes, the others wait for its result (single-flight).
+    Cached values are shared between callers and must not be mutated.
+
+    The cache and its single-flight are per process: with N gunicorn workers the
+    same cold key can still be computed up to N times at once.
+    """
+
+    def __init__(self, max_bytes: int, refresh_times: Optional[List[str]] = None, refresh_grace: float = 0):
+        self.max_bytes = max_bytes
+        self.refresh_times = refresh_times or []
+        self.refresh_grace = refresh_grace
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._flights: Dict[tuple, _Flight] = {}
+        self._bytes = 0
+        self._evictions = 0
+        self._functions: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, name: str, counter: str) -> None:
+        """Bump a per-function counter (lock held)"""
+        counters = self._functions.setdefault(name, {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0, "uncached": 0, "wait_abandoned": 0})
+        counters[counter] += 1
+
+    def expiry(self, now: float, ttl: float, refresh_aligned: bool) -> float:
+        """Expiry time for an entry computed now: after ttl, or at the next summary refresh if that is sooner"""
+        expires_at = now + ttl
+        if refresh_aligned:
+            refresh = next_refresh(now, self.refresh_times, self.refresh_grace)
+            if refresh is not None:
+                expires_at = min(expires_at, refresh)
+        return expires_at
+
+    def get_or_compute(self,
+                       name: str,
+                       key: tuple,
+                       compute: Callable[[], Any],
+                       ttl: float,
+                       refresh_aligned: bool = False,
+                       cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Return the cached value for key, computing it once if it is missing or expired.
+
+        Args:
+            name (str): Function name, for metrics
+            key (tuple): Cache key (includes the name)
+            compute (Callable): Produces the value on a miss
+            ttl (float): Seconds to keep the value
+            refresh_aligned (bool): Also expire at the next summary table refresh
+            cacheable (Optional[Callable]): Returns False for values that must not be stored
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > time.time():
+                self._entries.move_to_end(key)
+                self._count(name, "hits")
+                return entry.value
+            if entry is not None:
+                self._remove(key)
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._count(name, "misses")
+            else:
+                self._count(name, "coalesced")
+
+        if not leader:
+            finished = flight.done.wait(FLIGHT_WAIT_TIMEOUT)
+            if finished and flight.error is not None:
+                raise flight.error
+            if finished and flight.ok:
+                return flight.value
+            # The leader is stuck or was interrupted: don't tie this caller to it
+            logger.warning(f"Gave up waiting on {name} computed by another caller, computing it here")
+            with self._lock:
+                self._count(name, "wait_abandoned")
+            return compute()
+
+        try:
+            value = compute()
+            store = cacheable is None or cacheable(value)
+            size = self._size(value) if store else 0
+            with self._lock:
+                if not store:
+                    self._count(name, "uncached")
+                elif size <= self.max_bytes:
+                    self._entries[key] = _Entry(value, self.expiry(time.time(), ttl, refresh_aligned), size)
+                    self._bytes += size
+                    self._evict()
+            flight.value = value
+            flight.ok = True
+            return value
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self._count(name, "errors")
+            raise
+        finally:
+            # Also on BaseException, so later callers never wait on an abandoned flight
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    @staticmethod
+    def _size(value: Any) -> int:
+        try:
+            return len(json.dumps(value, default=str))
+        except (TypeError, ValueError):
+            return len(repr(value))
+
+    def _remove(self, key: tuple) -> None:
+        """Drop an entry (lock held)"""
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _evict(self) -> None:
+        """Evict least recently used entries until within budget (lock held)"""
+        while self._bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self._evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry, e.g. after the summary tables were refreshed out of schedule"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        logger.info("Result cache cleared")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and memory use for /metrics"""
+        with self._lock:
+            functions = {name: dict(counters) for name, counters in self._functions.items()}
+            hits = sum(counters["hits"] for counters in functions.values())
+            lookups = hits + sum(counters["misses"] + counters["coalesced"] for counters in functions.values())
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self._evictions,
+                "in_flight": len(self._flights),
+                "hit_rate": round(hits / lookups, 3) if lookups else None,
+                "functions": functions
+            }
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_result_cache() -> ResultCache:
+    """Get the process-wide result cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                config = settings.result_cache
+                _cache = ResultCache(config.max_mb * 1024 * 1024, config.refresh_times, config.refresh_grace)
+    return _cache
+
+def _not_error(value: Any) -> bool:
+    """Dashboard functions return their empty fallback with an "error" key when a query fails"""
+    return not (isinstance(value, dict) and value.get('error'))
+
+def cached_result(ttl: Optional[float] = None, refresh_aligned: bool = False):
+    """
+    Cache a dashboard function's results by its (normalized) arguments.
+
+    Args:
+        ttl (Optional[float]): Seconds to keep results, defaults to RESULT_CACHE_TTL
+        refresh_aligned (bool): The function reads partner_summary_daily/monthly, so its
+            results also expire at the next scheduled summary refresh
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        name = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            config = settings.result_cache
+            if not config.enabled:
+                return func(*args, **kwargs)
+            # Bind defaults so f(90) and f(date_range=90) share an entry
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (name, tuple((arg, repr(value)) for arg, value in bound.arguments.items()))
+            return get_result_cache().get_or_compute(
+                name,
+                key,
+                lambda: func(*args, **kwargs),
+                ttl if ttl is not None else config.ttl,
+                refresh_aligned,
+                _not_error
+            )
+
+        wrapper.uncached = func
+        return wrapper
+    return decorator
@@ -0,0 +1,99 @@
+import re
+from typing import Dict, List, Optional
+
+from config import settings
+from logging_config import LoggingConfig
+from schema_manager import schema_dict_to_chunks
+from vector_store import get_vector_store
+
+# Create logger
+logger = LoggingConfig('schema_context').setup_logger()
+
+TABLE_NAME_PATTERN = re.compile(r"^\s*Table:\s*(\S+)", re.MULTILINE)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), good enough for budgeting prompts."""
+    return len(text) // 4 + 1
+
+def _retrieve_tables(prompt: str, top_k: int) -> List[str]:
+    """Table names of the top-k schema chunks for the prompt, most relevant first."""
+    docs = get_vector_store().similarity_search(prompt, k=top_k)
+    tables = []
+    for doc in docs:
+        match = TABLE_NAME_PATTERN.search(doc.page_content)
+        if match and match.group(1) not in tables:
+            tables.append(match.group(1))
+    return tables
+
+def _related_tables(schema_dict: Dict, tables: List[str]) -> List[str]:
+    """Tables one relationship hop away from the given ones, in either direction."""
+    selected = set(tables)
+    related = []
+    for table in tables:
+        for relation in schema_dict.get(table, {}).get("relationships", []):
+            target = relation.get("references_table")
+            if target in schema_dict and target not in selected and target not in related:
+                related.append(target)
+    for table, meta in schema_dict.items():
+        if table in selected or table in related:
+            continue
+        if any(r.get("references_table") in selected for r in meta.get("relationships", [])):
+            related.append(table)
+    return related
+
+def _fit_to_budget(schema_dict: Dict, tables: List[str], token_budget: int) -> List[str]:
+    """Render chunks for the tables in priority order until the token budget is spent."""
+    chunks = []
+    used = 0
+    for table in tables:
+        chunk = schema_dict_to_chunks({table: schema_dict[table]})[0]
+        cost = estimate_tokens(chunk)
+        # The most relevant table is always included, even if it alone exceeds the budget
+        if chunks and used + cost > token_budget:
+            continue
+        chunks.append(chunk)
+        used += cost
+    return chunks
+
+def build_schema_context(prompt: str,
+                         schema_dict: Dict,
+                         top_k: Optional[int] = None,
+                         token_budget: Optional[int] = None) -> str:
+    """
+    Assemble the schema context for an SQL generation prompt.
+
+    Selects the top-k tables for the prompt from the schema vector store, adds the
+    tables one inferred relationship away so JOIN targets are available, and drops
+    the least relevant ones once the token budget is reached. Falls back to the
+    whole schema (still within the budget) if the vector store is not available.
+
+    Args:
+        prompt (str): Natural language question
+        schema_dict (Dict): Schema metadata as returned by read_schema_metadata
+        top_k (int): Number of tables to retrieve, defaults to SCHEMA_CONTEXT_TOP_K
+        token_budget (int): Approximate token cap, defaults to SCHEMA_CONTEXT_TOKEN_BUDGET
+
+    Returns:
+        str: Schema chunks joined by blank lines
+    """
+    top_k = top_k or settings.schema_context.top_k
+    token_budget = token_budget or settings.schema_context.token_budget
+
+    try:
+        seeds = [table for table in _retrieve_tables(prompt, top_k) if table in schema_dict]
+    except Exception as e:
+        logger.warning(f"Schema retrieval unavailable, using full schema: {str(e)}")
+        seeds = []
+
+    if seeds:
+        tables = seeds + _related_tables(schema_dict, seeds)
+    else:
+        tables = list(schema_dict.keys())
+
+    chunks = _fit_to_budget(schema_dict, tables, token_budget)
+    context = "\n\n".join(chunks)
+    logger.info(
+        f"Schema context: {len(chunks)}/{len(schema_dict)} tables "
+        f"({len(seeds)} retrieved), ~{estimate_tokens(context)} tokens"
+    )
+    return context
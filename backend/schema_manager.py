@@ -1,13 +1,19 @@
 import json
+import hashlib
 import os, time
+import threading
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from supabase import Client
 from logging_config import LoggingConfig
 
 # Create logger
 logger = LoggingConfig('schema_manager').setup_logger()
 
+# Parsed schema metadata keyed by the file's (inode, mtime, size)
+_metadata_cache: Optional[Tuple[Tuple[int, int, int], Dict]] = None
+_metadata_lock = threading.Lock()
+
 def get_multi_schema_metadata(supabase_client: Client, schemas: List[str]) -> str:
     """
     Fetches metadata for the given schemas by calling the Supabase RPC function,
@@ -46,13 +52,21 @@ def get_multi_schema_metadata(supabase_client: Client, schemas: List[str]) -> st
     
     # Write schema data to JSON file
     json_file_path = 'metadata/schema_metadata.json'
-    with open(json_file_path, 'w') as f:
+    # Replace atomically so concurrent readers never parse a half-written file
+    with open(json_file_path + '.tmp', 'w') as f:
         json.dump(schema_dict_with_relationships, f, indent=4)
+    os.replace(json_file_path + '.tmp', json_file_path)
     
     return json_file_path
 
 def read_schema_metadata(supabase_client: Client, max_age_hours: int = 24) -> Dict:
-    """Read schema metadata with automatic refresh based on file age."""
+    """
+    Read schema metadata with automatic refresh based on file age.
+
+    The parsed file is cached per process until its mtime changes, so the returned
+    dict is shared between callers and must not be mutated.
+    """
+    global _metadata_cache
     json_file_path = 'metadata/schema_metadata.json'
     should_refresh = False
     
@@ -73,9 +87,25 @@ def read_schema_metadata(supabase_client: Client, max_age_hours: int = 24) -> Di
         logger.info("Refreshing schema metadata from Supabase...")
         get_multi_schema_metadata(supabase_client, ['partner', 'client', 'gp'])
     
+    stat = os.stat(json_file_path)
+    version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with _metadata_lock:
+        if _metadata_cache is not None and _metadata_cache[0] == version:
+            return _metadata_cache[1]
+
     with open(json_file_path, 'r') as f:
         schema_dict = json.load(f)
+    with _metadata_lock:
+        _metadata_cache = (version, schema_dict)
     return schema_dict
+
+def schema_metadata_hash(json_file_path: str = 'metadata/schema_metadata.json') -> Optional[str]:
+    """Content hash of the cached schema metadata file, or None if it does not exist."""
+    if not os.path.exists(json_file_path):
+        return None
+    with open(json_file_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
 def infer_table_relationships(schema_dict: Dict) -> Dict:
     """
     Infers table relationships from the schema based on naming conventions.
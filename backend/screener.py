@@ -1,25 +1,9 @@
 import pandas as pd
-import psycopg2
 from psycopg2.extras import RealDictCursor
-from dotenv import load_dotenv
-import os
 from datetime import datetime, timedelta
 
-# Load environment variables
-load_dotenv()
-
-# Database connection parameters
-db_params = {
-    'host': os.getenv('host'),
-    'port': os.getenv('port'),
-    'database': os.getenv('dbname'),
-    'user': os.getenv('user'),
-    'password': os.getenv('password')
-}
-
-def get_db_connection():
-    """Create and return a database connection"""
-    return psycopg2.connect(**db_params)
+# Connections come from the shared pool; re-exported for existing importers
+from utils import get_db_connection
 
 def format_metric_value(value):
     """Format metric values for display"""
@@ -0,0 +1,221 @@
+import hashlib
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, fine for a single dev server
+    fcntl = None
+
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_core.messages import SystemMessage, HumanMessage
+from config import settings
+from logging_config import LoggingConfig
+from sql_cache import normalize_prompt
+from utils import get_openai_client, get_openai_embedding_client
+
+# Create logger
+logger = LoggingConfig('semantic_cache').setup_logger()
+
+SCHEMA_HASH_FILE = "schema.sha256"
+
+def _entry_id(prompt: str) -> str:
+    return hashlib.sha256(normalize_prompt(prompt).encode('utf-8')).hexdigest()
+
+def same_question(prompt: str, cached_prompt: str) -> bool:
+    """Cheap LLM check that two near-identical questions ask for exactly the same data."""
+    system_prompt = """You compare two analytics questions. Answer "yes" only if both ask for exactly the same data:
+same metrics, same filters, same time period, same grouping, same ordering and the same number of results.
+Wording differences do not matter. Answer with a single word: yes or no."""
+    response = get_openai_client(temperature=0).invoke([
+        SystemMessage(content=system_prompt),
+        HumanMessage(content=f"Question A: {cached_prompt}\nQuestion B: {prompt}")
+    ])
+    return response.content.strip().lower().startswith("yes")
+
+class SemanticCache:
+    """
+    Near-duplicate question cache on top of a small FAISS index of answered prompts.
+
+    Vectors are L2-normalized and compared by inner product, so scores are cosine
+    similarities. The index only holds prompts answered under one schema version;
+    it is cleared when the schema metadata hash changes.
+
+    Worker processes share the persisted index: each reloads it when another process
+    has written a new copy, and writes are serialized with a file lock so one worker
+    never overwrites entries added by another.
+    """
+
+    def __init__(self, path: str, threshold: float = 0.92, verify_with_llm: bool = True):
+        self.path = path
+        self.threshold = threshold
+        self.verify_with_llm = verify_with_llm
+        self._lock = threading.Lock()
+        self._vectorstore: Optional[FAISS] = None
+        self._schema_hash: Optional[str] = None
+        # Identity of the persisted copy loaded into _vectorstore
+        self._disk_version: Optional[Tuple[int, int]] = None
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """Exclusive for writers, shared for readers loading the index, across worker processes."""
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(f"{self.path}.lock", 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _disk_state(self) -> Optional[Tuple[int, int]]:
+        """Inode and mtime of the persisted schema hash; every save swaps in a new copy, so both change."""
+        try:
+            stat = os.stat(os.path.join(self.path, SCHEMA_HASH_FILE))
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def _refresh(self) -> None:
+        """Reload the persisted index if it changed since it was loaded (both locks held)."""
+        state = self._disk_state()
+        if state == self._disk_version:
+            return
+        self._disk_version = state
+        self._vectorstore = None
+        self._schema_hash = None
+        if state is None:
+            return
+        with open(os.path.join(self.path, SCHEMA_HASH_FILE), 'r') as f:
+            self._schema_hash = f.read().strip() or None
+        # The index is written only by this module, so its pickle is trusted
+        self._vectorstore = FAISS.load_local(
+            self.path,
+            get_openai_embedding_client(),
+            allow_dangerous_deserialization=True,
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT,
+            normalize_L2=True
+        )
+        logger.info(f"Loaded semantic cache with {len(self._vectorstore.index_to_docstore_id)} prompt(s)")
+
+    def _swap_in(self, staging_path: Optional[str]) -> None:
+        """Move the persisted index aside, put staging_path (if any) in its place, then delete the old copy."""
+        previous_path = f"{self.path}.old"
+        shutil.rmtree(previous_path, ignore_errors=True)
+        if os.path.exists(self.path):
+            os.replace(self.path, previous_path)
+        if staging_path is not None:
+            os.replace(staging_path, self.path)
+        shutil.rmtree(previous_path, ignore_errors=True)
+        self._disk_version = self._disk_state()
+
+    def _save(self) -> None:
+        """Write the index to a scratch directory, then swap it in place of the old one."""
+        staging_path = f"{self.path}.new"
+        shutil.rmtree(staging_path, ignore_errors=True)
+        self._vectorstore.save_local(staging_path)
+        with open(os.path.join(staging_path, SCHEMA_HASH_FILE), 'w') as f:
+            f.write(self._schema_hash or "")
+        self._swap_in(staging_path)
+
+    def lookup(self, prompt: str, schema_hash: str) -> Optional[Dict[str, str]]:
+        """
+        Find validated SQL for a question phrased differently from one answered before.
+
+        Returns:
+            Optional[Dict[str, str]]: {"prompt", "sql_query", "score"} for the match, or None
+        """
+        with self._lock:
+            if self._disk_state() != self._disk_version:
+                with self._file_lock(exclusive=False):
+                    self._refresh()
+            if self._vectorstore is None or self._schema_hash != schema_hash:
+                return None
+
+        # Embed outside the lock; the search itself must not race add/remove mutating the index
+        vector = get_openai_embedding_client().embed_query(prompt)
+        with self._lock:
+            if self._vectorstore is None or self._schema_hash != schema_hash:
+                return None
+            matches = self._vectorstore.similarity_search_with_score_by_vector(vector, k=1)
+        if not matches:
+            return None
+        doc, score = matches[0]
+        logger.info(f"Nearest cached question (similarity {score:.3f}): {doc.page_content}")
+        if score < self.threshold:
+            return None
+
+        if self.verify_with_llm and normalize_prompt(doc.page_content) != normalize_prompt(prompt):
+            if not same_question(prompt, doc.page_content):
+                logger.info("LLM check rejected the semantic cache match")
+                return None
+
+        return {"prompt": doc.page_content, "sql_query": doc.metadata["sql_query"], "score": score}
+
+    def add(self, prompt: str, schema_hash: str, sql_query: str) -> None:
+        """Remember validated SQL for a prompt; entries from an older schema are dropped first."""
+        vector = get_openai_embedding_client().embed_query(prompt)
+        with self._lock, self._file_lock(exclusive=True):
+            # Start from the latest persisted copy so entries added by other workers survive
+            self._refresh()
+            entry_id = _entry_id(prompt)
+            if self._vectorstore is not None and self._schema_hash != schema_hash:
+                logger.info("Schema metadata changed, clearing semantic cache")
+                self._vectorstore = None
+            if self._vectorstore is not None and entry_id in self._vectorstore.docstore._dict:
+                self._vectorstore.delete([entry_id])
+
+            metadata = {"sql_query": sql_query}
+            if self._vectorstore is None:
+                self._vectorstore = FAISS.from_embeddings(
+                    [(prompt, vector)],
+                    get_openai_embedding_client(),
+                    metadatas=[metadata],
+                    ids=[entry_id],
+                    distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT,
+                    normalize_L2=True
+                )
+            else:
+                self._vectorstore.add_embeddings([(prompt, vector)], metadatas=[metadata], ids=[entry_id])
+            self._schema_hash = schema_hash
+            self._save()
+
+    def remove(self, prompt: str) -> None:
+        """Forget a prompt, e.g. when its cached SQL failed to execute."""
+        with self._lock, self._file_lock(exclusive=True):
+            self._refresh()
+            entry_id = _entry_id(prompt)
+            if self._vectorstore is None or entry_id not in self._vectorstore.docstore._dict:
+                return
+            if len(self._vectorstore.index_to_docstore_id) == 1:
+                # FAISS can't hold an empty index; drop the whole cache instead
+                self._vectorstore = None
+                self._schema_hash = None
+                self._swap_in(None)
+                return
+            self._vectorstore.delete([entry_id])
+            self._save()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """Get the process-wide semantic cache, or None if it is disabled"""
+    global _cache
+    if not settings.semantic_cache.enabled:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SemanticCache(
+                    settings.semantic_cache.path,
+                    threshold=settings.semantic_cache.threshold,
+                    verify_with_llm=settings.semantic_cache.verify_with_llm
+                )
+    return _cache
@@ -0,0 +1,105 @@
+"""
+Production entry point: serves the Flask app with gunicorn.
+
+    python server.py
+
+The app is imported once in the master process (SERVER_PRELOAD) so compiled
+graphs, imported modules and the persisted vector index are shared copy-on-write
+by every worker. The master does no network I/O; each worker opens its own
+connection pool and starts the vector store after fork, before it accepts traffic.
+"""
+import sys
+
+from gunicorn.app.base import BaseApplication
+
+from config import settings
+from logging_config import LoggingConfig
+
+# Create logger
+logger = LoggingConfig('server').setup_logger()
+
+def _load_app():
+    """Import the Flask app; when preloading, defer vector store startup to the workers"""
+    if settings.server.preload:
+        import vector_store
+        vector_store.defer_startup()
+        try:
+            if vector_store.warm_vector_store():
+                logger.info("Loaded persisted vector index before fork")
+        except Exception as e:
+            logger.warning(f"Failed to preload vector index: {str(e)}")
+
+    from main import app
+    return app
+
+def post_fork(server, worker) -> None:
+    """Give the new worker its own connections and warm them before it serves requests"""
+    import db_pool
+    db_pool.reset_after_fork()
+
+    if server.cfg.preload_app:
+        import vector_store
+        from utils import get_supabase_client
+        try:
+            vector_store.resume_startup(get_supabase_client())
+        except Exception as e:
+            logger.warning(f"Worker {worker.pid} failed to start vector store: {str(e)}")
+
+    try:
+        with db_pool.get_pool().connection():
+            pass
+    except Exception as e:
+        logger.warning(f"Worker {worker.pid} could not warm the connection pool: {str(e)}")
+
+    # Only the worker holding the snapshot lock recomputes; the others serve its snapshots
+    from spotlight_precompute import start_spotlight_precompute
+    start_spotlight_precompute()
+    logger.info(f"Worker {worker.pid} ready")
+
+def worker_exit(server, worker) -> None:
+    """Let queued agent jobs finish (their SSE streams close with them), then release connections"""
+    from db_pool import get_pool
+    from job_queue import get_job_queue
+
+    if not get_job_queue().drain(settings.server.graceful_timeout):
+        logger.warning(f"Worker {worker.pid} exiting with agent jobs still running")
+    get_pool().close()
+
+class AgentServer(BaseApplication):
+    """gunicorn application configured from settings.server"""
+
+    def __init__(self):
+        self.application = None
+        super().__init__()
+
+    def load_config(self):
+        config = settings.server
+        options = {
+            "bind": f"{config.host}:{config.port}",
+            "workers": config.workers,
+            # Threaded workers: SSE streams hold a thread, not a whole process
+            "worker_class": "gthread",
+            "threads": config.threads,
+            "timeout": config.timeout,
+            "graceful_timeout": config.graceful_timeout,
+            "keepalive": config.keepalive,
+            "preload_app": config.preload,
+            "post_fork": post_fork,
+            "worker_exit": worker_exit
+        }
+        for key, value in options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        if self.application is None:
+            self.application = _load_app()
+        return self.application
+
+if __name__ == '__main__':
+    if settings.server.workers > 1 and settings.progress_store.backend == "memory":
+        # Progress streams reaching a worker other than the job's would all 404
+        logger.error("SERVER_WORKERS > 1 needs PROGRESS_STORE=redis; set it or run a single worker")
+        sys.exit(1)
+    logger.info(f"Starting {settings.server.workers} worker(s) x {settings.server.threads} thread(s) "
+                f"on {settings.server.host}:{settings.server.port}")
+    AgentServer().run()
@@ -0,0 +1,353 @@
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Dict, List, Optional
+
+from psycopg2.extras import RealDictCursor
+
+from logging_config import LoggingConfig
+from utils import db_connection
+
+# Create logger
+logger = LoggingConfig('spotlight_engine').setup_logger()
+
+# Bits of GROUPING(partner_country, partner_region, partner_platform, event_type, cohort_date):
+# a set bit means the column is aggregated away in that row's grouping set
+_GROUPINGS = {
+    0b11111: "total",
+    0b01111: "country",
+    0b00111: "country_region",
+    0b11011: "platform",
+    0b11101: "event_type",
+    0b11110: "cohort",
+    0b11010: "cohort_platform"
+}
+
+TREND_PLATFORMS = ('DynamicWorks', 'MyAffiliate')
+
+# One pass over the filtered partner set. Each row carries flags for the windows the
+# sections look at (selected range, last 12 months, last 30/60 days), and every
+# section's measures are FILTERed aggregates over the grouping set it needs.
+# partner_id is the primary key, so COUNT(*) matches the old COUNT(DISTINCT partner_id).
+SPOTLIGHT_AGGREGATES_SQL = """
+WITH partners AS (
+    SELECT
+        partner_id,
+        partner_country,
+        partner_region,
+        partner_platform,
+        date_joined,
+        first_client_joined_date,
+        first_earning_date,
+        last_earning_date,
+        deriv_van_count > 0 AS is_van,
+        CASE
+            WHEN deriv_van_count > 0 THEN 'VAN Trip'
+            WHEN conference_count > 0 THEN 'Conference'
+            WHEN webinar_count > 0 THEN 'Webinar'
+            WHEN seminar_count > 0 THEN 'Seminar'
+            WHEN sponsorship_event_count > 0 THEN 'Sponsorship'
+            ELSE 'No Event'
+        END AS event_type,
+        COALESCE(turnover_earnings, 0) + COALESCE(revenue_share_earnings, 0) +
+            COALESCE(ib_earnings, 0) + COALESCE(cpa_deposit_earnings, 0) AS earnings,
+        {in_range} AS in_range,
+        CASE WHEN date_joined >= CURRENT_DATE - INTERVAL '12 months'
+             THEN DATE_TRUNC('month', date_joined) END AS cohort_date,
+        last_earning_date >= CURRENT_DATE - INTERVAL '30 days' AS active_30d,
+        date_joined >= CURRENT_DATE - INTERVAL '30 days' AS joined_30d,
+        date_joined >= CURRENT_DATE - INTERVAL '60 days'
+            AND date_joined < CURRENT_DATE - INTERVAL '30 days' AS joined_prev_30d
+    FROM partner.partner_info
+    WHERE is_internal = FALSE
+    {scan_filter}
+)
+SELECT
+    GROUPING(partner_country, partner_region, partner_platform, event_type, cohort_date) AS grouping_id,
+    partner_country,
+    partner_region,
+    partner_platform,
+    event_type,
+    cohort_date,
+    TO_CHAR(cohort_date, 'Mon YY') AS cohort_label,
+
+    -- Selected date range
+    COUNT(*) FILTER (WHERE in_range) AS partners,
+    COUNT(*) FILTER (WHERE in_range AND first_client_joined_date IS NOT NULL) AS with_signups,
+    COUNT(*) FILTER (WHERE in_range AND first_earning_date IS NOT NULL) AS activated,
+    COUNT(*) FILTER (WHERE in_range AND active_30d) AS active_30d,
+    COUNT(*) FILTER (WHERE in_range AND last_earning_date >= CURRENT_DATE - INTERVAL '90 days'
+                     AND last_earning_date < CURRENT_DATE - INTERVAL '30 days') AS at_risk,
+    COUNT(*) FILTER (WHERE in_range AND joined_30d) AS new_30d,
+    COUNT(*) FILTER (WHERE in_range AND active_30d
+                     AND first_earning_date < CURRENT_DATE - INTERVAL '30 days') AS reactivated_30d,
+    COUNT(*) FILTER (WHERE in_range AND is_van) AS van_partners,
+    COUNT(*) FILTER (WHERE in_range AND is_van AND first_earning_date IS NOT NULL) AS van_activated,
+    SUM(earnings) FILTER (WHERE in_range AND is_van) AS van_earnings,
+    SUM(earnings) FILTER (WHERE in_range) AS total_earnings,
+    AVG(earnings) FILTER (WHERE in_range) AS avg_earnings,
+    AVG(first_earning_date - date_joined) FILTER (WHERE in_range AND first_earning_date IS NOT NULL) AS avg_days_to_activate,
+
+    -- Activated partners by joining month (last 12 months)
+    COUNT(*) FILTER (WHERE first_earning_date IS NOT NULL) AS cohort_size,
+    COUNT(*) FILTER (WHERE first_earning_date IS NOT NULL AND active_30d) AS cohort_m0,
+    COUNT(*) FILTER (WHERE first_earning_date IS NOT NULL
+                     AND last_earning_date >= cohort_date + INTERVAL '1 month') AS cohort_m1,
+    COUNT(*) FILTER (WHERE first_earning_date IS NOT NULL
+                     AND last_earning_date >= cohort_date + INTERVAL '3 months') AS cohort_m3,
+    COUNT(*) FILTER (WHERE first_earning_date IS NOT NULL
+                     AND last_earning_date >= cohort_date + INTERVAL '6 months') AS cohort_m6,
+
+    -- Monthly trends (last 12 months, by joining month)
+    COUNT(*) AS trend_applications,
+    COUNT(*) FILTER (WHERE first_earning_date IS NOT NULL) AS trend_activations,
+
+    -- Signups in the last 30 days vs the 30 days before
+    COUNT(*) FILTER (WHERE joined_30d) AS current_signups,
+    COUNT(*) FILTER (WHERE joined_prev_30d) AS previous_signups
+FROM partners
+GROUP BY GROUPING SETS (
+    (),
+    (partner_country),
+    (partner_country, partner_region),
+    (partner_platform),
+    (event_type),
+    (cohort_date),
+    (cohort_date, partner_platform)
+)
+"""
+
+def _numeric(value: Any) -> Decimal:
+    """value::numeric; a float8 cast to numeric keeps 15 significant digits"""
+    return Decimal(format(value, '.15g')) if isinstance(value, float) else Decimal(value)
+
+def _round(value: Any, places: int) -> Optional[Decimal]:
+    """ROUND(value::numeric, places) as Postgres computes it"""
+    if value is None:
+        return None
+    return _numeric(value).quantize(Decimal(1).scaleb(-places), rounding=ROUND_HALF_UP)
+
+def _rate(part: Any, whole: Any, places: int = 2) -> Optional[Decimal]:
+    """ROUND(part::numeric / NULLIF(whole, 0) * 100, places)"""
+    if not whole:
+        return None
+    return _round(Decimal(part) / Decimal(whole) * 100, places)
+
+def _desc(value: Any):
+    """Sort key for ORDER BY value DESC, where NULLs sort first"""
+    return (value is not None, -value if value is not None else 0)
+
+def build_spotlight_query(date_range: int):
+    """SQL and parameters for the single aggregation pass over the given date range"""
+    if date_range > 0:
+        # The scan covers the selected range plus the fixed 12 month window of the cohort/trend sections
+        in_range = "date_joined >= CURRENT_DATE - %(days)s * INTERVAL '1 day'"
+        scan_filter = ("AND date_joined >= LEAST(CURRENT_DATE - %(days)s * INTERVAL '1 day', "
+                       "CURRENT_DATE - INTERVAL '12 months')")
+    else:
+        in_range, scan_filter = "TRUE", ""
+    return SPOTLIGHT_AGGREGATES_SQL.format(in_range=in_range, scan_filter=scan_filter), {"days": date_range}
+
+def fetch_spotlight_aggregates(date_range: int) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Run the aggregation pass in one read-only REPEATABLE READ transaction.
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: Aggregate rows keyed by grouping set name
+    """
+    sql, params = build_spotlight_query(date_range)
+    with db_connection() as conn:
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+                cursor.execute("SET LOCAL statement_timeout = '30s'")
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+        finally:
+            conn.rollback()
+
+    groups = {name: [] for name in _GROUPINGS.values()}
+    for row in rows:
+        name = _GROUPINGS.get(row['grouping_id'])
+        if name is not None:
+            groups[name].append(row)
+    return groups
+
+def derive_spotlight_sections(groups: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Build every spotlight section from the grouped aggregates, in the shape the per-section queries returned"""
+    total = groups["total"][0] if groups["total"] else {}
+    countries = [row for row in groups["country"] if row['partner_country'] is not None]
+    in_range_countries = [row for row in countries if row['partners'] > 0]
+
+    overview_metrics = {
+        'total_applications': total.get('partners', 0),
+        'activated_partners': total.get('activated', 0),
+        'overall_activation_rate': _rate(total.get('activated', 0), total.get('partners', 0))
+    }
+
+    van_trip_effectiveness = [
+        {
+            'country': row['partner_country'],
+            'total_applications': row['partners'],
+            'van_trip_partners': row['van_partners'],
+            'activated_partners': row['activated'],
+            'van_activated': row['van_activated'],
+            'van_activation_rate': _rate(row['van_activated'], row['van_partners']) if row['van_partners'] else _round(0, 2),
+            'van_earnings': row['van_earnings'] or 0.0
+        }
+        for row in in_range_countries if row['partners'] >= 10
+    ]
+    van_trip_effectiveness.sort(key=lambda row: _desc(row['van_earnings']))
+
+    van_roi_data = {
+        'total_van_earnings': total.get('van_earnings'),
+        'total_van_partners': total.get('van_partners', 0)
+    }
+
+    event_impact = [
+        {
+            'event_type': row['event_type'],
+            'partner_count': row['partners'],
+            'activated_count': row['activated'],
+            'activation_rate': _rate(row['activated'], row['partners'])
+        }
+        for row in groups["event_type"] if row['partners'] > 0
+    ]
+    event_impact.sort(key=lambda row: _desc(row['activation_rate']))
+
+    conversion_funnel = [
+        {
+            'country': row['partner_country'],
+            'applications': row['partners'],
+            'with_signups': row['with_signups'],
+            'activated': row['activated'],
+            'signup_rate': _rate(row['with_signups'], row['partners']),
+            'activation_rate': _rate(row['activated'], row['partners']),
+            'avg_days_to_activate': _round(row['avg_days_to_activate'], 1)
+        }
+        for row in in_range_countries if row['partners'] >= 5
+    ]
+    conversion_funnel.sort(key=lambda row: _desc(row['activation_rate']))
+
+    platform_comparison = [
+        {
+            'partner_platform': row['partner_platform'],
+            'total_partners': row['partners'],
+            'active_partners': row['activated'],
+            'currently_active': row['active_30d'],
+            'at_risk': row['at_risk'],
+            'retention_rate': _rate(row['active_30d'], row['activated']),
+            'avg_lifetime_value': _round(row['avg_earnings'], 2)
+        }
+        for row in groups["platform"] if row['partners'] > 0
+    ]
+    # ORDER BY partner_platform: NULLs last
+    platform_comparison.sort(key=lambda row: (row['partner_platform'] is None, row['partner_platform'] or ''))
+
+    network_retention = {
+        'active_30d': total.get('active_30d', 0),
+        'total_activated': total.get('activated', 0),
+        'network_retention_rate': _rate(total.get('active_30d', 0), total.get('activated', 0))
+    }
+
+    cohorts = sorted(
+        (row for row in groups["cohort"] if row['cohort_date'] is not None and row['cohort_size'] > 0),
+        key=lambda row: row['cohort_date'], reverse=True
+    )
+    retention_cohorts = [
+        {
+            'cohort_month': row['cohort_label'],
+            'cohort_size': row['cohort_size'],
+            'current_retention': _rate(row['cohort_m0'], row['cohort_size']),
+            'm1_retention': _rate(row['cohort_m1'], row['cohort_size']),
+            'm3_retention': _rate(row['cohort_m3'], row['cohort_size']),
+            'm6_retention': _rate(row['cohort_m6'], row['cohort_size'])
+        }
+        for row in cohorts[:12]
+    ]
+
+    country_roi = []
+    for row in groups["country_region"]:
+        if row['partner_country'] is None or row['partners'] < 5:
+            continue
+        total_earnings = _round(row['total_earnings'], 2)
+        country_roi.append({
+            'country': row['partner_country'],
+            'region': row['partner_region'],
+            'total_partners': row['partners'],
+            'active_partners': row['activated'],
+            'currently_active': row['active_30d'],
+            'total_earnings': total_earnings,
+            'earnings_per_partner': _round(_numeric(row['total_earnings']) / row['activated'], 2) if row['activated'] else None,
+            'new_partners_30d': row['new_30d'],
+            'reactivated_30d': row['reactivated_30d'],
+            'retention_rate': _rate(row['active_30d'], row['activated'])
+        })
+    country_roi.sort(key=lambda row: _desc(row['total_earnings']))
+
+    underperforming_countries = []
+    for row in in_range_countries:
+        if row['partners'] < 50 or row['activated'] == 0:
+            continue
+        activation_rate = _rate(row['activated'], row['partners'])
+        retention_rate = _rate(row['active_30d'], row['activated'])
+        if activation_rate < 8 or (retention_rate is not None and retention_rate < 50):
+            underperforming_countries.append({
+                'country': row['partner_country'],
+                'total_applications': row['partners'],
+                'activated_partners': row['activated'],
+                'active_partners': row['active_30d'],
+                'activation_rate': activation_rate,
+                'retention_rate': retention_rate
+            })
+    underperforming_countries.sort(key=lambda row: (-row['total_applications'], row['activation_rate']))
+
+    monthly_trends = [
+        {
+            'month': row['cohort_label'],
+            'platform': row['partner_platform'],
+            'applications': row['trend_applications'],
+            'activations': row['trend_activations']
+        }
+        for row in sorted(
+            (row for row in groups["cohort_platform"]
+             if row['cohort_date'] is not None and row['partner_platform'] in TREND_PLATFORMS),
+            key=lambda row: (row['cohort_date'], row['partner_platform'])
+        )
+    ]
+
+    top_growing_countries = [
+        {
+            'country': row['partner_country'],
+            'current_signups': row['current_signups'],
+            'previous_signups': row['previous_signups'],
+            'growth_rate': _round(100, 2) if row['previous_signups'] == 0
+                else _rate(row['current_signups'] - row['previous_signups'], row['previous_signups'])
+        }
+        for row in countries if row['current_signups'] >= 5
+    ]
+    top_growing_countries.sort(key=lambda row: _desc(row['growth_rate']))
+
+    return {
+        'overview_metrics': overview_metrics,
+        'van_trip_effectiveness': van_trip_effectiveness[:15],
+        'van_roi_data': van_roi_data,
+        'event_impact': event_impact,
+        'conversion_funnel': conversion_funnel[:20],
+        'platform_comparison': platform_comparison,
+        'network_retention': network_retention,
+        'retention_cohorts': retention_cohorts,
+        'country_roi': country_roi[:20],
+        'underperforming_countries': underperforming_countries[:12],
+        'monthly_trends': monthly_trends,
+        'top_growing_countries': top_growing_countries[:10]
+    }
+
+def compute_spotlight_sections(date_range: int = 90) -> Dict[str, Any]:
+    """
+    All spotlight dashboard sections from a single scan of partner.partner_info.
+
+    Args:
+        date_range: Number of days to look back for data (0 for all time)
+    """
+    sections = derive_spotlight_sections(fetch_spotlight_aggregates(date_range))
+    logger.info(f"Computed spotlight sections for date_range={date_range} in one aggregation pass")
+    return sections
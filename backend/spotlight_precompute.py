@@ -0,0 +1,267 @@
+import datetime
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, fine for a single dev server
+    fcntl = None
+
+from config import settings
+from logging_config import LoggingConfig
+from spotlight_dashboard import get_funnel_metrics, get_spotlight_dashboard_data
+
+# Create logger
+logger = LoggingConfig('spotlight_precompute').setup_logger()
+
+def _json_default(value: Any) -> Any:
+    # Same encoding Flask's JSON provider uses for live responses
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return str(value)
+
+class SnapshotStore:
+    """
+    Versioned JSON snapshots on disk, one directory per key.
+
+    Each write adds <key>/<version>.json and then atomically repoints <key>/LATEST
+    at it, so readers in any worker process always see a complete snapshot. Only
+    the newest keep_versions versions are kept.
+    """
+
+    def __init__(self, directory: str, keep_versions: int = 3):
+        self.directory = directory
+        self.keep_versions = max(1, keep_versions)
+        self._lock = threading.Lock()
+        # key -> (version, record); avoids re-parsing an unchanged snapshot
+        self._loaded: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str, name: str) -> str:
+        return os.path.join(self.directory, key, name)
+
+    def write(self, key: str, data: Any, as_of: datetime.datetime) -> str:
+        """Store a new version of key and make it the latest; returns the version"""
+        version = as_of.strftime('%Y%m%dT%H%M%S%fZ')
+        os.makedirs(os.path.join(self.directory, key), exist_ok=True)
+        record = {"key": key, "version": version, "as_of": as_of.isoformat(), "data": data}
+
+        path = self._path(key, f"{version}.json")
+        with open(path + ".tmp", 'w') as f:
+            json.dump(record, f, default=_json_default)
+        os.replace(path + ".tmp", path)
+
+        latest = self._path(key, "LATEST")
+        with open(latest + ".tmp", 'w') as f:
+            f.write(version)
+        os.replace(latest + ".tmp", latest)
+
+        self._prune(key)
+        return version
+
+    def _prune(self, key: str) -> None:
+        versions = sorted(name for name in os.listdir(os.path.join(self.directory, key)) if name.endswith('.json'))
+        for name in versions[:-self.keep_versions]:
+            try:
+                os.remove(self._path(key, name))
+            except OSError:
+                pass
+
+    def read(self, key: str) -> Optional[Dict[str, Any]]:
+        """Latest record ({"version", "as_of", "data", ...}) for key, or None"""
+        try:
+            with open(self._path(key, "LATEST")) as f:
+                version = f.read().strip()
+        except OSError:
+            return None
+
+        with self._lock:
+            loaded = self._loaded.get(key)
+            if loaded is not None and loaded[0] == version:
+                return loaded[1]
+        try:
+            with open(self._path(key, f"{version}.json")) as f:
+                record = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable spotlight snapshot {key}/{version}: {str(e)}")
+            return None
+        with self._lock:
+            self._loaded[key] = (version, record)
+        return record
+
+def dashboard_key(date_range: int) -> str:
+    return f"dashboard-{date_range}"
+
+def funnel_key(date_range: int, country: Optional[str] = None) -> str:
+    if not country:
+        return f"funnel-{date_range}"
+    # Country names may hold any character; the digest keeps distinct names apart
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', country).strip('_')[:40]
+    return f"funnel-{date_range}-{slug}-{hashlib.sha1(country.encode('utf-8')).hexdigest()[:8]}"
+
+class SpotlightPrecomputer:
+    """
+    Recomputes the spotlight dashboard and funnel metrics for the canonical date
+    ranges on a fixed cadence and serves them from snapshots.
+
+    Every worker process runs the scheduler thread, but a cycle only runs in the
+    process holding the snapshot directory's file lock; the others serve what it wrote.
+    """
+
+    def __init__(self, store: SnapshotStore, ranges: List[int], interval: float, top_countries: int, max_age: float, enabled: bool = True):
+        self.store = store
+        self.enabled = enabled
+        self.ranges = ranges
+        self.interval = interval
+        self.top_countries = top_countries
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"runs": 0, "skipped_runs": 0, "failed_snapshots": 0, "served_snapshot": 0, "served_live": 0,
+                       "last_run_at": None, "last_run_seconds": None}
+
+    def start(self) -> None:
+        """Start the scheduler thread if it isn't running yet"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop, name="spotlight-precompute", daemon=True)
+            self._thread.start()
+        logger.info(f"Started spotlight precompute every {self.interval:.0f}s for ranges {self.ranges}")
+
+    def _loop(self) -> None:
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Spotlight precompute cycle failed: {str(e)}")
+            time.sleep(self.interval)
+
+    def _due(self) -> bool:
+        """False if every canonical dashboard snapshot is younger than the interval"""
+        for date_range in self.ranges:
+            record = self.store.read(dashboard_key(date_range))
+            if record is None or self._age(record) >= self.interval * 0.9:
+                return True
+        return False
+
+    def run_once(self) -> bool:
+        """Run one precompute cycle unless another process holds the lock or snapshots are fresh"""
+        with open(os.path.join(self.store.directory, ".lock"), 'w') as lock_file:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    with self._lock:
+                        self._stats["skipped_runs"] += 1
+                    return False
+            # Another worker may have just finished a cycle
+            if not self._due():
+                with self._lock:
+                    self._stats["skipped_runs"] += 1
+                return False
+            started = time.perf_counter()
+            self._compute_all()
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats["runs"] += 1
+            self._stats["last_run_at"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+            self._stats["last_run_seconds"] = round(elapsed, 1)
+        logger.info(f"Precomputed spotlight snapshots in {elapsed:.1f}s")
+        return True
+
+    def _store(self, key: str, data: Dict[str, Any]) -> bool:
+        # The spotlight functions return an empty fallback with "error" when their queries fail
+        if data.get('error'):
+            logger.warning(f"Not storing spotlight snapshot {key}: {data['error']}")
+            with self._lock:
+                self._stats["failed_snapshots"] += 1
+            return False
+        self.store.write(key, data, datetime.datetime.now(datetime.timezone.utc))
+        return True
+
+    def _compute_all(self) -> None:
+        for date_range in self.ranges:
+            self._store(dashboard_key(date_range), get_spotlight_dashboard_data(date_range))
+
+            funnel = get_funnel_metrics(date_range=date_range)
+            if not self._store(funnel_key(date_range), funnel):
+                continue
+            largest = sorted(funnel.get('country_performance') or [],
+                             key=lambda row: row.get('total_applications') or 0, reverse=True)
+            for row in largest[:self.top_countries]:
+                country = row.get('partner_country')
+                if country:
+                    self._store(funnel_key(date_range, country), get_funnel_metrics(date_range=date_range, country=country))
+
+    def _age(self, record: Dict[str, Any]) -> float:
+        as_of = datetime.datetime.fromisoformat(record["as_of"])
+        return (datetime.datetime.now(datetime.timezone.utc) - as_of).total_seconds()
+
+    def snapshot(self, key: str) -> Optional[Dict[str, Any]]:
+        """The latest snapshot for key if it is recent enough to serve"""
+        record = self.store.read(key)
+        if record is None or self._age(record) > self.max_age:
+            return None
+        return record
+
+    def serve(self, date_range: int, key: str, compute) -> Tuple[Any, str, str]:
+        """
+        Snapshot data for canonical ranges, live data otherwise.
+
+        Also starts the scheduler in this process on first use, so workers that
+        never call start() explicitly still take part.
+
+        Returns:
+            Tuple[Any, str, str]: (data, as_of ISO timestamp, "snapshot" or "live")
+        """
+        record = None
+        if self.enabled:
+            self.start()
+            if date_range in self.ranges:
+                record = self.snapshot(key)
+        with self._lock:
+            self._stats["served_snapshot" if record is not None else "served_live"] += 1
+        if record is not None:
+            return record["data"], record["as_of"], "snapshot"
+        as_of = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        return compute(), as_of, "live"
+
+    def stats(self) -> Dict[str, Any]:
+        """Scheduler state for /metrics"""
+        with self._lock:
+            return {**self._stats, "running": self._thread is not None, "interval": self.interval, "ranges": self.ranges}
+
+_precomputer = None
+_precomputer_lock = threading.Lock()
+
+def get_spotlight_precomputer() -> SpotlightPrecomputer:
+    """Get the process-wide spotlight precomputer"""
+    global _precomputer
+    if _precomputer is None:
+        with _precomputer_lock:
+            if _precomputer is None:
+                config = settings.spotlight_precompute
+                _precomputer = SpotlightPrecomputer(
+                    SnapshotStore(config.snapshot_dir, config.keep_versions),
+                    config.ranges,
+                    config.interval,
+                    config.top_countries,
+                    config.max_age,
+                    config.enabled
+                )
+    return _precomputer
+
+def start_spotlight_precompute() -> None:
+    """Start the background precompute scheduler, unless disabled"""
+    precomputer = get_spotlight_precomputer()
+    if precomputer.enabled:
+        precomputer.start()
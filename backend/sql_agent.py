@@ -1,21 +1,30 @@
-from utils import get_openai_client, get_supabase_client
-import json, datetime, os
-import sqlglot
-from sqlglot.errors import ParseError
-
+from utils import get_openai_client, get_supabase_client, get_async_supabase_client
+import asyncio, json, datetime, os, itertools
+from concurrent.futures import ThreadPoolExecutor
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 from langgraph.checkpoint.memory import MemorySaver
 from tabulate import tabulate
-from typing import TypedDict, Annotated, Sequence, Optional, Callable
+from typing import TypedDict, Annotated, Sequence, Optional, Callable, Dict, Any, List
 
 from supabase import create_client, Client
 from logging_config import LoggingConfig
-from schema_manager import read_schema_metadata, schema_dict_to_chunks
-from vector_store import retrieve_context, initialize_vector_store
-from progress_manager import ProgressManager, SQLProgressStages, ProgressCallback
+from schema_manager import read_schema_metadata, schema_metadata_hash
+from schema_context import build_schema_context
+from config import settings
+from sql_validation import validate_sql_locally, parse_explain_cost, parse_explain_rows
+from sql_rules import enforce_internal_filter, apply_row_limit
+from sql_executor import build_result_table, execute_readonly
+from sql_cache import get_sql_cache
+from semantic_cache import get_semantic_cache
+from vector_store import retrieve_context, start_vector_store
+from progress_manager import (
+    SQLProgressStages, ProgressCallback, TokenCallback, build_run_config, progress_from_config,
+    token_callback_from_config, stream_llm, astream_llm
+)
 
 # Create logger
 logger = LoggingConfig('sql_agent').setup_logger()
@@ -24,18 +33,27 @@ logger = LoggingConfig('sql_agent').setup_logger()
 supabase_client: Client = get_supabase_client()
 llm = get_openai_client()
 
-# Initialize vector store
+# Prepare the schema vector store; stale indexes are rebuilt in the background
 try:
-    vectorstore = initialize_vector_store(supabase_client)
-    logger.info("Vector store initialized successfully")
+    start_vector_store(supabase_client)
 except Exception as e:
-    logger.warning(f"Failed to initialize vector store: {str(e)}")
+    logger.warning(f"Failed to start vector store: {str(e)}")
     logger.warning("SQL Agent will work without vector store features")
-    vectorstore = None
+
+def _latest_progress(current: Optional[int], update: Optional[int]) -> Optional[int]:
+    """Reducer for progress: concurrent nodes may both write it, keep the furthest value."""
+    if current is None:
+        return update
+    if update is None:
+        return current
+    return max(current, update)
 
 # Define the state type
 class AgentState(TypedDict):
     prompt: str
+    original_prompt: str  # The user's question; prompt may be rewritten by correct_sql
+    cache_hit: bool
+    cached_prompt: str  # Prompt the cached SQL was stored under (differs from original_prompt on semantic hits)
     sql_query: str
     verification_result: str
     matches_intent: bool
@@ -45,7 +63,13 @@ class AgentState(TypedDict):
     error: str
     attempt: int
     table_info: str
-    progress: Optional[int]  # New field for progress tracking
+    syntax_validation_passed: bool
+    explain_output: str
+    candidate_selected: bool  # Set when speculative generation already validated the query
+    guard_action: str  # EXPLAIN guardrail decision: execute, rewrite or refuse
+    row_limit_applied: int  # LIMIT injected by the guardrail, 0 if none
+    result_table: Dict[str, Any]  # Columnar query result: columns, dtypes, data, row_count
+    progress: Annotated[Optional[int], _latest_progress]  # Parallel checks may both report progress
 
 def get_table_info(prompt: str) -> str:
     """Get relevant table information for the prompt."""
@@ -70,19 +94,20 @@ def clean_sql_query(sql_text: str) -> str:
     
     return sql_text
 
-def generate_sql_node(state: AgentState, progress_callback: Optional[ProgressCallback] = None, progress_manager: Optional[ProgressManager] = None, llm: ChatOpenAI = llm) -> AgentState:
-    """Generate SQL query from natural language input."""
-    if progress_manager:
-        progress_manager.update_progress("Generating SQL query...", SQLProgressStages.GENERATE_SQL, progress_callback)
-    
-    logger.info("\n=== Generating SQL Query ===")
-    logger.info(f"Input prompt: {state['prompt']}")
+def apply_business_rules(sql_query: str) -> str:
+    """Apply mandatory filters (internal partner/client exclusion) to generated SQL."""
+    try:
+        return enforce_internal_filter(sql_query, read_schema_metadata(supabase_client))
+    except Exception as e:
+        logger.warning(f"Could not apply business rules: {str(e)}")
+        return sql_query
 
-    schema_chunks = schema_dict_to_chunks(read_schema_metadata(supabase_client))
-    
-    system_prompt = f"""You are an expert PostgreSQL query generator that creates accurate SQL queries based on natural language questions and database metadata. You will analyze user questions and generate appropriate PostgreSQL queries using the provided database schema information.
+def build_generation_prompt(schema_context: str) -> str:
+    """System prompt for SQL generation over the given schema context."""
+    return f"""You are an expert PostgreSQL query generator that creates accurate SQL queries based on natural language questions and database metadata. You will analyze user questions and generate appropriate PostgreSQL queries using the provided database schema information.
 
-Here is the comprehensive database metadata from Supabase: {schema_chunks}
+Here is the relevant database metadata from Supabase:
+{schema_context}
 
 Your task is to:
 
@@ -130,28 +155,171 @@ CRITICAL TIME-BASED QUERY RULES:
 - Partner activation means having first_earning_date, first_client_joined_date, or similar activation indicators
 
 Strictly return ONLY the SQL query, DO NOT include any other text, markdown or other formatting. The query should be complete and executable."""
+
+def candidate_temperatures(count: int) -> List[float]:
+    """Temperatures for speculative candidates: the deterministic answer plus increasingly varied ones."""
+    if count <= 1:
+        return [0.0]
+    max_temperature = settings.sql_agent.candidate_max_temperature
+    return [round(max_temperature * i / (count - 1), 2) for i in range(count)]
+
+def _generate_candidate(prompt: str, system_prompt: str, temperature: float) -> str:
+    response = get_openai_client(temperature=temperature).invoke([
+        SystemMessage(content=system_prompt),
+        HumanMessage(content=prompt)
+    ])
+    return apply_business_rules(clean_sql_query(response.content))
+
+def _evaluate_candidate(prompt: str, sql_query: str, schema_dict: Dict, executor: ThreadPoolExecutor) -> Dict[str, Any]:
+    """Local validation, then EXPLAIN and intent verification concurrently."""
+    errors = validate_sql_locally(sql_query, schema_dict)
+    if errors:
+        return {"sql_query": sql_query, "syntax_validation_passed": False, "error_message": "\n".join(errors), "matches_intent": False}
+
+    explain_future = executor.submit(explain_sql, sql_query)
+    intent_future = executor.submit(check_intent, prompt, sql_query)
+    result = {"sql_query": sql_query, **explain_future.result()}
+    try:
+        result.update(intent_future.result())
+    except Exception as e:
+        logger.warning(f"Intent check failed for candidate: {str(e)}")
+        result["matches_intent"] = False
+    result["cost"] = parse_explain_cost(result.get("explain_output"))
+    return result
+
+def generate_candidates(prompt: str, system_prompt: str, count: int) -> Dict[str, Any]:
+    """
+    Generate several SQL candidates in parallel and keep the best one.
+
+    Each candidate is validated locally, then EXPLAINed and intent-checked concurrently.
+    Among candidates that pass both checks, the one with the lowest estimated plan cost
+    wins. If none pass, the candidate that got furthest is returned for the normal
+    correction loop. Candidates whose LLM call fails (timeout, rate limit) are dropped.
+
+    Returns:
+        Dict[str, Any]: State update for the chosen candidate, with candidate_selected set
+
+    Raises:
+        Exception: The last generation error, if every candidate failed
+    """
+    temperatures = candidate_temperatures(count)
+    schema_dict = read_schema_metadata(supabase_client)
+
+    # Two check slots per candidate (EXPLAIN + intent) plus the candidate tasks themselves
+    with ThreadPoolExecutor(max_workers=len(temperatures) * 3, thread_name_prefix="sql-candidate") as executor:
+        generated, last_error = [], None
+        for temperature, future in [(t, executor.submit(_generate_candidate, prompt, system_prompt, t)) for t in temperatures]:
+            try:
+                generated.append(future.result())
+            except Exception as e:
+                logger.warning(f"Candidate at temperature {temperature} failed: {str(e)}")
+                last_error = e
+        if not generated:
+            raise last_error
+
+        candidates = list(dict.fromkeys(sql for sql in generated if sql))
+        evaluated = []
+        for sql, future in [(sql, executor.submit(_evaluate_candidate, prompt, sql, schema_dict, executor)) for sql in candidates]:
+            try:
+                evaluated.append(future.result())
+            except Exception as e:
+                # Still usable as a last resort for the correction loop
+                logger.warning(f"Could not evaluate candidate: {str(e)}")
+                evaluated.append({"sql_query": sql})
+
+    for index, candidate in enumerate(evaluated):
+        logger.info(
+            f"Candidate {index + 1}: syntax={candidate.get('syntax_validation_passed')}, "
+            f"intent={candidate.get('matches_intent')}, cost={candidate.get('cost')}"
+        )
+
+    valid = [c for c in evaluated if c.get("syntax_validation_passed") and c.get("matches_intent")]
+    if valid:
+        best = min(valid, key=lambda c: c["cost"] if c["cost"] is not None else float("inf"))
+        logger.info(f"Selected candidate with estimated cost {best['cost']}")
+        return {
+            "sql_query": best["sql_query"],
+            "syntax_validation_passed": True,
+            "matches_intent": True,
+            "explain_output": best.get("explain_output", ""),
+            "improved_prompt": best.get("improved_prompt", prompt),
+            "candidate_selected": True
+        }
+
+    # Prefer a candidate that at least runs, then one that parsed locally
+    fallback = next((c for c in evaluated if c.get("syntax_validation_passed")), None) or \
+        next((c for c in evaluated if "explain_output" in c or "improved_prompt" in c), None) or \
+        (evaluated[0] if evaluated else {"sql_query": generated[0] if generated else ""})
+    logger.info("No candidate passed all checks, continuing with the correction loop")
+    return {"sql_query": fallback["sql_query"], "candidate_selected": False}
+
+def generate_sql_node(state: AgentState, config: Optional[RunnableConfig] = None, llm: ChatOpenAI = llm) -> AgentState:
+    """Generate SQL query from natural language input."""
+    progress_callback, progress_manager = progress_from_config(config)
+    if progress_manager:
+        progress_manager.update_progress("Generating SQL query...", SQLProgressStages.GENERATE_SQL, progress_callback)
     
-    response = llm.invoke([
+    logger.info("\n=== Generating SQL Query ===")
+    logger.info(f"Input prompt: {state['prompt']}")
+
+    # Only the tables relevant to the question (plus their join partners) go into the prompt
+    schema_context = build_schema_context(state["prompt"], read_schema_metadata(supabase_client))
+    
+    system_prompt = build_generation_prompt(schema_context)
+
+    if settings.sql_agent.candidates > 1:
+        if progress_callback:
+            progress_callback(f"Generating and checking {settings.sql_agent.candidates} candidate queries...", SQLProgressStages.GENERATE_SQL)
+        result = generate_candidates(state["prompt"], system_prompt, settings.sql_agent.candidates)
+        logger.info(f"Selected SQL:\n{result['sql_query']}")
+        return {**result, "table_info": schema_context, "progress": SQLProgressStages.GENERATE_SQL}
+    
+    # Tokens are streamed to the client as they arrive when a token callback is set
+    content = stream_llm(llm, [
         SystemMessage(content=system_prompt),
         HumanMessage(content=state["prompt"])
-    ])
+    ], token_callback_from_config(config), stream="sql")
     
     # Clean the SQL query to remove any markdown formatting
-    cleaned_sql = clean_sql_query(response.content)
+    cleaned_sql = apply_business_rules(clean_sql_query(content))
     
     logger.info(f"Generated SQL (cleaned):\n{cleaned_sql}")
-    return {"sql_query": cleaned_sql, "progress": SQLProgressStages.GENERATE_SQL}
+    return {"sql_query": cleaned_sql, "table_info": schema_context, "candidate_selected": False, "progress": SQLProgressStages.GENERATE_SQL}
 
-def verify_intent_node(state: AgentState, progress_callback: Optional[ProgressCallback] = None, progress_manager: Optional[ProgressManager] = None, llm: ChatOpenAI = llm) -> AgentState:
-    """Verify if the SQL query matches the original intent."""
+async def agenerate_sql_node(state: AgentState, config: Optional[RunnableConfig] = None, llm: ChatOpenAI = llm) -> AgentState:
+    """Async generate_sql_node: the LLM call runs on the event loop, schema retrieval in an offload thread."""
+    progress_callback, progress_manager = progress_from_config(config)
     if progress_manager:
-        progress_manager.update_progress("Verifying query intent...", SQLProgressStages.VERIFY_INTENT, progress_callback)
-    
-    logger.info("\n=== Verifying SQL Intent ===")
-    logger.info(f"SQL to verify:\n{state['sql_query']}")
-    
+        progress_manager.update_progress("Generating SQL query...", SQLProgressStages.GENERATE_SQL, progress_callback)
+
+    logger.info("\n=== Generating SQL Query ===")
+    logger.info(f"Input prompt: {state['prompt']}")
+
+    # Metadata refresh and the prompt embedding go through sync clients
+    schema_context = await asyncio.to_thread(lambda: build_schema_context(state["prompt"], read_schema_metadata(supabase_client)))
+    system_prompt = build_generation_prompt(schema_context)
+
+    if settings.sql_agent.candidates > 1:
+        if progress_callback:
+            progress_callback(f"Generating and checking {settings.sql_agent.candidates} candidate queries...", SQLProgressStages.GENERATE_SQL)
+        result = await asyncio.to_thread(generate_candidates, state["prompt"], system_prompt, settings.sql_agent.candidates)
+        logger.info(f"Selected SQL:\n{result['sql_query']}")
+        return {**result, "table_info": schema_context, "progress": SQLProgressStages.GENERATE_SQL}
+
+    content = await astream_llm(llm, [
+        SystemMessage(content=system_prompt),
+        HumanMessage(content=state["prompt"])
+    ], token_callback_from_config(config), stream="sql")
+
+    # The internal filter reads schema metadata, which may refresh from Supabase
+    cleaned_sql = await asyncio.to_thread(apply_business_rules, clean_sql_query(content))
+
+    logger.info(f"Generated SQL (cleaned):\n{cleaned_sql}")
+    return {"sql_query": cleaned_sql, "table_info": schema_context, "candidate_selected": False, "progress": SQLProgressStages.GENERATE_SQL}
+
+def _intent_messages(prompt: str, sql_query: str) -> List[Any]:
     system_prompt = f"""You are a PostgreSQL query validator. Your task is to verify that a generated SQL query correctly matches the business intent expressed in the original natural language prompt.
-    Here is the original natural language prompt that describes the business intent: {state["prompt"]}
+    Here is the original natural language prompt that describes the business intent: {prompt}
     Your validation process should follow these steps:
 
     Translate SQL to Natural Language: 
@@ -160,6 +328,8 @@ def verify_intent_node(state: AgentState, progress_callback: Optional[ProgressCa
 
     Focus entirely on verifying whether the logic, filters, and selected columns used in the SQL query align EXACTLY with the business intent.
 
+    Note: "is_internal = FALSE" filters are a mandatory business rule applied automatically to every table that has that column. They are always expected and are never a reason to mark the query invalid.
+
     If the query is valid, return "valid". If it is invalid, return "invalid" and provide a brief explanation of why it is invalid along with improved prompt to generate the correct query.
 
     Output Format:
@@ -169,85 +339,153 @@ def verify_intent_node(state: AgentState, progress_callback: Optional[ProgressCa
     "explanation": "brief explanation of why the query is valid/invalid",
     "improved_prompt": "improved prompt to generate the correct query"""
     
-    user_prompt = f"""Translate the following SQL query into natural language: {state["sql_query"]}"""
+    user_prompt = f"""Translate the following SQL query into natural language: {sql_query}"""
 
-    response = llm.invoke([
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=user_prompt)
-    ])
-    
-    parsed = json.loads(response.content)
+    return [SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)]
+
+def _parse_intent(content: str, prompt: str) -> Dict[str, Any]:
+    parsed = json.loads(content)
     # Check for intent match AND make sure no syntax issues are mentioned
 
     matches_intent = parsed.get("is_valid", False)
-    improved_prompt = parsed.get("improved_prompt", state["prompt"])
+    # The model answers with "true"/"false" strings as often as with booleans
+    if isinstance(matches_intent, str):
+        matches_intent = matches_intent.strip().lower() == "true"
+    improved_prompt = parsed.get("improved_prompt", prompt)
     
-    logger.info(f"Intent match from response: {matches_intent}")
+    return {"matches_intent": matches_intent, "improved_prompt": improved_prompt}
 
-    logger.info(f"Final intent match: {matches_intent}")
-    
-    return {
-        "matches_intent": matches_intent,
-        "improved_prompt": improved_prompt,
-        "progress": SQLProgressStages.VERIFY_INTENT
-    }
+def check_intent(prompt: str, sql_query: str, llm: ChatOpenAI = llm) -> Dict[str, Any]:
+    """Ask the LLM whether the SQL answers the prompt; returns matches_intent and improved_prompt."""
+    response = llm.invoke(_intent_messages(prompt, sql_query))
+    return _parse_intent(response.content, prompt)
 
-def validate_sql_node(state: AgentState, progress_callback: Optional[ProgressCallback] = None, progress_manager: Optional[ProgressManager] = None, llm: ChatOpenAI = llm) -> AgentState:
-    """Validate the SQL query."""
+async def acheck_intent(prompt: str, sql_query: str, llm: ChatOpenAI = llm) -> Dict[str, Any]:
+    """Async check_intent."""
+    response = await llm.ainvoke(_intent_messages(prompt, sql_query))
+    return _parse_intent(response.content, prompt)
+
+def verify_intent_node(state: AgentState, config: Optional[RunnableConfig] = None, llm: ChatOpenAI = llm) -> AgentState:
+    """Verify if the SQL query matches the original intent."""
+    progress_callback, progress_manager = progress_from_config(config)
     if progress_manager:
-        progress_manager.update_progress("Validating SQL syntax...", SQLProgressStages.VALIDATE_SQL, progress_callback)
+        progress_manager.update_progress("Verifying query intent...", SQLProgressStages.VERIFY_INTENT, progress_callback)
     
-    logger.info("\n=== Validating SQL Query ===")
-    logger.info(f"SQL to validate:\n{state['sql_query']}")
+    logger.info("\n=== Verifying SQL Intent ===")
+    logger.info(f"SQL to verify:\n{state['sql_query']}")
+    
+    result = check_intent(state["prompt"], state["sql_query"], llm)
+    logger.info(f"Final intent match: {result['matches_intent']}")
 
-    try:
-        explain = supabase_client.rpc("run_raw_sql", {"raw_sql": state["sql_query"]}).execute()
-        result_data = getattr(explain, "data", None)
-
-        if result_data:
-            logger.info("Validation response received:")
-            logger.info(result_data)
-
-            # Detect if result_data contains an error string
-            if result_data.find("cost") == -1:
-                if progress_callback:
-                    progress_callback("SQL validation failed, correcting syntax...", SQLProgressStages.VALIDATE_SQL)
-                return {
-                    "syntax_validation_passed": False,
-                    "error_message": result_data,
-                    "progress": SQLProgressStages.VALIDATE_SQL
-                }
-
-            # Otherwise, assume it's valid EXPLAIN output
-            if progress_callback:
-                progress_callback("SQL validation passed", SQLProgressStages.VALIDATE_SQL)
-                #validate_values = supabase_client.rpc("validate_query_categorical_values", {"query_text": state["sql_query"]}).execute()
-            return {
-                "syntax_validation_passed": True,
-                "explain_output": result_data,
-                "progress": SQLProgressStages.VALIDATE_SQL
-            }
+    return {**result, "progress": SQLProgressStages.VERIFY_INTENT}
 
-        else:
-            logger.warning("Validation returned empty data.")
-            if progress_callback:
-                progress_callback("SQL validation failed - no output", SQLProgressStages.VALIDATE_SQL)
-            return {
-                "syntax_validation_passed": False,
-                "error_message": "No output returned from Supabase RPC.",
-                "progress": SQLProgressStages.VALIDATE_SQL
-            }
+async def averify_intent_node(state: AgentState, config: Optional[RunnableConfig] = None, llm: ChatOpenAI = llm) -> AgentState:
+    """Async verify_intent_node."""
+    progress_callback, progress_manager = progress_from_config(config)
+    if progress_manager:
+        progress_manager.update_progress("Verifying query intent...", SQLProgressStages.VERIFY_INTENT, progress_callback)
+
+    logger.info("\n=== Verifying SQL Intent ===")
+    logger.info(f"SQL to verify:\n{state['sql_query']}")
+
+    result = await acheck_intent(state["prompt"], state["sql_query"], llm)
+    logger.info(f"Final intent match: {result['matches_intent']}")
 
+    return {**result, "progress": SQLProgressStages.VERIFY_INTENT}
+
+def pre_validate_sql_node(state: AgentState, config: Optional[RunnableConfig] = None) -> AgentState:
+    """Parse the SQL locally and resolve its tables and columns before the EXPLAIN round-trip."""
+    progress_callback, progress_manager = progress_from_config(config)
+    if progress_manager:
+        progress_manager.update_progress("Checking SQL against schema...", SQLProgressStages.VALIDATE_SQL, progress_callback)
+
+    logger.info("\n=== Pre-validating SQL Query ===")
+
+    try:
+        errors = validate_sql_locally(state["sql_query"], read_schema_metadata(supabase_client))
     except Exception as e:
-        logger.error(f"Unexpected error during SQL validation: {str(e)}")
+        # Never block the query on a local checker failure; EXPLAIN still validates it
+        logger.warning(f"Local SQL validation unavailable: {str(e)}")
+        errors = []
+
+    if errors:
+        error_message = "\n".join(errors)
+        logger.info(f"Local validation failed:\n{error_message}")
         if progress_callback:
-            progress_callback(f"SQL validation error: {str(e)}", SQLProgressStages.VALIDATE_SQL)
+            progress_callback("SQL references unknown tables or columns, correcting...", SQLProgressStages.VALIDATE_SQL)
         return {
             "syntax_validation_passed": False,
-            "error_message": str(e),
+            "error_message": error_message,
             "progress": SQLProgressStages.VALIDATE_SQL
         }
 
+    logger.info("Local validation passed")
+    return {"syntax_validation_passed": True, "error_message": "", "progress": SQLProgressStages.VALIDATE_SQL}
+
+def _explain_result(explain) -> Dict[str, Any]:
+    result_data = getattr(explain, "data", None)
+
+    if not result_data:
+        logger.warning("Validation returned empty data.")
+        return {"syntax_validation_passed": False, "explain_output": "", "error_message": "No output returned from Supabase RPC."}
+
+    logger.info("Validation response received:")
+    logger.info(result_data)
+
+    # The RPC returns the error text instead of a plan when EXPLAIN fails
+    if result_data.find("cost") == -1:
+        return {"syntax_validation_passed": False, "explain_output": "", "error_message": result_data}
+    return {"syntax_validation_passed": True, "explain_output": result_data}
+
+def explain_sql(sql_query: str) -> Dict[str, Any]:
+    """EXPLAIN the query through the run_raw_sql RPC; returns syntax_validation_passed plus explain_output or error_message."""
+    try:
+        return _explain_result(supabase_client.rpc("run_raw_sql", {"raw_sql": sql_query}).execute())
+    except Exception as e:
+        logger.error(f"Unexpected error during SQL validation: {str(e)}")
+        return {"syntax_validation_passed": False, "explain_output": "", "error_message": str(e)}
+
+async def aexplain_sql(sql_query: str) -> Dict[str, Any]:
+    """Async explain_sql over the async Supabase client."""
+    try:
+        client = await get_async_supabase_client()
+        return _explain_result(await client.rpc("run_raw_sql", {"raw_sql": sql_query}).execute())
+    except Exception as e:
+        logger.error(f"Unexpected error during SQL validation: {str(e)}")
+        return {"syntax_validation_passed": False, "explain_output": "", "error_message": str(e)}
+
+def validate_sql_node(state: AgentState, config: Optional[RunnableConfig] = None, llm: ChatOpenAI = llm) -> AgentState:
+    """Validate the SQL query."""
+    progress_callback, progress_manager = progress_from_config(config)
+    if progress_manager:
+        progress_manager.update_progress("Validating SQL syntax...", SQLProgressStages.VALIDATE_SQL, progress_callback)
+    
+    logger.info("\n=== Validating SQL Query ===")
+    logger.info(f"SQL to validate:\n{state['sql_query']}")
+
+    result = explain_sql(state["sql_query"])
+    return _validation_update(result, progress_callback)
+
+async def avalidate_sql_node(state: AgentState, config: Optional[RunnableConfig] = None) -> AgentState:
+    """Async validate_sql_node."""
+    progress_callback, progress_manager = progress_from_config(config)
+    if progress_manager:
+        progress_manager.update_progress("Validating SQL syntax...", SQLProgressStages.VALIDATE_SQL, progress_callback)
+
+    logger.info("\n=== Validating SQL Query ===")
+    logger.info(f"SQL to validate:\n{state['sql_query']}")
+
+    result = await aexplain_sql(state["sql_query"])
+    return _validation_update(result, progress_callback)
+
+def _validation_update(result: Dict[str, Any], progress_callback: Optional[ProgressCallback]) -> AgentState:
+    if progress_callback:
+        if result["syntax_validation_passed"]:
+            progress_callback("SQL validation passed", SQLProgressStages.VALIDATE_SQL)
+        else:
+            progress_callback("SQL validation failed, correcting syntax...", SQLProgressStages.VALIDATE_SQL)
+    return {**result, "progress": SQLProgressStages.VALIDATE_SQL}
+
 def correct_sql_node(state: AgentState) -> AgentState:
     """Correct the SQL query based on verification results."""
     logger.info("\n=== Correcting SQL Query ===")
@@ -258,15 +496,9 @@ def correct_sql_node(state: AgentState) -> AgentState:
 
     improved_prompt = state["improved_prompt"]
 
-    return {"prompt": improved_prompt}
+    return {"prompt": improved_prompt, "attempt": current_attempt}
     
-def correct_syntax_node(state: AgentState, llm: ChatOpenAI = llm) -> AgentState:
-    """Correct the SQL query based on verification results."""
-    logger.info("\n=== Correcting SQL Query ===")
-    logger.info(f"SQL to correct:\n{state['sql_query']}")
-
-    current_attempt = state.get("attempt", 0) + 1
-
+def _syntax_correction_messages(state: AgentState, schema_context: str) -> List[Any]:
     system_prompt = f"""You are a PostgreSQL query corrector. Your task is to:
     1. Analyze the verification results of the generated SQL query
     2. Identify the issues that need to be fixed
@@ -276,20 +508,201 @@ def correct_syntax_node(state: AgentState, llm: ChatOpenAI = llm) -> AgentState:
     Error Message: {state["error_message"]}
     Generated SQL Query: {state["sql_query"]}
     Available Schema:
-    {read_schema_metadata()}"""
+    {schema_context}"""
     
     user_prompt = f"""Correct the following SQL query based on the error message: {state["error_message"]}"""
 
-    response = llm.invoke([
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=user_prompt)
-    ])
+    return [SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)]
+
+def correct_syntax_node(state: AgentState, llm: ChatOpenAI = llm) -> AgentState:
+    """Correct the SQL query based on verification results."""
+    logger.info("\n=== Correcting SQL Query ===")
+    logger.info(f"SQL to correct:\n{state['sql_query']}")
+
+    current_attempt = state.get("attempt", 0) + 1
+
+    schema_context = state.get("table_info") or build_schema_context(state["prompt"], read_schema_metadata(supabase_client))
+
+    response = llm.invoke(_syntax_correction_messages(state, schema_context))
+
+    cleaned_sql = apply_business_rules(clean_sql_query(response.content))
+    return {"sql_query": cleaned_sql, "attempt": current_attempt}
+
+async def acorrect_syntax_node(state: AgentState, llm: ChatOpenAI = llm) -> AgentState:
+    """Async correct_syntax_node."""
+    logger.info("\n=== Correcting SQL Query ===")
+    logger.info(f"SQL to correct:\n{state['sql_query']}")
+
+    current_attempt = state.get("attempt", 0) + 1
+
+    schema_context = state.get("table_info") or await asyncio.to_thread(
+        lambda: build_schema_context(state["prompt"], read_schema_metadata(supabase_client))
+    )
+
+    response = await llm.ainvoke(_syntax_correction_messages(state, schema_context))
+
+    cleaned_sql = await asyncio.to_thread(apply_business_rules, clean_sql_query(response.content))
+    return {"sql_query": cleaned_sql, "attempt": current_attempt}
+
+def lookup_sql_cache_node(state: AgentState, config: Optional[RunnableConfig] = None) -> AgentState:
+    """Reuse previously validated SQL for the same (or a near-identical) question under the same schema."""
+    cache = get_sql_cache()
+    semantic_cache = get_semantic_cache()
+    if cache is None and semantic_cache is None:
+        return {"cache_hit": False}
+
+    progress_callback, progress_manager = progress_from_config(config)
+    prompt = state.get("original_prompt") or state["prompt"]
+    sql_query = None
+    cached_prompt = prompt
+    try:
+        # Refreshes stale schema metadata first, so a schema change misses the cache
+        read_schema_metadata(supabase_client)
+        schema_hash = schema_metadata_hash()
+        if schema_hash and cache is not None:
+            sql_query = cache.get(prompt, schema_hash)
+        if schema_hash and not sql_query and semantic_cache is not None:
+            match = semantic_cache.lookup(prompt, schema_hash)
+            if match:
+                sql_query, cached_prompt = match["sql_query"], match["prompt"]
+                logger.info(f"Semantic cache hit (similarity {match['score']:.3f}) for: {cached_prompt}")
+    except Exception as e:
+        logger.warning(f"SQL cache lookup failed: {str(e)}")
+        sql_query = None
+
+    if not sql_query:
+        return {"cache_hit": False}
+
+    logger.info(f"SQL cache hit for prompt: {prompt}")
+    if progress_manager:
+        progress_manager.update_progress("Using previously validated query...", SQLProgressStages.VALIDATE_SQL, progress_callback)
+    return {
+        "sql_query": sql_query,
+        "cache_hit": True,
+        "cached_prompt": cached_prompt,
+        "matches_intent": True,
+        "syntax_validation_passed": True,
+        "progress": SQLProgressStages.VALIDATE_SQL
+    }
+
+def store_sql_cache_node(state: AgentState) -> AgentState:
+    """Remember SQL that passed both checks and executed; drop cached SQL that stopped working."""
+    cache = get_sql_cache()
+    semantic_cache = get_semantic_cache()
+    if cache is None and semantic_cache is None:
+        return {}
+
+    prompt = state.get("original_prompt") or state["prompt"]
+    try:
+        schema_hash = schema_metadata_hash()
+        if not schema_hash:
+            return {}
+        if state.get("cache_hit"):
+            cached_prompt = state.get("cached_prompt") or prompt
+            if state.get("error"):
+                logger.info("Cached SQL failed to execute, invalidating entry")
+                if cache is not None:
+                    cache.invalidate(cached_prompt, schema_hash)
+                if semantic_cache is not None:
+                    semantic_cache.remove(cached_prompt)
+            elif cache is not None and cached_prompt != prompt:
+                # Semantic hit: later repeats of this exact wording skip the embedding lookup
+                cache.put(prompt, schema_hash, state["sql_query"])
+        elif not state.get("error") and state.get("syntax_validation_passed") and state.get("matches_intent"):
+            if cache is not None:
+                cache.put(prompt, schema_hash, state["sql_query"])
+            if semantic_cache is not None:
+                semantic_cache.add(prompt, schema_hash, state["sql_query"])
+    except Exception as e:
+        logger.warning(f"SQL cache update failed: {str(e)}")
+    return {}
+
+def guard_decision(state: AgentState, explain_output: str) -> AgentState:
+    """
+    Decide from the EXPLAIN estimate whether the query runs as is, runs with a LIMIT,
+    goes back for an aggregated rewrite, or is refused.
+
+    Plans estimating more than QUERY_MAX_ROWS rows get a LIMIT. Plans costing more
+    than QUERY_MAX_COST are sent to correct_syntax for a rewrite while attempts
+    remain; after that they run with a LIMIT unless they exceed QUERY_REFUSE_COST.
+    """
+    guard = settings.query_guard
+    cost = parse_explain_cost(explain_output)
+    rows = parse_explain_rows(explain_output)
+    if cost is None:
+        # No plan (e.g. EXPLAIN failed); execution reports the real error
+        return {"guard_action": "execute"}
+
+    logger.info(f"Estimated plan cost: {cost:.0f}, rows: {rows}")
+    can_rewrite = not state.get("cache_hit") and state.get("attempt", 0) < MAX_ATTEMPTS
+    if cost > guard.max_cost and can_rewrite:
+        return {
+            "guard_action": "rewrite",
+            "syntax_validation_passed": False,
+            "explain_output": explain_output,
+            "error_message": (
+                f"The query is too expensive to run (estimated cost {cost:.0f}, about {rows} rows; "
+                f"the limit is {guard.max_cost:.0f}). Rewrite it to aggregate in the database "
+                f"(GROUP BY with COUNT/SUM/AVG) and add selective filters so it reads and returns "
+                f"far fewer rows, while still answering the question."
+            )
+        }
+    if cost > guard.refuse_cost:
+        return {
+            "guard_action": "refuse",
+            "error": (
+                f"❌ Query refused: estimated cost {cost:.0f} exceeds the limit of {guard.refuse_cost:.0f}. "
+                f"Try narrowing the question, e.g. to a date range, a country or the top N results."
+            )
+        }
+    if cost > guard.max_cost or (rows is not None and rows > guard.max_rows):
+        limited_sql = apply_row_limit(state["sql_query"], guard.row_limit)
+        if limited_sql != state["sql_query"]:
+            return {"guard_action": "execute", "sql_query": limited_sql, "row_limit_applied": guard.row_limit}
+    return {"guard_action": "execute"}
+
+def guard_query_node(state: AgentState, config: Optional[RunnableConfig] = None) -> AgentState:
+    """Check the plan estimate before execution; cached SQL is EXPLAINed here since it skipped validation."""
+    if not settings.query_guard.enabled:
+        return {"guard_action": "execute"}
+
+    progress_callback, progress_manager = progress_from_config(config)
+    if progress_manager:
+        progress_manager.update_progress("Checking query cost...", SQLProgressStages.VALIDATE_SQL, progress_callback)
+
+    logger.info("\n=== Checking Query Cost ===")
+    explain_output = state.get("explain_output") or explain_sql(state["sql_query"]).get("explain_output", "")
+    return _guard_update(guard_decision(state, explain_output), progress_callback)
 
-    cleaned_sql = clean_sql_query(response.content)
-    return {"sql_query": cleaned_sql}
+async def aguard_query_node(state: AgentState, config: Optional[RunnableConfig] = None) -> AgentState:
+    """Async guard_query_node."""
+    if not settings.query_guard.enabled:
+        return {"guard_action": "execute"}
 
-def execute_query_node(state: AgentState, progress_callback: Optional[ProgressCallback] = None, progress_manager: Optional[ProgressManager] = None, supabase_client: Client = supabase_client) -> AgentState:
+    progress_callback, progress_manager = progress_from_config(config)
+    if progress_manager:
+        progress_manager.update_progress("Checking query cost...", SQLProgressStages.VALIDATE_SQL, progress_callback)
+
+    logger.info("\n=== Checking Query Cost ===")
+    explain_output = state.get("explain_output") or (await aexplain_sql(state["sql_query"])).get("explain_output", "")
+    return _guard_update(guard_decision(state, explain_output), progress_callback)
+
+def _guard_update(result: AgentState, progress_callback: Optional[ProgressCallback]) -> AgentState:
+    action = result["guard_action"]
+    if action != "execute":
+        logger.info(f"Query guard: {action}")
+    if progress_callback:
+        if action == "rewrite":
+            progress_callback("Query is too expensive, rewriting it to aggregate...", SQLProgressStages.VALIDATE_SQL)
+        elif action == "refuse":
+            progress_callback("Query refused: estimated cost is too high", SQLProgressStages.VALIDATE_SQL)
+        elif result.get("row_limit_applied"):
+            progress_callback(f"Large result expected, limiting to {result['row_limit_applied']} rows", SQLProgressStages.VALIDATE_SQL)
+    return {**result, "progress": SQLProgressStages.VALIDATE_SQL}
+
+def execute_query_node(state: AgentState, config: Optional[RunnableConfig] = None, supabase_client: Client = supabase_client) -> AgentState:
     """Execute the SQL query and return results."""
+    progress_callback, progress_manager = progress_from_config(config)
     if progress_manager:
         progress_manager.update_progress("Executing query...", SQLProgressStages.EXECUTE_QUERY, progress_callback)
     
@@ -297,38 +710,83 @@ def execute_query_node(state: AgentState, progress_callback: Optional[ProgressCa
     logger.info(f"Executing:\n{state['sql_query']}")
     
     try:
-        sql_query = state["sql_query"]
-        if sql_query.endswith(';'):
-            sql_query = sql_query[:-1].strip()
-        results = supabase_client.rpc("run_sql", {"query": sql_query}).execute()
-        results = results.data
-
-        if not results:
-            logger.info("Query executed successfully but returned no results")
-            if progress_callback:
-                progress_callback("Query executed - no results found", SQLProgressStages.EXECUTE_QUERY)
-            return {"results": "✅ Query ran successfully, but no results were found.", "progress": SQLProgressStages.EXECUTE_QUERY}
-
-        columns = list(results[0].keys())
-        rows = [list(row.values()) for row in results]
-
-        summary = f"✅ Query successful. Retrieved {len(results)} row(s).\n"
-        table = tabulate(rows, headers=columns, tablefmt="pretty")
-        
-        logger.info(f"Query executed successfully. Retrieved {len(results)} rows")
-        if progress_callback:
-            progress_callback(f"Query executed - found {len(results)} rows", SQLProgressStages.EXECUTE_QUERY)
-        return {"results": summary + "\n" + table, "progress": SQLProgressStages.EXECUTE_QUERY}
+        sql_query = _executable_sql(state["sql_query"])
+        if settings.sql_executor.mode == "direct":
+            result_table = execute_readonly(sql_query)
+        else:
+            result_table = build_result_table(supabase_client.rpc("run_sql", {"query": sql_query}).execute().data)
+        return _query_results_update(result_table, progress_callback, state.get("row_limit_applied"))
+    except Exception as e:
+        return _query_error_update(e, progress_callback)
 
+async def aexecute_query_node(state: AgentState, config: Optional[RunnableConfig] = None) -> AgentState:
+    """Async execute_query_node; the direct executor's cursor loop runs in an offload thread."""
+    progress_callback, progress_manager = progress_from_config(config)
+    if progress_manager:
+        progress_manager.update_progress("Executing query...", SQLProgressStages.EXECUTE_QUERY, progress_callback)
+
+    logger.info("\n=== Executing SQL Query ===")
+    logger.info(f"Executing:\n{state['sql_query']}")
+
+    try:
+        sql_query = _executable_sql(state["sql_query"])
+        if settings.sql_executor.mode == "direct":
+            result_table = await asyncio.to_thread(execute_readonly, sql_query)
+        else:
+            client = await get_async_supabase_client()
+            results = await client.rpc("run_sql", {"query": sql_query}).execute()
+            result_table = await asyncio.to_thread(build_result_table, results.data)
+        # Rendering the text table is CPU work; keep it off the event loop
+        return await asyncio.to_thread(_query_results_update, result_table, progress_callback, state.get("row_limit_applied"))
     except Exception as e:
-        error_msg = f"❌ Query failed:\n{str(e)}"
-        logger.error(f"Query execution failed: {str(e)}")
+        return _query_error_update(e, progress_callback)
+
+def _executable_sql(sql_query: str) -> str:
+    if sql_query.endswith(';'):
+        sql_query = sql_query[:-1].strip()
+    return sql_query
+
+def _query_results_update(result_table: Dict[str, Any], progress_callback: Optional[ProgressCallback], row_limit: Optional[int] = None) -> AgentState:
+    """State update for a successful query; the text table shows at most SQL_DISPLAY_ROWS rows."""
+    row_count = result_table["row_count"]
+    if not row_count:
+        logger.info("Query executed successfully but returned no results")
         if progress_callback:
-            progress_callback(f"Query execution failed: {str(e)}", SQLProgressStages.EXECUTE_QUERY)
-        return {"error": error_msg, "progress": SQLProgressStages.EXECUTE_QUERY}
+            progress_callback("Query executed - no results found", SQLProgressStages.EXECUTE_QUERY)
+        return {
+            "results": "✅ Query ran successfully, but no results were found.",
+            "result_table": result_table,
+            "progress": SQLProgressStages.EXECUTE_QUERY
+        }
 
-def format_response_node(state: AgentState, progress_callback: Optional[ProgressCallback] = None, progress_manager: Optional[ProgressManager] = None) -> AgentState:
+    columns = result_table["columns"]
+    display_rows = settings.sql_executor.display_rows
+    rows = itertools.islice(zip(*(result_table["data"][column] for column in columns)), display_rows)
+
+    summary = f"✅ Query successful. Retrieved {row_count} row(s).\n"
+    if result_table.get("truncated"):
+        summary += f"Stopped after {row_count} rows (SQL_MAX_ROWS); ask a narrower question for complete results.\n"
+    elif row_limit and row_count >= row_limit:
+        summary += f"Results were limited to the first {row_limit} rows; ask a narrower question to see specific rows.\n"
+    if row_count > display_rows:
+        summary += f"Showing the first {display_rows} rows.\n"
+    table = tabulate(list(rows), headers=columns, tablefmt="pretty")
+    
+    logger.info(f"Query executed successfully. Retrieved {row_count} rows")
+    if progress_callback:
+        progress_callback(f"Query executed - found {row_count} rows", SQLProgressStages.EXECUTE_QUERY)
+    return {"results": summary + "\n" + table, "result_table": result_table, "progress": SQLProgressStages.EXECUTE_QUERY}
+
+def _query_error_update(e: Exception, progress_callback: Optional[ProgressCallback]) -> AgentState:
+    error_msg = f"❌ Query failed:\n{str(e)}"
+    logger.error(f"Query execution failed: {str(e)}")
+    if progress_callback:
+        progress_callback(f"Query execution failed: {str(e)}", SQLProgressStages.EXECUTE_QUERY)
+    return {"error": error_msg, "progress": SQLProgressStages.EXECUTE_QUERY}
+
+def format_response_node(state: AgentState, config: Optional[RunnableConfig] = None) -> AgentState:
     """Format the final response."""
+    progress_callback, progress_manager = progress_from_config(config)
     if progress_manager:
         progress_manager.update_progress("Formatting results...", SQLProgressStages.FORMAT_RESPONSE, progress_callback)
     
@@ -340,78 +798,147 @@ def format_response_node(state: AgentState, progress_callback: Optional[Progress
     state["progress"] = SQLProgressStages.FORMAT_RESPONSE
     return state
 
-def should_retry(state: AgentState) -> bool:
-    """Determine if we should retry the query generation."""
-    current_attempt = state.get("attempt", 0)
-    matches_intent = state.get("matches_intent", False) 
-    syntax_validation_passed = state.get("syntax_validation_passed", False)
-    should_retry = not matches_intent and not syntax_validation_passed and current_attempt < 3
-    
-    logger.info(f"\n=== Retry Decision ===")
-    logger.info(f"Intent match: {matches_intent}")
-    logger.info(f"Should retry: {should_retry}")
-    
-    if current_attempt >= 3:
-        logger.warning("Maximum retry attempts reached. Proceeding to execution.")
-    
-    return should_retry
-
-def create_workflow(progress_callback: Optional[ProgressCallback] = None, is_analytics_workflow: bool = False) -> StateGraph:
-    """Create and return a workflow with optional progress callback"""
+MAX_ATTEMPTS = 3
+
+def route_after_cache_lookup(state: AgentState) -> str:
+    """Cached SQL was already validated, so it only goes through the cost guard before execution."""
+    return "guard_query" if state.get("cache_hit", False) else "generate_sql"
+
+def route_after_generation(state: AgentState) -> str:
+    """Skip the check cycle when speculative generation already picked a validated query."""
+    return "guard_query" if state.get("candidate_selected", False) else "pre_validate_sql"
+
+def route_pre_validation(state: AgentState):
+    """Fan out to intent verification and EXPLAIN validation, or fix locally invalid SQL first."""
+    if not state.get("syntax_validation_passed", False):
+        if state.get("attempt", 0) < MAX_ATTEMPTS:
+            return "correct_syntax"
+        logger.warning("Maximum retry attempts reached. Leaving the final check to EXPLAIN.")
+    # Both checks run in the same step and join in review_checks
+    return ["verify_intent", "validate_sql"]
+
+def review_checks_node(state: AgentState) -> AgentState:
+    """Join point for the parallel intent and EXPLAIN checks."""
+    logger.info("\n=== Retry Decision ===")
+    logger.info(f"Intent match: {state.get('matches_intent', False)}")
+    logger.info(f"Syntax validation passed: {state.get('syntax_validation_passed', False)}")
+    return {}
+
+def route_after_checks(state: AgentState) -> str:
+    """Decide where to go once both checks have finished."""
+    if state.get("attempt", 0) >= MAX_ATTEMPTS:
+        if not (state.get("matches_intent", False) and state.get("syntax_validation_passed", False)):
+            logger.warning("Maximum retry attempts reached. Proceeding to execution.")
+        return "guard_query"
+    # A query that answers the wrong question is regenerated rather than syntax-fixed
+    if not state.get("matches_intent", False):
+        return "correct_sql"
+    if not state.get("syntax_validation_passed", False):
+        return "correct_syntax"
+    return "guard_query"
+
+def route_after_guard(state: AgentState) -> str:
+    """Run the query, send it back for an aggregated rewrite, or skip execution when refused."""
+    action = state.get("guard_action", "execute")
+    if action == "rewrite":
+        return "correct_syntax"
+    if action == "refuse":
+        return "store_sql_cache"
+    return "execute_query"
+
+def create_workflow(async_nodes: bool = False) -> StateGraph:
+    """
+    Create and compile the SQL workflow.
+
+    The compiled graph is shared by all requests; progress callbacks and the
+    sub-workflow flag are passed per invocation (see build_run_config).
+
+    Args:
+        async_nodes (bool): Use the async LLM/Supabase node variants; the graph must
+            then be run with ainvoke(). The remaining sync nodes run in the event
+            loop's executor.
+    """
     workflow = StateGraph(AgentState)
 
-    # Initialize progress manager
-    progress_manager = ProgressManager(is_sub_workflow=is_analytics_workflow)
-
-    # Add nodes with progress manager
-    workflow.add_node("generate_sql", lambda x: generate_sql_node(x, progress_callback, progress_manager))
-    workflow.add_node("verify_intent", lambda x: verify_intent_node(x, progress_callback, progress_manager))
-    workflow.add_node("validate_sql", lambda x: validate_sql_node(x, progress_callback, progress_manager))
+    # Nodes read their progress callback from the run config
+    workflow.add_node("generate_sql", agenerate_sql_node if async_nodes else generate_sql_node)
+    workflow.add_node("verify_intent", averify_intent_node if async_nodes else verify_intent_node)
+    workflow.add_node("pre_validate_sql", pre_validate_sql_node)
+    workflow.add_node("validate_sql", avalidate_sql_node if async_nodes else validate_sql_node)
+    workflow.add_node("review_checks", review_checks_node)
     workflow.add_node("correct_sql", correct_sql_node)
-    workflow.add_node("correct_syntax", correct_syntax_node)
-    workflow.add_node("execute_query", lambda x: execute_query_node(x, progress_callback, progress_manager))
-    workflow.add_node("format_response", lambda x: format_response_node(x, progress_callback, progress_manager))
-
-    # Define the flow
-    workflow.add_edge("generate_sql", "verify_intent")
+    workflow.add_node("correct_syntax", acorrect_syntax_node if async_nodes else correct_syntax_node)
+    workflow.add_node("lookup_sql_cache", lookup_sql_cache_node)
+    workflow.add_node("guard_query", aguard_query_node if async_nodes else guard_query_node)
+    workflow.add_node("execute_query", aexecute_query_node if async_nodes else execute_query_node)
+    workflow.add_node("store_sql_cache", store_sql_cache_node)
+    workflow.add_node("format_response", format_response_node)
+
+    # Define the flow: a cache hit skips generation and both checks
     workflow.add_conditional_edges(
-        "verify_intent",
-        should_retry,
+        "lookup_sql_cache",
+        route_after_cache_lookup,
         {
-            True: "correct_sql",
-            False: "validate_sql"
+            "generate_sql": "generate_sql",
+            "guard_query": "guard_query"
         }
     )
-    workflow.add_edge("correct_sql", "generate_sql")
     workflow.add_conditional_edges(
-        "validate_sql",
-        should_retry,
+        "generate_sql",
+        route_after_generation,
+        {
+            "pre_validate_sql": "pre_validate_sql",
+            "guard_query": "guard_query"
+        }
+    )
+    # The intent check (LLM) and EXPLAIN check (RPC) run concurrently
+    workflow.add_conditional_edges(
+        "pre_validate_sql",
+        route_pre_validation,
+        ["verify_intent", "validate_sql", "correct_syntax"]
+    )
+    workflow.add_edge(["verify_intent", "validate_sql"], "review_checks")
+    workflow.add_conditional_edges(
+        "review_checks",
+        route_after_checks,
         {
-            True: "correct_syntax",
-            False: "execute_query"
+            "correct_sql": "correct_sql",
+            "correct_syntax": "correct_syntax",
+            "guard_query": "guard_query"
         }
     )
-    workflow.add_edge("correct_syntax", "validate_sql")
-    workflow.add_edge("execute_query", "format_response")
+    # EXPLAIN guardrail: every path to execution passes through the cost check
+    workflow.add_conditional_edges(
+        "guard_query",
+        route_after_guard,
+        {
+            "execute_query": "execute_query",
+            "correct_syntax": "correct_syntax",
+            "store_sql_cache": "store_sql_cache"
+        }
+    )
+    workflow.add_edge("correct_sql", "generate_sql")
+    workflow.add_edge("correct_syntax", "pre_validate_sql")
+    workflow.add_edge("execute_query", "store_sql_cache")
+    workflow.add_edge("store_sql_cache", "format_response")
     workflow.add_edge("format_response", END)
 
     # Set the entry point
-    workflow.set_entry_point("generate_sql")
+    workflow.set_entry_point("lookup_sql_cache")
 
     return workflow.compile()
 
-# Create a default compiled workflow without progress callback
+# Compile the workflows once; every request shares these graphs
 app = create_workflow()
+async_app = create_workflow(async_nodes=True)
 
-# Main execution
-if __name__ == "__main__":
-    logger.info("\n=== Starting SQL Agent Workflow ===")
-    prompt = "What is the top 10 countries by new partner signups for April 2025"
-    logger.info(f"Input prompt: {prompt}")
-    
-    # Initialize state
-    initial_state = {
+def initial_sql_state(prompt: str) -> AgentState:
+    """Initial state for a run of the SQL workflow."""
+    return {
         "prompt": prompt,
+        "original_prompt": prompt,
+        "cache_hit": False,
+        "cached_prompt": "",
         "sql_query": "",
         "verification_result": "",
         "matches_intent": False,
@@ -422,12 +949,53 @@ if __name__ == "__main__":
         "explain_output": "",
         "improved_prompt": "",
         "error_message": "",
+        "candidate_selected": False,
+        "guard_action": "",
+        "row_limit_applied": 0,
+        "result_table": {},
         "progress": 0
     }
+
+def run_sql_workflow(prompt: str,
+                     progress_callback: Optional[ProgressCallback] = None,
+                     is_sub_workflow: bool = False,
+                     token_callback: Optional[TokenCallback] = None) -> AgentState:
+    """
+    Run the shared SQL workflow for a prompt.
+
+    Args:
+        prompt (str): Natural language question
+        progress_callback (Optional[ProgressCallback]): Progress callback for this run
+        is_sub_workflow (bool): If True, progress is reported in the 0-50% range
+        token_callback (Optional[TokenCallback]): Receives streamed SQL generation tokens
+
+    Returns:
+        AgentState: Final workflow state
+    """
+    config = build_run_config(progress_callback, is_sub_workflow=is_sub_workflow, recursion_limit=50, token_callback=token_callback)
+    return app.invoke(initial_sql_state(prompt), config=config)
+
+async def arun_sql_workflow(prompt: str,
+                            progress_callback: Optional[ProgressCallback] = None,
+                            is_sub_workflow: bool = False,
+                            token_callback: Optional[TokenCallback] = None) -> AgentState:
+    """
+    Async run_sql_workflow: LLM and Supabase calls are awaited on the running event loop.
+
+    Callbacks are invoked on the loop thread, so they must not block.
+    """
+    config = build_run_config(progress_callback, is_sub_workflow=is_sub_workflow, recursion_limit=50, token_callback=token_callback)
+    return await async_app.ainvoke(initial_sql_state(prompt), config=config)
+
+# Main execution
+if __name__ == "__main__":
+    logger.info("\n=== Starting SQL Agent Workflow ===")
+    prompt = "What is the top 10 countries by new partner signups for April 2025"
+    logger.info(f"Input prompt: {prompt}")
     
     # Run the workflow with recursion limit as safety measure
     logger.info("\n=== Executing Workflow ===")
-    result = app.invoke(initial_state, config={"recursion_limit": 50})
+    result = run_sql_workflow(prompt)
     
     # Print and log results
     logger.info("\n=== Final Results ===")
@@ -0,0 +1,107 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from config import settings
+from logging_config import LoggingConfig
+
+# Create logger
+logger = LoggingConfig('sql_cache').setup_logger()
+
+def normalize_prompt(prompt: str) -> str:
+    """Case, whitespace and trailing punctuation don't change the question being asked."""
+    normalized = re.sub(r"\s+", " ", prompt.strip().lower())
+    return normalized.rstrip(" ?.!")
+
+class SQLCache:
+    """
+    Persistent cache from normalized prompt to validated SQL.
+
+    Entries are keyed by the schema metadata hash as well as the prompt, so a schema
+    refresh makes every older entry unreachable; those are purged on the next write.
+    The least recently used entries are evicted beyond max_entries.
+    """
+
+    def __init__(self, path: str, max_entries: int = 500):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sql_cache (
+                    key TEXT PRIMARY KEY,
+                    schema_hash TEXT NOT NULL,
+                    prompt TEXT NOT NULL,
+                    sql_query TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS sql_cache_last_used ON sql_cache (last_used)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(prompt: str, schema_hash: str) -> str:
+        return hashlib.sha256(f"{schema_hash}\0{normalize_prompt(prompt)}".encode('utf-8')).hexdigest()
+
+    def get(self, prompt: str, schema_hash: str) -> Optional[str]:
+        """Cached SQL for the prompt under the current schema, or None."""
+        key = self.make_key(prompt, schema_hash)
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT sql_query FROM sql_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE sql_cache SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def put(self, prompt: str, schema_hash: str, sql_query: str) -> None:
+        """Store validated SQL, dropping entries for older schemas and evicting beyond max_entries."""
+        key = self.make_key(prompt, schema_hash)
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM sql_cache WHERE schema_hash != ?", (schema_hash,))
+            conn.execute(
+                "INSERT OR REPLACE INTO sql_cache (key, schema_hash, prompt, sql_query, created_at, last_used, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (key, schema_hash, normalize_prompt(prompt), sql_query, now, now)
+            )
+            conn.execute(
+                "DELETE FROM sql_cache WHERE key NOT IN (SELECT key FROM sql_cache ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+
+    def invalidate(self, prompt: str, schema_hash: str) -> None:
+        """Remove the entry for a prompt, e.g. when its cached SQL failed to execute."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM sql_cache WHERE key = ?", (self.make_key(prompt, schema_hash),))
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_sql_cache() -> Optional[SQLCache]:
+    """Get the process-wide SQL cache, or None if it is disabled"""
+    global _cache
+    if not settings.sql_cache.enabled:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SQLCache(settings.sql_cache.path, settings.sql_cache.max_entries)
+    return _cache
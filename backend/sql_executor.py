@@ -0,0 +1,134 @@
+import datetime
+import uuid
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from config import settings
+from logging_config import LoggingConfig
+from utils import db_connection
+
+# Create logger
+logger = LoggingConfig('sql_executor').setup_logger()
+
+def _value_dtype(value: Any) -> str:
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    if isinstance(value, (dict, list)):
+        return "json"
+    return "string"
+
+def _json_value(value: Any) -> Any:
+    """Convert a psycopg2 value to what the run_sql RPC would have returned in its JSON."""
+    if isinstance(value, Decimal):
+        # numeric without a fractional part comes back from JSON as an integer
+        return int(value) if value.is_finite() and value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, memoryview):
+        return "\\x" + bytes(value).hex()
+    return value
+
+class ResultTableBuilder:
+    """
+    Accumulate rows straight into a columnar result table.
+
+    Rows are appended column by column as they arrive, so no list of row dicts is
+    ever materialized. Column dtypes are inferred incrementally.
+    """
+
+    def __init__(self, columns: Sequence[str]):
+        self.columns = list(columns)
+        self._data: Dict[str, List[Any]] = {column: [] for column in self.columns}
+        self._kinds: Dict[str, set] = {column: set() for column in self.columns}
+        self.row_count = 0
+
+    def add_rows(self, rows: Iterable[Sequence[Any]]) -> None:
+        for row in rows:
+            for column, value in zip(self.columns, row):
+                self._data[column].append(value)
+                if value is not None:
+                    self._kinds[column].add(_value_dtype(value))
+            self.row_count += 1
+
+    def build(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: {"columns": [...], "dtypes": {column: dtype}, "data": {column: [values]}, "row_count": n}
+        """
+        dtypes = {}
+        for column in self.columns:
+            # Mixed int/float columns are widened to number; any other mix falls back to string
+            kinds = set(self._kinds[column])
+            if kinds == {"integer", "number"}:
+                dtypes[column] = "number"
+            elif len(kinds) == 1:
+                dtypes[column] = kinds.pop()
+            else:
+                dtypes[column] = "string" if kinds else "null"
+        return {"columns": self.columns, "dtypes": dtypes, "data": self._data, "row_count": self.row_count}
+
+def build_result_table(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Convert JSON row records (as returned by the run_sql RPC) into a columnar result table."""
+    columns = list(records[0].keys()) if records else []
+    builder = ResultTableBuilder(columns)
+    builder.add_rows([record.get(column) for column in columns] for record in records)
+    return builder.build()
+
+def execute_readonly(sql_query: str,
+                     max_rows: Optional[int] = None,
+                     batch_size: Optional[int] = None,
+                     statement_timeout_ms: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Run a validated query over a pooled connection and stream it into a result table.
+
+    The query runs in a READ ONLY transaction through a named (server-side) cursor,
+    so rows arrive in batches of batch_size instead of one materialized result.
+    Fetching stops after max_rows rows; the transaction is always rolled back.
+
+    Args:
+        sql_query (str): A single SELECT statement
+        max_rows (int): Row cap, defaults to SQL_MAX_ROWS
+        batch_size (int): Rows per round-trip, defaults to SQL_FETCH_BATCH_SIZE
+        statement_timeout_ms (int): Server-side timeout, defaults to SQL_STATEMENT_TIMEOUT_MS
+
+    Returns:
+        Dict[str, Any]: Result table plus "truncated" (True if the row cap was hit)
+    """
+    max_rows = max_rows or settings.sql_executor.max_rows
+    batch_size = batch_size or settings.sql_executor.batch_size
+    statement_timeout_ms = statement_timeout_ms or settings.sql_executor.statement_timeout_ms
+
+    with db_connection() as conn:
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SET TRANSACTION READ ONLY")
+                cursor.execute("SET LOCAL statement_timeout = %s", (statement_timeout_ms,))
+
+            with conn.cursor(name=f"sql_agent_{uuid.uuid4().hex}") as cursor:
+                cursor.itersize = batch_size
+                cursor.execute(sql_query)
+
+                batch = cursor.fetchmany(min(batch_size, max_rows + 1))
+                builder = ResultTableBuilder([column.name for column in cursor.description or []])
+                truncated = False
+                while batch:
+                    remaining = max_rows - builder.row_count
+                    if len(batch) > remaining:
+                        batch, truncated = batch[:remaining], True
+                    builder.add_rows([_json_value(value) for value in row] for row in batch)
+                    if truncated:
+                        break
+                    batch = cursor.fetchmany(min(batch_size, max_rows - builder.row_count + 1))
+        finally:
+            conn.rollback()
+
+    result_table = builder.build()
+    result_table["truncated"] = truncated
+    logger.info(f"Fetched {result_table['row_count']} row(s) via server-side cursor" + (" (row cap reached)" if truncated else ""))
+    return result_table
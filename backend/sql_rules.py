@@ -0,0 +1,182 @@
+from typing import Dict, List, Optional, Set
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+from logging_config import LoggingConfig
+from sql_validation import build_catalog, resolve_table
+
+# Create logger
+logger = LoggingConfig('sql_rules').setup_logger()
+
+INTERNAL_COLUMN = "is_internal"
+
+def _from_table(select: exp.Select) -> Optional[exp.Expression]:
+    from_ = select.args.get("from") or select.args.get("from_")
+    return from_.this if from_ is not None else None
+
+def _conjuncts(condition: exp.Expression) -> List[exp.Expression]:
+    """Top-level AND terms of a condition."""
+    condition = condition.unnest()
+    if isinstance(condition, exp.And):
+        return _conjuncts(condition.this) + _conjuncts(condition.expression)
+    return [condition]
+
+def _is_internal_predicate(term: exp.Expression, alias: str, single_source: bool) -> bool:
+    """True if term is exactly <alias>.is_internal = FALSE (the qualifier may be omitted for a single source)."""
+    if not isinstance(term, exp.EQ) or not isinstance(term.this, exp.Column):
+        return False
+    column, value = term.this, term.expression
+    if column.name.lower() != INTERNAL_COLUMN or not isinstance(value, exp.Boolean) or value.this is not False:
+        return False
+    qualifier = column.table.lower()
+    return qualifier == alias.lower() or (not qualifier and single_source)
+
+def _already_filtered(select: exp.Select, alias: str, single_source: bool) -> bool:
+    """
+    True if this SELECT's WHERE is <alias>.is_internal = FALSE AND ..., which excludes
+    the table's internal rows whatever the join type. Any other mention of the column
+    (in the SELECT list, a FILTER clause, an OR, an ON clause) does not count.
+    """
+    where = select.args.get("where")
+    if where is None:
+        return False
+    return any(_is_internal_predicate(term, alias, single_source) for term in _conjuncts(where.this))
+
+def _filterable_tables(select: exp.Select, catalog: Dict[str, Set[str]], cte_names: Set[str]) -> List[exp.Table]:
+    """Tables in FROM and JOIN that have an is_internal column (CTE references excluded)."""
+    candidates = []
+    from_table = _from_table(select)
+    if isinstance(from_table, exp.Table):
+        candidates.append(from_table)
+    for join in select.args.get("joins") or []:
+        if isinstance(join.this, exp.Table):
+            candidates.append(join.this)
+
+    filterable = []
+    for table in candidates:
+        if not table.db and table.name.lower() in cte_names:
+            continue
+        key = resolve_table(table, catalog)
+        if key is not None and INTERNAL_COLUMN in catalog[key]:
+            filterable.append(table)
+    return filterable
+
+def _filtered_source(table: exp.Table) -> exp.Subquery:
+    """(SELECT * FROM table WHERE is_internal = FALSE) under the table's alias, or its name."""
+    source = table.copy()
+    alias = source.args.get("alias")
+    source.set("alias", None)
+    inner = exp.select("*").from_(source).where(
+        exp.EQ(this=exp.column(INTERNAL_COLUMN), expression=exp.false())
+    )
+    return exp.Subquery(this=inner, alias=alias or exp.TableAlias(this=exp.to_identifier(table.name)))
+
+def _unqualify_schema(select: exp.Select, table: exp.Table) -> None:
+    """Rewrite schema.table.column references to table.column once the table is a derived table."""
+    for column in select.find_all(exp.Column):
+        if column.table.lower() == table.name.lower() and column.db.lower() == table.db.lower():
+            column.set("db", None)
+            column.set("catalog", None)
+
+def enforce_internal_filter(sql_query: str, schema_dict: Dict) -> str:
+    """
+    Make sure every table with an is_internal column is filtered to is_internal = FALSE.
+
+    Each such table in FROM or JOIN is replaced by the derived table
+    (SELECT * FROM t WHERE is_internal = FALSE) under the same alias, which excludes
+    internal rows for every join type (including USING joins) without changing the
+    join semantics. A table is left as is only when the same SELECT's WHERE already
+    has alias.is_internal = FALSE as a top-level AND term, so the rewrite is
+    idempotent. Returns the query unchanged if nothing was rewritten or it can't be
+    parsed.
+
+    Args:
+        sql_query (str): Generated SQL
+        schema_dict (Dict): Schema metadata as returned by read_schema_metadata
+
+    Returns:
+        str: SQL with the mandatory exclusions applied
+
+    >>> schema = {
+    ...     "partner.partner_info": {"columns": [{"column_name": "partner_id"}, {"column_name": "is_internal"}]},
+    ...     "client.account_profile": {"columns": [{"column_name": "partner_id"}, {"column_name": "is_internal"}]}
+    ... }
+    >>> def rewrite(sql):
+    ...     return sqlglot.transpile(enforce_internal_filter(sql, schema), read="postgres", write="postgres")[0]
+    >>> rewrite("SELECT partner_id, is_internal FROM partner.partner_info")
+    'SELECT partner_id, is_internal FROM (SELECT * FROM partner.partner_info WHERE is_internal = FALSE) AS partner_info'
+    >>> rewrite("SELECT COUNT(*) FILTER(WHERE is_internal) FROM partner.partner_info p")
+    'SELECT COUNT(*) FILTER(WHERE is_internal) FROM (SELECT * FROM partner.partner_info WHERE is_internal = FALSE) AS p'
+    >>> rewrite("SELECT a.partner_id FROM partner.partner_info a FULL JOIN client.account_profile c ON a.partner_id = c.partner_id")
+    'SELECT a.partner_id FROM (SELECT * FROM partner.partner_info WHERE is_internal = FALSE) AS a FULL JOIN (SELECT * FROM client.account_profile WHERE is_internal = FALSE) AS c ON a.partner_id = c.partner_id'
+    >>> rewrite("SELECT partner_id FROM partner.partner_info RIGHT JOIN client.account_profile c USING (partner_id)")
+    'SELECT partner_id FROM (SELECT * FROM partner.partner_info WHERE is_internal = FALSE) AS partner_info RIGHT JOIN (SELECT * FROM client.account_profile WHERE is_internal = FALSE) AS c USING (partner_id)'
+    >>> sql = "SELECT partner.partner_info.partner_id FROM partner.partner_info WHERE partner_id > 0"
+    >>> rewrite(sql)
+    'SELECT partner_info.partner_id FROM (SELECT * FROM partner.partner_info WHERE is_internal = FALSE) AS partner_info WHERE partner_id > 0'
+    >>> rewrite(rewrite(sql)) == rewrite(sql)
+    True
+    >>> rewrite("SELECT partner_id FROM partner.partner_info WHERE is_internal = FALSE AND partner_id > 0")
+    'SELECT partner_id FROM partner.partner_info WHERE is_internal = FALSE AND partner_id > 0'
+    """
+    try:
+        tree = sqlglot.parse_one(sql_query, read="postgres")
+    except SqlglotError as e:
+        logger.warning(f"Could not parse SQL to enforce {INTERNAL_COLUMN} filter: {str(e)}")
+        return sql_query
+
+    catalog = build_catalog(schema_dict)
+    cte_names = {cte.alias_or_name.lower() for cte in tree.find_all(exp.CTE)}
+    injected = []
+
+    # Collected up front: the derived tables added below must not be rewritten again
+    for select in list(tree.find_all(exp.Select)):
+        single_source = not select.args.get("joins")
+        for table in _filterable_tables(select, catalog, cte_names):
+            alias = table.alias_or_name
+            if _already_filtered(select, alias, single_source):
+                continue
+            if not table.alias and table.db:
+                _unqualify_schema(select, table)
+            table.replace(_filtered_source(table))
+            injected.append(alias)
+
+    if not injected:
+        return sql_query
+
+    logger.info(f"Injected {INTERNAL_COLUMN} = FALSE for: {', '.join(injected)}")
+    return tree.sql(dialect="postgres", pretty=True)
+
+def apply_row_limit(sql_query: str, limit: int) -> str:
+    """
+    Cap the rows a query can return by adding (or lowering) the outermost LIMIT.
+
+    Existing LIMITs at or below the cap are kept, as are FETCH FIRST clauses.
+    Returns the query unchanged if it is not a SELECT or can't be parsed.
+
+    Args:
+        sql_query (str): SQL to cap
+        limit (int): Maximum number of rows
+
+    Returns:
+        str: SQL with a LIMIT of at most limit rows
+    """
+    try:
+        tree = sqlglot.parse_one(sql_query, read="postgres")
+    except SqlglotError as e:
+        logger.warning(f"Could not parse SQL to apply a row limit: {str(e)}")
+        return sql_query
+
+    if not isinstance(tree, exp.Query):
+        return sql_query
+
+    existing = tree.args.get("limit")
+    if existing is not None:
+        value = existing.expression if isinstance(existing, exp.Limit) else None
+        if not isinstance(value, exp.Literal) or not value.is_int or int(value.name) <= limit:
+            return sql_query
+
+    logger.info(f"Applying row limit of {limit}")
+    return tree.limit(limit, copy=False).sql(dialect="postgres", pretty=True)
+
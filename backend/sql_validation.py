@@ -0,0 +1,188 @@
+import difflib
+import re
+from typing import Dict, List, Optional, Set
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import ParseError, SqlglotError
+from sqlglot.optimizer.scope import Scope, traverse_scope
+from logging_config import LoggingConfig
+
+# Create logger
+logger = LoggingConfig('sql_validation').setup_logger()
+
+# "(cost=0.00..1234.56 rows=100 width=8)" on the top plan node
+EXPLAIN_COST_PATTERN = re.compile(r"cost=\d+(?:\.\d+)?\.\.(\d+(?:\.\d+)?)\s+rows=(\d+)")
+
+def parse_explain_cost(explain_output) -> Optional[float]:
+    """Total estimated cost of the top plan node in text EXPLAIN output, or None if not found."""
+    match = EXPLAIN_COST_PATTERN.search(str(explain_output or ""))
+    return float(match.group(1)) if match else None
+
+def parse_explain_rows(explain_output) -> Optional[int]:
+    """Estimated row count of the top plan node in text EXPLAIN output, or None if not found."""
+    match = EXPLAIN_COST_PATTERN.search(str(explain_output or ""))
+    return int(match.group(2)) if match else None
+
+def build_catalog(schema_dict: Dict) -> Dict[str, Set[str]]:
+    """Map "schema.table" (lowercase) to its set of lowercase column names."""
+    return {
+        table.lower(): {col['column_name'].lower() for col in meta.get("columns", []) if col.get('column_name')}
+        for table, meta in schema_dict.items()
+    }
+
+def _suggest(name: str, candidates) -> str:
+    matches = difflib.get_close_matches(name, list(candidates), n=3, cutoff=0.6)
+    return f" Did you mean: {', '.join(matches)}?" if matches else ""
+
+def _matching_tables(table: exp.Table, catalog: Dict[str, Set[str]]) -> List[str]:
+    """Catalog keys a table reference can refer to."""
+    name = table.name.lower()
+    if table.db:
+        key = f"{table.db.lower()}.{name}"
+        return [key] if key in catalog else []
+    return [key for key in catalog if key.split('.', 1)[-1] == name]
+
+def resolve_table(table: exp.Table, catalog: Dict[str, Set[str]]) -> Optional[str]:
+    """Catalog key for a table reference, or None if it is unknown or ambiguous."""
+    matches = _matching_tables(table, catalog)
+    return matches[0] if len(matches) == 1 else None
+
+def _scope_tables(scope: Scope, catalog: Dict[str, Set[str]]) -> Dict[str, Optional[str]]:
+    """Source alias -> catalog key for physical tables; None for derived tables, CTEs and functions."""
+    tables = {}
+    for alias, source in scope.sources.items():
+        if isinstance(source, exp.Table) and source.name:
+            tables[alias.lower()] = resolve_table(source, catalog)
+        else:
+            tables[alias.lower()] = None
+    return tables
+
+def _output_aliases(select: exp.Expression) -> Set[str]:
+    """Names introduced with AS in a SELECT list (not the bare columns it projects)."""
+    return {
+        projection.alias.lower() for projection in getattr(select, "expressions", [])
+        if isinstance(projection, exp.Alias) and projection.alias
+    }
+
+def _in_alias_clause(column: exp.Column, select: exp.Expression) -> bool:
+    """True if the column sits in the ORDER BY or GROUP BY of select, where Postgres accepts output aliases."""
+    clause = column.find_ancestor(exp.Order, exp.Group, exp.Having)
+    return isinstance(clause, (exp.Order, exp.Group)) and clause.parent is select
+
+def _having_columns(select: exp.Expression) -> List[exp.Column]:
+    """Unqualified columns in the HAVING of select itself, which sqlglot's scope leaves out of Scope.columns."""
+    having = select.args.get("having") if isinstance(select, exp.Select) else None
+    if having is None:
+        return []
+    return [
+        column for column in having.find_all(exp.Column)
+        if not column.table and column.find_ancestor(exp.Select) is select
+    ]
+
+def validate_sql_locally(sql_query: str, schema_dict: Dict) -> List[str]:
+    """
+    Check a generated query without touching the database.
+
+    Parses the query with sqlglot's Postgres dialect and resolves every table and
+    column reference against the cached schema metadata. References that can't be
+    resolved statically (derived tables, CTE columns, set-returning functions) are
+    left for the EXPLAIN round-trip to judge.
+
+    Args:
+        sql_query (str): Generated SQL
+        schema_dict (Dict): Schema metadata as returned by read_schema_metadata
+
+    Returns:
+        List[str]: Error messages; empty if the query passed
+
+    An unknown bare column in the SELECT list is reported even though the list's
+    AS names are valid in ORDER BY/GROUP BY. HAVING is resolved like WHERE, so
+    output aliases are not valid there:
+
+    >>> schema = {"partner.partner_info": {"columns": [{"column_name": "partner_country"}]}}
+    >>> validate_sql_locally("SELECT country FROM partner.partner_info", schema)
+    ['Unknown column: country (not in partner.partner_info). Did you mean: partner_country?']
+    >>> validate_sql_locally("SELECT partner_country AS c FROM partner.partner_info GROUP BY c ORDER BY c", schema)
+    []
+    >>> grouped = "SELECT partner_country, COUNT(*) AS n FROM partner.partner_info GROUP BY partner_country "
+    >>> validate_sql_locally(grouped + "HAVING nn > 5", schema)
+    ['Unknown column: nn (not in partner.partner_info).']
+    >>> validate_sql_locally(grouped + "HAVING COUNT(nn) > 5", schema)
+    ['Unknown column: nn (not in partner.partner_info).']
+    >>> validate_sql_locally(grouped + "HAVING n > 5", schema)
+    ['Unknown column: n (not in partner.partner_info).']
+    >>> validate_sql_locally(grouped + "HAVING COUNT(partner_country) > 5", schema)
+    []
+    """
+    try:
+        statements = [s for s in sqlglot.parse(sql_query, read="postgres") if s is not None]
+    except ParseError as e:
+        return [f"Syntax error: {str(e)}"]
+
+    if len(statements) != 1:
+        return [f"Expected exactly one SQL statement, found {len(statements)}"]
+
+    catalog = build_catalog(schema_dict)
+    errors = []
+    tree = statements[0]
+
+    cte_names = {cte.alias_or_name.lower() for cte in tree.find_all(exp.CTE)}
+    for table in tree.find_all(exp.Table):
+        if not table.name or (not table.db and table.name.lower() in cte_names):
+            continue
+        if isinstance(table.this, exp.Func):
+            continue
+        if not _matching_tables(table, catalog):
+            reference = f"{table.db}.{table.name}" if table.db else table.name
+            errors.append(f"Unknown table: {reference}.{_suggest(reference.lower(), catalog.keys())}")
+
+    if errors:
+        return errors
+
+    try:
+        scopes = traverse_scope(tree)
+    except SqlglotError as e:
+        # Scope analysis can't handle every construct; the EXPLAIN check still runs
+        logger.warning(f"Skipping column resolution: {str(e)}")
+        return []
+
+    for scope in scopes:
+        tables = _scope_tables(scope, catalog)
+        # Columns of enclosing scopes are visible to correlated subqueries
+        visible_tables = dict(tables)
+        parent = scope.parent
+        while parent is not None:
+            for alias, key in _scope_tables(parent, catalog).items():
+                visible_tables.setdefault(alias, key)
+            parent = parent.parent
+
+        select_aliases = _output_aliases(scope.expression)
+
+        for column in scope.columns + _having_columns(scope.expression):
+            name = column.name.lower()
+            if not name or isinstance(column.this, exp.Star):
+                continue
+
+            qualifier = column.table.lower()
+            if qualifier:
+                if qualifier not in visible_tables:
+                    errors.append(f"Unknown table alias '{column.table}' in column reference {column.sql(dialect='postgres')}")
+                    continue
+                key = visible_tables[qualifier]
+                if key is not None and name not in catalog[key]:
+                    errors.append(f"Unknown column: {column.table}.{column.name} (table {key}).{_suggest(name, catalog[key])}")
+                continue
+
+            if name in select_aliases and _in_alias_clause(column, scope.expression):
+                continue
+            keys = list(visible_tables.values())
+            if not keys or any(key is None for key in keys):
+                # A derived table or function may provide the column
+                continue
+            if not any(name in catalog[key] for key in keys):
+                known = set().union(*(catalog[key] for key in keys))
+                errors.append(f"Unknown column: {column.name} (not in {', '.join(sorted(set(keys)))}).{_suggest(name, known)}")
+
+    # The same bad reference tends to repeat across scopes
+    return list(dict.fromkeys(errors))
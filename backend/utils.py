@@ -1,41 +1,28 @@
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from supabase import create_client, Client
-import psycopg2
-from config import settings, create_supabase_client
+from supabase import AsyncClient, Client
+from client_registry import registry
+from db_pool import get_pool
 
 def get_openai_client(temperature: float = 0) -> ChatOpenAI:
-    """Get configured OpenAI client"""
-    return ChatOpenAI(
-        api_key=settings.openai.api_key,
-        base_url=settings.openai.base_url,
-        model_name=settings.openai.model_name,
-        temperature=temperature
-    )
+    """Get the shared OpenAI client for the given temperature"""
+    return registry.chat_model(temperature)
 
 def get_supabase_client() -> Client:
-    """Get configured Supabase client"""
-    return create_supabase_client(
-        settings.supabase.url,
-        settings.supabase.service_role_key
-    )
+    """Get the shared Supabase client"""
+    return registry.supabase()
+
+async def get_async_supabase_client() -> AsyncClient:
+    """Get the shared async Supabase client (agent event loop only)"""
+    return await registry.async_supabase()
 
 def get_db_connection():
-    """Get configured database connection"""
-    return psycopg2.connect(
-        host=settings.database.host,
-        port=settings.database.port,
-        dbname=settings.database.database,
-        user=settings.database.user,
-        password=settings.database.password
-    ) 
+    """Get a pooled database connection; close() returns it to the pool"""
+    return get_pool().acquire()
+
+def db_connection():
+    """Context manager yielding a pooled database connection"""
+    return get_pool().connection()
 
 def get_openai_embedding_client() -> OpenAIEmbeddings:
-    """Get configured OpenAI embedding client"""
-    if not settings.embeddings.api_key:
-        raise ValueError("OPENAI_API_KEY environment variable is required but not set")
-    
-    return OpenAIEmbeddings(
-        api_key=settings.embeddings.api_key,
-        base_url=settings.embeddings.base_url if settings.embeddings.base_url else None,
-        model=settings.embeddings.model
-    )
\ No newline at end of file
+    """Get the shared OpenAI embedding client"""
+    return registry.embeddings()
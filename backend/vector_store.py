@@ -1,38 +1,278 @@
 from langchain_community.vectorstores import FAISS
 from utils import get_openai_embedding_client
-from schema_manager import schema_dict_to_chunks, read_schema_metadata
+from schema_manager import schema_dict_to_chunks, read_schema_metadata, schema_metadata_hash
 from logging_config import LoggingConfig
+from config import settings
+from embedding_cache import embed_documents_cached
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+import hashlib
+import os
+import pickle
+import shutil
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, fine for a single dev server
+    fcntl = None
 
 # Create logger
 logger = LoggingConfig('vector_store').setup_logger()
 
+FINGERPRINT_FILE = "schema.sha256"
+
+# How often (seconds) a worker checks whether another process re-indexed the schema
+RELOAD_CHECK_INTERVAL = 30
+
+# Process-wide in-memory index, swapped atomically when the schema is re-indexed
+_vectorstore_lock = threading.Lock()
+_vectorstore: Optional[FAISS] = None
+_loaded_fingerprint: Optional[str] = None
+_last_reload_check = 0.0
+
+# Startup/readiness state of the schema index, reported by /ready
+_status_lock = threading.Lock()
+# Set by the production server while it preloads the app in the master process;
+# workers start the vector store themselves after fork (see server.py)
+_startup_deferred = False
+_status: Dict[str, Any] = {"state": "not_started", "ready": False, "fingerprint": None, "error": None, "updated_at": None}
+
+@contextmanager
+def _file_lock(name: str, exclusive: bool):
+    """
+    Cross-process lock next to the index directory (the thread lock only covers this process).
+
+    "build" serializes rebuilds between workers; "swap" is held exclusively while the
+    directories are swapped and shared while a worker loads the index.
+    """
+    if fcntl is None:
+        yield
+        return
+    path = settings.vector_store.path
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f"{path}.{name}.lock", 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _set_status(state: str, ready: bool, fingerprint: Optional[str] = None, error: Optional[str] = None) -> None:
+    with _status_lock:
+        _status.update({
+            "state": state,
+            "ready": ready,
+            "fingerprint": fingerprint if fingerprint is not None else _status["fingerprint"],
+            "error": error,
+            "updated_at": time.time()
+        })
+
+def get_vector_store_status() -> Dict[str, Any]:
+    """Snapshot of the schema index readiness state."""
+    with _status_lock:
+        return dict(_status)
+
+def index_fingerprint() -> Optional[str]:
+    """Fingerprint of what the index is built from: schema metadata content and embedding model."""
+    content_hash = schema_metadata_hash()
+    if content_hash is None:
+        return None
+    return hashlib.sha256(f"{settings.embeddings.model}:{content_hash}".encode()).hexdigest()
+
+def _index_exists() -> bool:
+    return os.path.exists(os.path.join(settings.vector_store.path, "index.faiss"))
+
+def _persisted_fingerprint() -> Optional[str]:
+    path = os.path.join(settings.vector_store.path, FINGERPRINT_FILE)
+    if not _index_exists() or not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return f.read().strip() or None
+
+def _save_vector_store(vectorstore: FAISS, fingerprint: Optional[str]) -> None:
+    """Write the index to a scratch directory, then swap it in place of the old one (build lock held)."""
+    path = settings.vector_store.path
+    staging_path = f"{path}.new"
+    previous_path = f"{path}.old"
+    shutil.rmtree(staging_path, ignore_errors=True)
+    vectorstore.save_local(staging_path)
+    with open(os.path.join(staging_path, FINGERPRINT_FILE), 'w') as f:
+        f.write(fingerprint or "")
+
+    with _vectorstore_lock, _file_lock("swap", exclusive=True):
+        shutil.rmtree(previous_path, ignore_errors=True)
+        if os.path.exists(path):
+            os.replace(path, previous_path)
+        os.replace(staging_path, path)
+    shutil.rmtree(previous_path, ignore_errors=True)
+
+def _swap_vector_store(vectorstore: FAISS, fingerprint: Optional[str]) -> None:
+    """Atomically replace the in-memory index used by retrieve_context."""
+    global _vectorstore, _loaded_fingerprint, _last_reload_check
+    with _vectorstore_lock:
+        _vectorstore = vectorstore
+        _loaded_fingerprint = fingerprint
+        _last_reload_check = time.monotonic()
+
 def initialize_vector_store(supabase_client):
-    """Initialize and save the vector store with schema metadata."""
+    """Initialize and save the vector store with schema metadata (build lock held)."""
     logger.info("Initializing vector store...")
     embedding = get_openai_embedding_client()
     schema_chunks = schema_dict_to_chunks(read_schema_metadata(supabase_client))
-    vectorstore = FAISS.from_texts(schema_chunks, embedding=embedding)
-    vectorstore.save_local("metadata/schema_vectorstore")
+    # Only new or changed chunks are sent to the embeddings API
+    vectors = embed_documents_cached(schema_chunks, embedding, settings.embeddings.model)
+    vectorstore = FAISS.from_embeddings(list(zip(schema_chunks, vectors)), embedding=embedding)
+    fingerprint = index_fingerprint()
+    _save_vector_store(vectorstore, fingerprint)
+    _swap_vector_store(vectorstore, fingerprint)
     logger.info("Vector store initialized and saved.")
     return vectorstore
 
+def ensure_vector_store(supabase_client) -> None:
+    """Rebuild the persisted index only if it no longer matches the schema metadata."""
+    try:
+        # Refreshes metadata/schema_metadata.json from Supabase if it is older than 24h
+        read_schema_metadata(supabase_client)
+        current = index_fingerprint()
+        persisted = _persisted_fingerprint()
+        if current is not None and current == persisted:
+            logger.info("Persisted vector store matches schema metadata, skipping rebuild")
+            # Warm the in-memory index so the first question does not pay the disk load
+            get_vector_store()
+            _set_status("ready", True, fingerprint=current)
+            return
+
+        logger.info("Persisted vector store is missing or stale, rebuilding...")
+        # A stale index can keep serving retrieval while the new one is built
+        _set_status("rebuilding", _index_exists())
+        with _file_lock("build", exclusive=True):
+            # Every worker runs this after fork; only the first one to get the lock rebuilds
+            current = index_fingerprint()
+            if current is not None and current == _persisted_fingerprint():
+                logger.info("Vector store was rebuilt by another process, loading it")
+                loaded, persisted = _load_persisted()
+                _swap_vector_store(loaded, persisted)
+            else:
+                initialize_vector_store(supabase_client)
+        _set_status("ready", True, fingerprint=index_fingerprint())
+    except Exception as e:
+        logger.error(f"Failed to prepare vector store: {str(e)}")
+        _set_status("failed", _index_exists(), error=str(e))
+
+def start_vector_store(supabase_client) -> None:
+    """
+    Prepare the schema index without blocking startup.
+
+    In "lazy" mode (default) a persisted index whose fingerprint matches the current
+    schema metadata is used as-is, and a stale or missing one is rebuilt in a background
+    thread. In "eager" mode the same check (and any rebuild) runs before returning.
+    Does nothing while startup is deferred.
+    """
+    if _startup_deferred:
+        logger.info("Vector store startup deferred until the worker starts")
+        return
+
+    current = index_fingerprint()
+    if current is not None and current == _persisted_fingerprint():
+        _set_status("ready", True, fingerprint=current)
+    else:
+        _set_status("stale" if _index_exists() else "starting", _index_exists())
+
+    if settings.vector_store.startup_mode == "eager":
+        ensure_vector_store(supabase_client)
+        return
+
+    thread = threading.Thread(target=ensure_vector_store, args=(supabase_client,), name="vector-store-init", daemon=True)
+    thread.start()
+
+def defer_startup() -> None:
+    """Make start_vector_store a no-op until resume_startup (pre-fork preloading)."""
+    global _startup_deferred
+    _startup_deferred = True
+
+def resume_startup(supabase_client) -> None:
+    """Run the deferred start_vector_store, e.g. in a freshly forked worker."""
+    global _startup_deferred
+    _startup_deferred = False
+    start_vector_store(supabase_client)
+
+def warm_vector_store() -> bool:
+    """
+    Load an up-to-date persisted index into memory without network calls.
+
+    Returns:
+        bool: True if the index was loaded, False if it is missing or stale
+    """
+    current = index_fingerprint()
+    if current is None or current != _persisted_fingerprint():
+        return False
+    get_vector_store()
+    _set_status("ready", True, fingerprint=current)
+    return True
+
 def load_vector_store():
-    """Load the vector store from disk."""
+    """Load the vector store from disk, memory-mapping the FAISS index where supported."""
+    import faiss
+
     logger.info("Loading vector store...")
     embedding = get_openai_embedding_client()
-    vectorstore = FAISS.load_local(
-        "metadata/schema_vectorstore", 
-        embedding, 
-        allow_dangerous_deserialization=True
+    path = settings.vector_store.path
+    index_path = os.path.join(path, "index.faiss")
+    try:
+        index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP)
+    except Exception:
+        # Not every index type can be mapped; fall back to reading it into memory
+        index = faiss.read_index(index_path)
+
+    with open(os.path.join(path, "index.pkl"), 'rb') as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+
+    vectorstore = FAISS(
+        embedding_function=embedding,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=index_to_docstore_id
     )
     logger.info("Vector store loaded successfully.")
     return vectorstore
 
+def _load_persisted():
+    """Load the persisted index and its fingerprint while no other process is swapping it."""
+    with _file_lock("swap", exclusive=False):
+        return load_vector_store(), _persisted_fingerprint()
+
+def get_vector_store() -> FAISS:
+    """
+    Get the process-wide schema index, loading it from disk on first use.
+
+    Re-checks the persisted fingerprint every RELOAD_CHECK_INTERVAL seconds so a
+    re-index done by another worker process is picked up without a restart.
+    """
+    global _last_reload_check
+    vectorstore = _vectorstore
+    now = time.monotonic()
+    if vectorstore is not None and now - _last_reload_check < RELOAD_CHECK_INTERVAL:
+        return vectorstore
+
+    with _vectorstore_lock:
+        if _vectorstore is not None and time.monotonic() - _last_reload_check < RELOAD_CHECK_INTERVAL:
+            return _vectorstore
+        _last_reload_check = time.monotonic()
+        persisted = _persisted_fingerprint()
+        if _vectorstore is not None and persisted == _loaded_fingerprint:
+            return _vectorstore
+        loaded, persisted = _load_persisted()
+
+    _swap_vector_store(loaded, persisted)
+    return loaded
+
 def retrieve_context(user_query: str, k: int = 7) -> str:
     """Retrieve relevant schema context for a user query."""
     logger.info(f"Retrieving context for query: {user_query}")
-    vectorstore = load_vector_store()
+    vectorstore = get_vector_store()
     docs = vectorstore.similarity_search(user_query, k=k)
     context = "\n\n".join([doc.page_content for doc in docs])
     logger.info("Context retrieved successfully.")
-    return context 
\ No newline at end of file
+    return context
@@ -3778,69 +3778,46 @@ const CountryDashboard = () => {
       const end = new Date(effectiveEndDate);
       const dateRange = Math.ceil((end - start) / (1000 * 60 * 60 * 24));
 
-      // Fetch basic country overview data
-      const overviewResponse = await axios.get(`${API_BASE_URL}/country-dashboard/overview?date_range=${dateRange}`);
-      const overviewData = overviewResponse.data.data || {};
-      setCountryOverview(overviewData.country_data || []);
-
-      // Fetch available countries
-      const countriesResponse = await axios.get(`${API_BASE_URL}/country-dashboard/countries`);
-      setAvailableCountries(countriesResponse.data.data || []);
-
-      // Fetch growth trends
-      const trendsResponse = await axios.get(`${API_BASE_URL}/country-dashboard/growth-trends?date_range=${dateRange}`);
-      setGrowthTrends(trendsResponse.data.data || []);
-
-      // Fetch application chart data
-      const chartResponse = await axios.get(`${API_BASE_URL}/country-dashboard/application-chart?date_range=${dateRange}&period_type=${reportType.toLowerCase()}&start_date=${encodeURIComponent(effectiveStartDate)}&end_date=${encodeURIComponent(effectiveEndDate)}&partner_country=${encodeURIComponent(partnerCountry)}`);
-      setApplicationChartData(chartResponse.data.data || null);
-
-      // Fetch partner funnel data
-      const funnelResponse = await axios.get(`${API_BASE_URL}/country-dashboard/partner-funnel?date_range=${dateRange}&partner_country=${encodeURIComponent(partnerCountry)}`);
-      setFunnelData(funnelResponse.data.data || null);
-
-      // Fetch activation chart data
-      const activationResponse = await axios.get(`${API_BASE_URL}/country-dashboard/activation-chart?date_range=${dateRange}&period_type=${reportType.toLowerCase()}&partner_country=${encodeURIComponent(partnerCountry)}`);
-      setActivationChartData(activationResponse.data.data || null);
-
-      // Fetch active partners chart data
-      const activePartnersResponse = await axios.get(`${API_BASE_URL}/country-dashboard/active-partners-chart?date_range=${dateRange}&period_type=${reportType.toLowerCase()}&start_date=${encodeURIComponent(effectiveStartDate)}&end_date=${encodeURIComponent(effectiveEndDate)}&partner_country=${encodeURIComponent(partnerCountry)}`);
-      setActivePartnersChartData(activePartnersResponse.data.data || null);
-
-      // Fetch events data
-      const eventsResponse = await axios.get(`${API_BASE_URL}/country-dashboard/events?date_range=${dateRange}&partner_country=${encodeURIComponent(partnerCountry)}`);
-      setEventsTableData(eventsResponse.data.data || null);
-
-      // Fetch performance contribution data
-      const contributionResponse = await axios.get(`${API_BASE_URL}/country-dashboard/performance-contribution?date_range=${dateRange}&partner_country=${encodeURIComponent(partnerCountry)}`);
-      setPerformanceContributionData(contributionResponse.data.data || null);
-
-      // Fetch performance stats data
-      const performanceStatsResponse = await axios.get(`${API_BASE_URL}/country-dashboard/performance-stats?date_range=${dateRange}&period_type=${reportType.toLowerCase()}&start_date=${encodeURIComponent(effectiveStartDate)}&end_date=${encodeURIComponent(effectiveEndDate)}&partner_country=${encodeURIComponent(partnerCountry)}`);
-      setPerformanceStatsData(performanceStatsResponse.data.data || null);
-
-      // Fetch earning partners chart data
-      const earningPartnersResponse = await axios.get(`${API_BASE_URL}/country-dashboard/earning-partners-chart?date_range=${dateRange}&period_type=${reportType.toLowerCase()}&start_date=${encodeURIComponent(effectiveStartDate)}&end_date=${encodeURIComponent(effectiveEndDate)}&partner_country=${encodeURIComponent(partnerCountry)}`);
-      setEarningPartnersChartData(earningPartnersResponse.data.data || null);
-
-      // Fetch top partners data
-      const topPartnersResponse = await axios.get(`${API_BASE_URL}/country-dashboard/top-partners?date_range=${dateRange}&partner_country=${encodeURIComponent(partnerCountry)}&limit=20`);
-      setTopPartnersData(topPartnersResponse.data.data || null);
-
-      // Fetch inactive partners data
-      const inactivePartnersResponse = await axios.get(`${API_BASE_URL}/country-dashboard/inactive-partners?date_range=${dateRange}&partner_country=${encodeURIComponent(partnerCountry)}&limit=50`);
-      setInactivePartnersData(inactivePartnersResponse.data.data || null);
+      // Fetch every dashboard section in one request; the backend computes them concurrently
+      const bundleParams = new URLSearchParams({
+        date_range: dateRange,
+        period_type: reportType.toLowerCase(),
+        start_date: effectiveStartDate,
+        end_date: effectiveEndDate,
+        partner_country: partnerCountry,
+        top_partners_limit: 20,
+        inactive_partners_limit: 50,
+        new_partner_support_limit: 100
+      });
+      const bundleResponse = await axios.get(`${API_BASE_URL}/country-dashboard/bundle?${bundleParams}`);
+      const sections = bundleResponse.data.data || {};
+      const sectionErrors = bundleResponse.data.errors || {};
+      if (Object.keys(sectionErrors).length > 0) {
+        console.error('Some dashboard sections failed to load:', sectionErrors);
+      }
 
-      // Fetch new partner support data
-      const newPartnerResponse = await axios.get(`${API_BASE_URL}/country-dashboard/new-partner-support?date_range=${dateRange}&partner_country=${encodeURIComponent(partnerCountry)}&limit=100`);
-      setNewPartnerSupportData(newPartnerResponse.data.data || null);
+      const overviewData = sections.overview || {};
+      setCountryOverview(overviewData.country_data || []);
+      setAvailableCountries(sections.countries || []);
+      setGrowthTrends(sections.growth_trends || []);
+      setApplicationChartData(sections.application_chart || null);
+      setFunnelData(sections.partner_funnel || null);
+      setActivationChartData(sections.activation_chart || null);
+      setActivePartnersChartData(sections.active_partners_chart || null);
+      setEventsTableData(sections.events || null);
+      setPerformanceContributionData(sections.performance_contribution || null);
+      setPerformanceStatsData(sections.performance_stats || null);
+      setEarningPartnersChartData(sections.earning_partners_chart || null);
+      setTopPartnersData(sections.top_partners || null);
+      setInactivePartnersData(sections.inactive_partners || null);
+      setNewPartnerSupportData(sections.new_partner_support || null);
 
       // Calculate basic KPIs from available data
       calculateKPIs(overviewData.country_data || [], overviewData.financial_totals || {});
 
       // Set country performance data from backend
-      if (contributionResponse.data.data && contributionResponse.data.data.performance_data) {
-        setCountryPerformance(contributionResponse.data.data.performance_data);
+      if (sections.performance_contribution && sections.performance_contribution.performance_data) {
+        setCountryPerformance(sections.performance_contribution.performance_data);
       } else {
         setCountryPerformance([]);
       }